@@ -1,2 +1,4 @@
 from .xmltokens import XmlChars as XmlChars
 from .xmlvalidator import XmlValidator as XmlValidator
+from .xmlbatch import BatchValidator as BatchValidator
+from .xmlbatch import validate_many as validate_many
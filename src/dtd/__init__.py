@@ -1,2 +1,7 @@
+from .dtdcache import DtdCache as DtdCache
 from .dtdcore import Dtd as Dtd
+from .dtdelement import ContentKind as ContentKind
+from .dtdelement import ContentModel as ContentModel
+from .dtdelement import DtdElement as DtdElement
 from .dtdentity import DtdEntity as DtdEntity
+from .dtdentity import ExpansionLimits as ExpansionLimits
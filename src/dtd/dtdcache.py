@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterable
+
+from errcl import ErrorCollector
+
+from .dtdcore import Dtd
+
+
+# Part of every key, bumped whenever the layout of Dtd changes so old entries are never loaded
+CACHE_VERSION = 3
+
+
+class CacheEntry(NamedTuple):
+    # Key of the DTD text and its modules as they were when the DTD was compiled
+    key: str
+    # Files the resolver loaded while the DTD was compiled, in the order they were loaded
+    modules: tuple[Path, ...]
+    dtd: Dtd
+
+
+class DtdCache:
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        """Compiled DTDs pickled to a local directory, keyed by the hash of the DTD text and its resolved modules.
+
+        Entries are loaded with pickle, the directory has to be as trusted as the code itself.
+        """
+        self.directory = Path(directory)
+
+    def get_key(self, sources: Iterable[str | bytes]) -> str:
+        """Key of the DTD text followed by the text of every module it includes, in the order they are resolved."""
+        digest = hashlib.sha256(f"xmlvalidator-dtd-{CACHE_VERSION}".encode())
+        for source in sources:
+            data = source.encode() if isinstance(source, str) else source
+            # lengths keep the boundaries between sources, "ab" + "c" and "a" + "bc" differ
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get_modules_key(self, text: str, modules: Iterable[Path]) -> str | None:
+        """Key of the DTD text and the current content of its modules, None when a module cannot be read."""
+        try:
+            return self.get_key([text, *(module.read_bytes() for module in modules)])
+        except OSError:
+            return None
+
+    def get_path(self, text: str) -> Path:
+        # one entry per DTD text, its modules are only known once it is compiled
+        return self.directory / f"{self.get_key([text])}.dtd.pickle"
+
+    def load(self, text: str) -> Dtd | None:
+        """DTD compiled from text, None when there is no entry or one of its modules changed since."""
+        path = self.get_path(text)
+        try:
+            with path.open("rb") as file:
+                entry = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # written by an incompatible version, cut short or corrupt, it is compiled again
+            path.unlink(missing_ok=True)
+            return None
+        if not isinstance(entry, CacheEntry) or not isinstance(entry.dtd, Dtd):
+            return None
+        if self.get_modules_key(text, entry.modules) != entry.key:
+            return None
+        return entry.dtd
+
+    def store(self, text: str, dtd: Dtd, modules: Iterable[Path]) -> None:
+        """Writes a copy without errors or per-document state, readers never see a partial entry."""
+        modules = tuple(modules)
+        key = self.get_modules_key(text, modules)
+        if key is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = pickle.dumps(CacheEntry(key, modules, dtd.copy(ErrorCollector())), pickle.HIGHEST_PROTOCOL)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp_name, self.get_path(text))
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def get_or_compile(self, text: str, compile_dtd: Callable[[], tuple[Dtd, Iterable[Path]]]) -> Dtd:
+        """compile_dtd returns the DTD and the modules it loaded, see XmlValidator.load_dtd."""
+        dtd = self.load(text)
+        if dtd is None:
+            dtd, modules = compile_dtd()
+            self.store(text, dtd, modules)
+        return dtd
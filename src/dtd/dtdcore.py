@@ -6,10 +6,29 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from errcl import ErrorCollector
 
+    from .dtdentity import ExpansionLimits
+
+from symboltable import SymbolTable
+
+from .dtdelement import DtdElement
 from .dtdentity import DtdEntity
 
 
 class Dtd:
-    def __init__(self, err: ErrorCollector) -> None:
+    def __init__(self, err: ErrorCollector, limits: ExpansionLimits | None = None) -> None:
         self.err = err
-        self.entity = DtdEntity(self.err)
+        self.entity = DtdEntity(self.err, limits)
+        # Interned element, attribute and namespace prefix names of the document
+        self.symbols = SymbolTable()
+        # Compiled content models of the declared elements
+        self.element = DtdElement(self.err, self.symbols)
+
+    def copy(self, err: ErrorCollector) -> Dtd:
+        """Declarations of this DTD for another document, errors go to err and names interned by it stay put."""
+        dtd = object.__new__(Dtd)
+        dtd.err = err
+        dtd.entity = self.entity.copy(err)
+        # compiled models refer to names by id, the document interns its names after them
+        dtd.symbols = self.symbols.copy()
+        dtd.element = self.element.copy(err, dtd.symbols)
+        return dtd
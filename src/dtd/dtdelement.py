@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import re
+from enum import Enum
+from enum import auto
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+
+if TYPE_CHECKING:
+    from errcl import ErrorCollector
+    from symboltable import SymbolTable
+
+from errcl import CritErr
+from errcl import ValidErr
+from xmltokens import XmlChars
+from xmltokens import XmlSpans
+from xmltokens.xmlcharclass import is_xmlname
+
+
+# One token of a content model: #PCDATA, a name or one of ( ) | , ? * +
+MODEL_TOKEN = re.compile(r"[ \t\r\n]*(?:(#PCDATA)|([^ \t\r\n()|,?*+]+)|([()|,?*+]))")
+MODEL_END = re.compile(r"[ \t\r\n]*")
+
+
+class ContentKind(Enum):
+    EMPTY = auto()
+    ANY = auto()
+    MIXED = auto()
+    CHILDREN = auto()
+
+
+class ModelFragment(NamedTuple):
+    # Glushkov sets of a sub-expression, positions are numbered from 1
+    is_nullable: bool
+    first: list[int]
+    last: list[int]
+
+
+class ContentModel:
+    __slots__ = ("kind", "transitions", "accepting", "is_deterministic")
+
+    def __init__(self, kind: ContentKind) -> None:
+        """Content model compiled to a position automaton, state 0 is the start, state p is after position p.
+
+        Transitions map interned element names to the next state, mixed content has a single state.
+        A non-deterministic model keeps only one of the positions a name leads to, it is not used for validation.
+        """
+        self.kind = kind
+        self.transitions: list[dict[int, int]] = [{}]
+        self.accepting: list[bool] = [True]
+        self.is_deterministic = True
+
+    def allows_text(self) -> bool:
+        return self.kind in {ContentKind.MIXED, ContentKind.ANY}
+
+    def get_next_state(self, state: int, name_id: int) -> int:
+        """State after a child element, -1 when the model does not allow it there."""
+        if self.kind == ContentKind.ANY:
+            return state
+        return self.transitions[state].get(name_id, -1)
+
+    def is_accepting(self, state: int) -> bool:
+        if self.kind == ContentKind.ANY:
+            return True
+        return self.accepting[state]
+
+
+class ModelCompiler:
+    def __init__(self, model: XmlChars, symbols: SymbolTable, err: ErrorCollector) -> None:
+        """Builds the Glushkov automaton of a children content model in one pass over its tokens."""
+        self.model = model
+        self.symbols = symbols
+        self.err = err
+        self.tokens: list[XmlChars] = []
+        self.is_valid = True
+        self.pointer = 0
+        # Name id, token and follow set of every position, index 0 is the start state
+        self.position_names: list[int] = [-1]
+        self.position_tokens: list[XmlChars] = [model]
+        self.follow: list[list[int]] = [[]]
+        self.tokenize()
+
+    def tokenize(self) -> None:
+        text = self.model.strchars
+        pos = 0
+        while (match := MODEL_TOKEN.match(text, pos)) is not None:
+            group = match.lastindex or 0
+            self.tokens.append(self.model[match.start(group) : match.end(group)])
+            pos = match.end()
+        pos = MODEL_END.match(text, pos).end()
+        if pos < len(text):
+            self.add_invalid(self.model[pos:])
+
+    def add_invalid(self, token: XmlChars) -> None:
+        if self.is_valid:
+            self.err.add(token, CritErr.ELEMENT_MODEL_INVALID)
+        self.is_valid = False
+
+    def peek(self) -> str:
+        if self.pointer >= len(self.tokens):
+            return ""
+        return self.tokens[self.pointer].strchars
+
+    def get_error_token(self) -> XmlChars:
+        if self.pointer < len(self.tokens):
+            return self.tokens[self.pointer]
+        return self.model
+
+    def compile(self) -> ContentModel | None:
+        if len(self.tokens) == 1 and self.peek() in {"EMPTY", "ANY"}:
+            return ContentModel(ContentKind.EMPTY if self.peek() == "EMPTY" else ContentKind.ANY)
+        if len(self.tokens) >= 2 and self.peek() == "(" and self.tokens[1] == "#PCDATA":
+            return self.compile_mixed()
+        if self.peek() != "(":
+            self.add_invalid(self.get_error_token())
+            return None
+        fragment = self.parse_particle()
+        if self.is_valid and self.pointer < len(self.tokens):
+            self.add_invalid(self.get_error_token())
+        if not self.is_valid or fragment is None:
+            return None
+        return self.build(fragment)
+
+    def compile_mixed(self) -> ContentModel | None:
+        # (#PCDATA) or (#PCDATA | a | b)*, every listed element may appear any number of times
+        content_model = ContentModel(ContentKind.MIXED)
+        self.pointer = 2
+        names = content_model.transitions[0]
+        while self.peek() == "|":
+            self.pointer += 1
+            name = self.get_error_token()
+            if not is_xmlname(self.peek()):
+                self.add_invalid(name)
+                return None
+            name_id = self.symbols.intern(name.strchars)
+            if name_id in names:
+                self.err.add(name, ValidErr.MIXED_DUPLICATE_TAGS)
+            names[name_id] = 0
+            self.pointer += 1
+        if self.peek() != ")":
+            self.add_invalid(self.get_error_token())
+            return None
+        self.pointer += 1
+        if self.peek() == "*":
+            self.pointer += 1
+        elif len(names) > 0:
+            self.add_invalid(self.get_error_token())
+            return None
+        if self.pointer < len(self.tokens):
+            self.add_invalid(self.get_error_token())
+            return None
+        return content_model
+
+    def parse_particle(self) -> ModelFragment | None:
+        token = self.peek()
+        if token == "(":
+            self.pointer += 1
+            fragment = self.parse_group()
+        elif is_xmlname(token):
+            fragment = self.add_position(self.tokens[self.pointer])
+            self.pointer += 1
+        else:
+            self.add_invalid(self.get_error_token())
+            return None
+        if fragment is None:
+            return None
+        return self.parse_modifier(fragment)
+
+    def parse_group(self) -> ModelFragment | None:
+        fragment = self.parse_particle()
+        separator = self.peek() if self.peek() in {",", "|"} else ""
+        while fragment is not None and self.peek() == separator != "":
+            self.pointer += 1
+            next_fragment = self.parse_particle()
+            if next_fragment is None:
+                return None
+            if separator == ",":
+                fragment = self.join_sequence(fragment, next_fragment)
+            else:
+                fragment = self.join_choice(fragment, next_fragment)
+        if fragment is None:
+            return None
+        if self.peek() != ")":
+            # a group mixes "," and "|" or is not closed
+            self.add_invalid(self.get_error_token())
+            return None
+        self.pointer += 1
+        return fragment
+
+    def parse_modifier(self, fragment: ModelFragment) -> ModelFragment:
+        modifier = self.peek()
+        if modifier not in {"?", "*", "+"}:
+            return fragment
+        self.pointer += 1
+        if modifier in {"*", "+"}:
+            for position in fragment.last:
+                self.add_follow(position, fragment.first)
+        return ModelFragment(fragment.is_nullable or modifier != "+", fragment.first, fragment.last)
+
+    def add_position(self, token: XmlChars) -> ModelFragment:
+        position = len(self.position_names)
+        self.position_names.append(self.symbols.intern(token.strchars))
+        self.position_tokens.append(token)
+        self.follow.append([])
+        return ModelFragment(False, [position], [position])
+
+    def add_follow(self, position: int, positions: list[int]) -> None:
+        follow = self.follow[position]
+        follow.extend(next_position for next_position in positions if next_position not in follow)
+
+    def join_sequence(self, left: ModelFragment, right: ModelFragment) -> ModelFragment:
+        for position in left.last:
+            self.add_follow(position, right.first)
+        first = left.first + right.first if left.is_nullable else left.first
+        last = left.last + right.last if right.is_nullable else right.last
+        return ModelFragment(left.is_nullable and right.is_nullable, first, last)
+
+    def join_choice(self, left: ModelFragment, right: ModelFragment) -> ModelFragment:
+        return ModelFragment(left.is_nullable or right.is_nullable, left.first + right.first, left.last + right.last)
+
+    def build(self, fragment: ModelFragment) -> ContentModel:
+        content_model = ContentModel(ContentKind.CHILDREN)
+        self.follow[0] = fragment.first
+        content_model.transitions = []
+        content_model.accepting = [False] * len(self.position_names)
+        content_model.accepting[0] = fragment.is_nullable
+        for position in fragment.last:
+            content_model.accepting[position] = True
+        for position in range(len(self.position_names)):
+            transitions: dict[int, int] = {}
+            for next_position in self.follow[position]:
+                name_id = self.position_names[next_position]
+                if name_id in transitions and content_model.is_deterministic:
+                    # the same name leads to two positions, the next state depends on children not seen yet
+                    self.err.add(self.position_tokens[next_position], ValidErr.NON_DETERMINISTIC_DUPLICATES)
+                    content_model.is_deterministic = False
+                transitions.setdefault(name_id, next_position)
+            content_model.transitions.append(transitions)
+        return content_model
+
+
+class DtdElement:
+    def __init__(self, err: ErrorCollector, symbols: SymbolTable) -> None:
+        self.err = err
+        # Names are interned in the symbol table of the document, tags look their model up by name_id
+        self.symbols = symbols
+        self.models: dict[int, ContentModel] = {}
+
+    def copy(self, err: ErrorCollector, symbols: SymbolTable) -> DtdElement:
+        """Same compiled models for another document, symbols has to be a copy of the table they were built with."""
+        element = DtdElement(err, symbols)
+        element.models = dict(self.models)
+        return element
+
+    def define_element(self, name: str | XmlChars, model: str | XmlChars) -> ContentModel | None:
+        if isinstance(name, str):
+            name = XmlSpans.from_str(name, -1)
+        if isinstance(model, str):
+            model = XmlSpans.from_str(model, -1)
+        name_id = self.symbols.intern(name.strchars)
+        if name_id in self.models:
+            self.err.add(name, ValidErr.ELEMENT_ALREADY_DEFINED)
+            return None
+        if len(model.strchars.strip(" \t\r\n")) == 0:
+            self.err.add(name, ValidErr.ELEMENT_NO_DEFINITION)
+            return None
+        content_model = ModelCompiler(model, self.symbols, self.err).compile()
+        if content_model is not None:
+            self.models[name_id] = content_model
+        return content_model
+
+    def get_model(self, name_id: int) -> ContentModel | None:
+        return self.models.get(name_id)
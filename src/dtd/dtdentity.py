@@ -7,6 +7,9 @@ from xmlstruct import entity
 
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
     from errcl import ErrorCollector
 
 from errcl import CritErr
@@ -14,12 +17,14 @@ from xmltokens import XmlChar
 from xmltokens import XmlCharRef
 from xmltokens import XmlChars
 from xmltokens import XmlProccesor
+from xmltokens import XmlSpans
 
 
 # id=1 reserved for main file
 # id=2 reserved for external subset file
 # id>2 all other entities
 
+
 class GeneralEntity(NamedTuple):
     name: str
     entity_id: int
@@ -28,6 +33,8 @@ class GeneralEntity(NamedTuple):
     public_id: str | None
     ndata: str | None
     replacement_text: XmlChars | None
+    # Directory of the resource that declares the entity, relative system ids are resolved against it
+    base: Path | None = None
 
 
 class ParameterEntity(NamedTuple):
@@ -37,23 +44,135 @@ class ParameterEntity(NamedTuple):
     system_id: str | None
     public_id: str | None
     replacement_text: XmlChars
+    # Directory of the resource that declares the entity, see GeneralEntity.base
+    base: Path | None = None
+
+
+class ExpansionLimits(NamedTuple):
+    # Nested entity references below the reference in the document
+    max_depth: int = 40
+    # Characters produced by all expansions in one document
+    max_expanded_chars: int = 10_000_000
+    # Expanded characters per input character, only checked once amplification_threshold is passed
+    max_amplification: float = 100.0
+    amplification_threshold: int = 1 << 23
+
+
+class CachedExpansion(NamedTuple):
+    generation: int
+    entity: GeneralEntity | ParameterEntity
+    expansion: XmlChars
+    # Deepest nesting of references inside the expansion
+    depth: int
 
 
 class DtdEntity:
-    def __init__(self, err: ErrorCollector) -> None:
+    def __init__(self, err: ErrorCollector, limits: ExpansionLimits | None = None) -> None:
         self.err = err
+        self.limits = ExpansionLimits() if limits is None else limits
+        # Expansion budget of the document, once a limit is hit every further expansion is refused
+        self.expanded_chars = 0
+        self.document_chars = 0
+        self.is_expansion_aborted = False
+        # A recursive reference was found, only the outermost reference being expanded fails
+        self.is_recursion_found = False
+        # Nesting depth below the last expanded entity, cached expansions have to respect max_depth too
+        self.expansion_depth = 0
+        # Ids of the entities being expanded, kept alongside the calling stacks for O(1) recursion checks
+        self.expanding_ids: set[int] = set()
         self.gents: dict[str, GeneralEntity] = {}
         self.pents: dict[str, ParameterEntity] = {}
         self.idcnt = 2
+        # Bumped by every registration, a new entity can change how older replacement texts expand
+        self.generation = 0
+        self.gent_cache: dict[str, CachedExpansion] = {}
+        self.pent_cache: dict[str, CachedExpansion] = {}
+        # Lazy mode keeps entity references in attribute values unexpanded until the value is read
+        self.is_lazy = False
+        # Generation and verdict of the check of each general entity, see check_gent
+        self.gent_checks: dict[str, tuple[int, bool]] = {}
+        # Loads the text of external parsed entities, set by a validator that has a resolver
+        self.load_external: Callable[[GeneralEntity], XmlChars | None] | None = None
+        # External entities whose text could not be loaded
+        self.failed_loads: set[str] = set()
         for predef_gent in [
             ("lt", "&#38;#60;"),
             ("gt", "&#62;"),
             ("amp", "&#38;#38;"),
             ("apos", "&#39;"),
-            ("quot", "&#34;")
-         ]:
+            ("quot", "&#34;"),
+        ]:
             self.register_gent(predef_gent[0], predef_gent[1], True)
 
+    def copy(self, err: ErrorCollector) -> DtdEntity:
+        """Same declarations with a fresh expansion budget and caches, for validating another document."""
+        entity = object.__new__(DtdEntity)
+        entity.err = err
+        entity.limits = self.limits
+        entity.expanded_chars = 0
+        entity.document_chars = 0
+        entity.is_expansion_aborted = False
+        entity.is_recursion_found = False
+        entity.expansion_depth = 0
+        entity.expanding_ids = set()
+        entity.gents = dict(self.gents)
+        entity.pents = dict(self.pents)
+        entity.idcnt = self.idcnt
+        entity.generation = self.generation
+        # checks and expansions report errors once, to the document that triggers them
+        entity.gent_cache = {}
+        entity.pent_cache = {}
+        entity.is_lazy = self.is_lazy
+        entity.gent_checks = {}
+        entity.load_external = None
+        entity.failed_loads = set()
+        return entity
+
+    def add_document_chars(self, length: int) -> None:
+        self.document_chars += length
+
+    def abort_expansion(self, ref: XmlChars, limit: str) -> None:
+        self.is_expansion_aborted = True
+        self.err.add(ref, CritErr.ENTITY_EXPANSION_LIMIT, options={"limit": limit})
+
+    def abort_recursion(self, ref: XmlChars) -> None:
+        self.is_recursion_found = True
+        self.err.add(ref, CritErr.ENTITY_RECURSION)
+
+    def is_expansion_stopped(self) -> bool:
+        return self.is_expansion_aborted or self.is_recursion_found
+
+    def push_expansion(self, calling_stack: list[int], entity_id: int) -> None:
+        calling_stack.append(entity_id)
+        self.expanding_ids.add(entity_id)
+
+    def pop_expansion(self, calling_stack: list[int]) -> None:
+        self.expanding_ids.discard(calling_stack.pop())
+
+    def check_expansion_depth(self, ref: XmlChars, depth: int) -> bool:
+        if self.is_expansion_aborted:
+            return False
+        if depth > self.limits.max_depth:
+            self.abort_expansion(ref, "depth")
+            return False
+        return True
+
+    def charge_expansion(self, ref: XmlChars, length: int) -> bool:
+        """Counts expanded characters before they are inserted, O(1) per piece."""
+        if self.is_expansion_aborted:
+            return False
+        self.expanded_chars += length
+        if self.expanded_chars > self.limits.max_expanded_chars:
+            self.abort_expansion(ref, "size")
+            return False
+        if (
+            self.expanded_chars > self.limits.amplification_threshold
+            and self.expanded_chars > self.limits.max_amplification * max(self.document_chars, 1)
+        ):
+            self.abort_expansion(ref, "amplification")
+            return False
+        return True
+
     def get_next_id(self) -> int:
         self.idcnt += 1
         return self.idcnt
@@ -65,15 +184,16 @@ class DtdEntity:
         is_predefined: bool,
         system_id: str | None = None,
         public_id: str | None = None,
-        ndata: str | None = None
-        ) -> None:
+        ndata: str | None = None,
+        base: Path | None = None,
+    ) -> None:
         if isinstance(name, str):
-            name = XmlChars(*[XmlChar(char, -1, -1, -1) for char in name])
+            name = XmlSpans.from_str(name, -1)
         if name.strchars in self.gents:
             self.err.add(name, CritErr.ENTITY_ALREADY_REGISTERED)
             return
         if isinstance(replacement_text, str):
-            replacement_text = XmlChars(*[XmlChar(char, -1, -1, -1) for char in replacement_text])
+            replacement_text = XmlSpans.from_str(replacement_text, -1)
         else:
             replacement_text = replacement_text.copy_with_new_entity_id(-1)
         calling_stack = [-1]
@@ -85,8 +205,8 @@ class DtdEntity:
                 if chrref is not None:
                     chrref_value = self.get_chrref_value(chrref)
                     if chrref_value is not None:
-                        proc.ins_repl_text(len(chrref.xmlchars), chrref_value)
-                        proc.move(len(chrref.xmlchars))
+                        proc.ins_repl_text(len(chrref), chrref_value)
+                        proc.move(len(chrref_value))
                         continue
                 # bypass without parsing gent
                 sub_gent_ref = proc.get_gent_ref()
@@ -104,14 +224,16 @@ class DtdEntity:
                 # parse pent
                 sub_pent_ref = proc.get_pent_ref()
                 if sub_pent_ref is not None:
-                    new_entity_id = proc.xmlchars.get_entity_id()
+                    new_entity_id = replacement_text.get_entity_id()
                     resolved_pent = self.deref_pent(sub_pent_ref, calling_stack)
+                    # only this reference fails on a recursion
+                    self.is_recursion_found = False
                     if resolved_pent is None:
                         proc.move()
                         continue
                     resolved_pent_new_id = resolved_pent.copy_with_new_entity_id(new_entity_id)
                     proc.ins_repl_text(len(sub_pent_ref), resolved_pent_new_id)
-                    proc.move(len(sub_pent_ref))
+                    proc.move(len(resolved_pent_new_id))
                     continue
                 else:
                     # error invalid usage of procent sign
@@ -119,10 +241,39 @@ class DtdEntity:
                     continue
             proc.move()
         entity_id = self.get_next_id()
+        self.generation += 1
         proc.xmlchars.add_entity_id(entity_id)
-        self.gents[name.strchars] = GeneralEntity(name.strchars, entity_id, is_predefined, system_id, public_id, ndata, proc.xmlchars,)
-
+        self.gents[name.strchars] = GeneralEntity(
+            name.strchars, entity_id, is_predefined, system_id, public_id, ndata, proc.xmlchars, base
+        )
 
+    def register_pent(
+        self,
+        name: str | XmlChars,
+        replacement_text: str | XmlChars,
+        system_id: str | None = None,
+        public_id: str | None = None,
+        base: Path | None = None,
+    ) -> None:
+        """References in the replacement text are expanded when the parameter entity is dereferenced."""
+        if isinstance(name, str):
+            name = XmlSpans.from_str(name, -1)
+        if name.strchars in self.pents:
+            self.err.add(name, CritErr.ENTITY_ALREADY_REGISTERED)
+            return
+        if isinstance(replacement_text, str):
+            replacement_text = XmlSpans.from_str(replacement_text, -1)
+        entity_id = self.get_next_id()
+        self.generation += 1
+        self.pents[name.strchars] = ParameterEntity(
+            name.strchars,
+            entity_id,
+            False,
+            system_id,
+            public_id,
+            replacement_text.copy_with_new_entity_id(entity_id),
+            base,
+        )
 
     # def get_gent_name(self, gent_ref: XmlChars) -> XmlChars | None:
     #     if gent_ref.strchars[0] != "&":
@@ -143,14 +294,14 @@ class DtdEntity:
             return None
         if chrref.strchars[-1] != ";":
             return None
-        if chrref.xmlchars[2] == "x":
-            chrref_hexdec = XmlChars(*chrref.xmlchars[3:-1])
+        if chrref.strchars[2:3] == "x":
+            chrref_hexdec = chrref.strchars[3:-1]
             is_hex = True
         else:
-            chrref_hexdec = XmlChars(*chrref.xmlchars[2:-1])
+            chrref_hexdec = chrref.strchars[2:-1]
             is_hex = False
         try:
-            char_code = int(chrref_hexdec.strchars, 16 if is_hex else 10)
+            char_code = int(chrref_hexdec, 16 if is_hex else 10)
             xmlchars = XmlChars(XmlCharRef(chr(char_code), *chrref.xmlchars))
             return xmlchars
         except ValueError:
@@ -163,44 +314,87 @@ class DtdEntity:
         xmlchars_arr: list[XmlChar] = [XmlChar(char, buffer_slot, buffer_pos, entity_id) for char in repl_text]
         return XmlChars(*xmlchars_arr)
 
-    # def get_gent_repl(self, gent_ref: XmlChars) -> GeneralEntity | None:
-    #     gent_name = gent_ref.strchars[1:-1]
-    #     if gent_name in self.gents_predef:
-    #         repl_text = self.gents_predef[gent_name]
-    #         return GeneralEntity(0, None, None, None, self.create_xmlchar_for_predef(repl_text, gent_ref))
-    #     if gent_name in self.gents:
-    #         return self.gents[gent_name]
-    #     return None
+    def get_gent_repl(self, gent_ref: XmlChars) -> GeneralEntity | None:
+        return self.gents.get(gent_ref.strchars[1:-1])
+
+    def get_cached_expansion(
+        self, cache: dict[str, CachedExpansion], name: str, entity: GeneralEntity | ParameterEntity
+    ) -> CachedExpansion | None:
+        cached = cache.get(name)
+        if cached is None or cached.generation != self.generation or cached.entity is not entity:
+            return None
+        return cached
+
+    def check_gent(self, gent_ref: XmlChars) -> bool:
+        """Checks once per entity and DTD generation that a reference can be expanded."""
+        name = gent_ref.strchars[1:-1]
+        checked = self.gent_checks.get(name)
+        if checked is not None and checked[0] == self.generation:
+            return checked[1]
+        is_valid = self.deref_gent(gent_ref) is not None
+        self.gent_checks[name] = (self.generation, is_valid)
+        return is_valid
 
     def deref_gent(self, gent_ref: XmlChars, calling_stack: list[int] | None = None) -> XmlChars | None:
         gent_repl = self.get_gent_repl(gent_ref)
         if gent_repl is None:
             # generate not found gent name in predifined entities
             return None
-        # # check for recursion
         if calling_stack is None:
+            # a recursion found in an earlier reference does not stop this one
+            self.is_recursion_found = False
             calling_stack = []
-        if calling_stack.count(gent_repl.entity_id) > 0:
-            # generate entity recursion error
-            raise ValueError("Entity Recursion")
-        else:
-            calling_stack.append(gent_repl.entity_id)
-        # no parsing of external entity
+        cached = self.get_cached_expansion(self.gent_cache, gent_ref.strchars[1:-1], gent_repl)
+        if cached is not None:
+            if not self.check_expansion_depth(gent_ref, len(calling_stack) + cached.depth):
+                return None
+            if not self.charge_expansion(gent_ref, len(cached.expansion)):
+                return None
+            self.expansion_depth = cached.depth
+            return cached.expansion
+        # # check for recursion
+        if gent_repl.entity_id in self.expanding_ids:
+            self.abort_recursion(gent_ref)
+            return None
+        if not self.check_expansion_depth(gent_ref, len(calling_stack)):
+            return None
+        self.push_expansion(calling_stack, gent_repl.entity_id)
+        replacement_text = gent_repl.replacement_text
+        # external entity, only parsed when its text can be loaded
         if gent_repl.system_id is not None:
-            return gent_repl.replacement_text
+            if self.load_external is None or gent_repl.ndata is not None:
+                self.pop_expansion(calling_stack)
+                self.expansion_depth = 0
+                return gent_repl.replacement_text
+            replacement_text = None
+            if gent_repl.name not in self.failed_loads:
+                replacement_text = self.load_external(gent_repl)
+            if replacement_text is None:
+                if gent_repl.name not in self.failed_loads:
+                    # reported once, later references to the entity stay as they are
+                    self.failed_loads.add(gent_repl.name)
+                    self.err.add(gent_ref, CritErr.ENTITY_LOAD_FAILED)
+                self.pop_expansion(calling_stack)
+                self.expansion_depth = 0
+                return None
         # check for ndata entity
-        if gent_repl.replacement_text is None:
+        if replacement_text is None:
             raise ValueError("Ndata not allowed.")
+        # the budget is charged piece by piece, nested expansions charge what they insert themselves
+        if not self.charge_expansion(gent_ref, len(replacement_text)):
+            self.pop_expansion(calling_stack)
+            return None
         # parsing of internal entity
-        proc = XmlProccesor(gent_repl.replacement_text)
+        proc = XmlProccesor(replacement_text)
+        depth = 0
         while not proc.is_end():
             # parse charref
             chrref = proc.get_chrref()
             if chrref is not None:
                 chrref_value = self.get_chrref_value(chrref)
                 if chrref_value is not None:
-                    proc.ins_repl_text(len(chrref.xmlchars), chrref_value)
-                    proc.move(len(chrref.xmlchars))
+                    proc.ins_repl_text(len(chrref), chrref_value)
+                    proc.move(len(chrref_value))
                     continue
             # parse gent
             sub_gent_ref = proc.get_gent_ref()
@@ -208,65 +402,72 @@ class DtdEntity:
                 # generate error
                 pass
             else:
-                new_entity_id = proc.xmlchars.get_entity_id()
+                new_entity_id = replacement_text.get_entity_id()
                 resolved_gent = self.deref_gent(sub_gent_ref, calling_stack)
+                if self.is_expansion_stopped():
+                    self.pop_expansion(calling_stack)
+                    return None
                 if resolved_gent is None:
                     # generate error
                     proc.move()
                     continue
+                depth = max(depth, self.expansion_depth + 1)
                 resolved_gent_new_id = resolved_gent.copy_with_new_entity_id(new_entity_id)
                 proc.ins_repl_text(len(sub_gent_ref), resolved_gent_new_id)
-                proc.move(len(sub_gent_ref))
+                proc.move(len(resolved_gent_new_id))
                 continue
             proc.move()
+        self.pop_expansion(calling_stack)
+        self.expansion_depth = depth
+        self.gent_cache[gent_ref.strchars[1:-1]] = CachedExpansion(self.generation, gent_repl, proc.xmlchars, depth)
         return proc.xmlchars
 
     def get_pent_repl(self, pent_ref: XmlChars) -> ParameterEntity | None:
-        pent_name = pent_ref.strchars[1:-1]
-        if pent_name in self.pents_predef:
-            repl_text = self.pents_predef[pent_name]
-            return ParameterEntity(0, None, None, self.create_xmlchar_for_predef(repl_text, pent_ref))
-        if pent_name in self.pents:
-            return self.pents[pent_name]
-        return None
-
-    def check_gent_recursion(self, gent_repl_text: str | XmlChars, calling_stack: list[int] | None) -> None:
-        if isinstance(gent_repl_text, str):
-            xmlchars_arr: list[XmlChar] = [XmlChar(char, -1, -1, -1) for char in gent_repl_text]
-            gent_repl_text = XmlChars(*xmlchars_arr)
-        if calling_stack is None:
-            calling_stack = []
-        proc = XmlProccesor(gent_repl_text)
-        while not proc.is_end():
-
-
+        return self.pents.get(pent_ref.strchars[1:-1])
 
     def deref_pent(self, pent_ref: XmlChars, calling_stack: list[int] | None = None) -> XmlChars | None:
         pent_repl = self.get_pent_repl(pent_ref)
         if pent_repl is None:
             # generate not found gent name in predifined entities
             return None
-        # check for recursion
         if calling_stack is None:
+            self.is_recursion_found = False
             calling_stack = []
-        if calling_stack.count(pent_repl.entity_id) > 0:
-            # generate entity recursion error
-            raise ValueError("Entity Recursion")
-        else:
-            calling_stack.append(pent_repl.entity_id)
+        cached = self.get_cached_expansion(self.pent_cache, pent_ref.strchars[1:-1], pent_repl)
+        if cached is not None:
+            if not self.check_expansion_depth(pent_ref, len(calling_stack) + cached.depth):
+                return None
+            if not self.charge_expansion(pent_ref, len(cached.expansion)):
+                return None
+            self.expansion_depth = cached.depth
+            return cached.expansion
+        # check for recursion
+        if pent_repl.entity_id in self.expanding_ids:
+            self.abort_recursion(pent_ref)
+            return None
+        if not self.check_expansion_depth(pent_ref, len(calling_stack)):
+            return None
+        self.push_expansion(calling_stack, pent_repl.entity_id)
         # no parsing of external entity
         if pent_repl.system_id is not None:
+            self.pop_expansion(calling_stack)
+            self.expansion_depth = 0
             return pent_repl.replacement_text
+        # the budget is charged piece by piece, nested expansions charge what they insert themselves
+        if not self.charge_expansion(pent_ref, len(pent_repl.replacement_text)):
+            self.pop_expansion(calling_stack)
+            return None
         # parsing of internal entity
         proc = XmlProccesor(pent_repl.replacement_text)
+        depth = 0
         while not proc.is_end():
             # parse charref
             chrref = proc.get_chrref()
             if chrref is not None:
                 chrref_value = self.get_chrref_value(chrref)
                 if chrref_value is not None:
-                    proc.ins_repl_text(len(chrref.xmlchars), chrref_value)
-                    proc.move(len(chrref.xmlchars))
+                    proc.ins_repl_text(len(chrref), chrref_value)
+                    proc.move(len(chrref_value))
                     continue
             # bypass without parsing gent
             sub_gent_ref = proc.get_gent_ref()
@@ -274,22 +475,30 @@ class DtdEntity:
                 gent_name = self.get_gent_repl(sub_gent_ref)
                 if gent_name is None:
                     # not valid parameter entity reference
+                    self.pop_expansion(calling_stack)
                     return None
                 proc.move(len(sub_gent_ref))
                 continue
             # parse pent
             sub_pent_ref = proc.get_pent_ref()
             if sub_pent_ref is not None:
-                new_entity_id = proc.xmlchars.get_entity_id()
+                new_entity_id = pent_repl.replacement_text.get_entity_id()
                 resolved_pent = self.deref_pent(sub_pent_ref, calling_stack)
+                if self.is_expansion_stopped():
+                    self.pop_expansion(calling_stack)
+                    return None
                 if resolved_pent is None:
                     proc.move()
                     continue
+                depth = max(depth, self.expansion_depth + 1)
                 resolved_pent_new_id = resolved_pent.copy_with_new_entity_id(new_entity_id)
                 proc.ins_repl_text(len(sub_pent_ref), resolved_pent_new_id)
-                proc.move(len(sub_pent_ref))
+                proc.move(len(resolved_pent_new_id))
                 continue
             proc.move()
+        self.pop_expansion(calling_stack)
+        self.expansion_depth = depth
+        self.pent_cache[pent_ref.strchars[1:-1]] = CachedExpansion(self.generation, pent_repl, proc.xmlchars, depth)
         return proc.xmlchars
 
     def deref_pent_with_spaces(self, pent_ref: XmlChars) -> XmlChars | None:
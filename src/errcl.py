@@ -12,6 +12,9 @@ class CritErr(Enum):
     # Well-formedness
     # Mismatched tags, unclosed elements, invalid attribute syntax
     ENTITY_ALREADY_REGISTERED = "Entity is already registed and cannot be registed again."
+    ENTITY_EXPANSION_LIMIT = "Entity expansion exceeds the allowed limit, expansion was aborted."
+    ENTITY_RECURSION = "Entity references itself, expansion was aborted."
+    ENTITY_LOAD_FAILED = "External entity cannot be resolved or read."
     TAG_LOCATION_INVALID = "Tag is not allowed inside DOCTYPE or Dtd Conditional subset."
     TAG_NAME_INVALID = "Tag name is missing. The tag is invalid."
     TAG_ONLY_ONE_ROOT = "Only one root tag is allowed."
@@ -21,25 +24,45 @@ class CritErr(Enum):
     ATTR_EXPECTED_EQUAL = "Expected equal sign."
     ATTR_EXPECTED_VALUE = "Expected attribute value enclosed in quotes."
     ATTR_EXPECTED_SPACE = "Expected empty space after attribute value."
+    ATTR_DUPLICATE = "Attribute name appears more than once in the same tag."
     END_TAG_INVALID_TRAILING = "Invalid trailing after the name of the end-tag."
     END_TAG_NESTED_IN_DTD = "End-tag is not allowed inside DOCTYPE or Dtd Conditional subset."
     TAG_NOT_CLOSED = "Tag is not closed."
     END_TAG_NOT_MATCH = "End tag not matching any start tag."
+    CHAR_UNDECODABLE = "Byte cannot be decoded in the encoding of the document."
     PUBID_LITERAL_CHAR_NOT_ALLOWED = "Character not allowed inside Pubid Literal."
+    TEXT_CDATA_END = "The sequence ]]> is not allowed in character data."
+    COMMENT_DOUBLE_HYPHEN = "The sequence -- is not allowed inside a comment."
+    CDATA_LOCATION_INVALID = "CDATA section is only allowed inside an element."
+    PI_TARGET_INVALID = "Processing instruction target is not a valid name."
+    PI_TARGET_RESERVED = "Processing instruction target xml is reserved."
+    XML_DECL_INVALID = "Invalid content in XML declaration."
+    XML_DECL_VERSION_MISSING = "XML declaration must start with the version."
+    XML_DECL_LOCATION_INVALID = "XML declaration is only allowed at the start of the document."
+    ELEMENT_NAME_INVALID = "Element declaration is missing a valid name."
+    ELEMENT_MODEL_INVALID = "Invalid content model in element declaration."
+    ENTITY_NAME_INVALID = "Entity declaration is missing a valid name."
+    ENTITY_DECL_INVALID = "Invalid content in entity declaration."
+    ENTITY_UNDEFINED = "Entity is referenced but not declared."
+    DTD_DECL_UNSUPPORTED = "Declaration is not supported in an external DTD, it was skipped."
+    DTD_TEXT_INVALID = "Text is not allowed between the declarations of a DTD."
 
 
 class ValidErr(Enum):
     # DTD Conformance
     # Order violations, missing elements, attribute constraint violations
     MIXED_UNDEFINED_TAG = "Tag is not defined in mixed content definition."
+    MIXED_DUPLICATE_TAGS = "Tag is listed more than once in mixed content definition."
     NON_DETERMINISTIC_DUPLICATES = (
         "Detected non-deterministic content model, duplicate references were found in definition."
     )
     UNDEFINED_ELEMENT = "Element not defined."
     INCOMPLETE_DEFINITION = "Not all requirements in definition are met."
+    ELEMENT_NOT_ALLOWED = "Element is not allowed at this place by the definition of its parent."
     ELEMENT_ALREADY_DEFINED = "Element is defined already."
     ELEMENT_NO_DEFINITION = "Element does not have any definitions."
     NO_PARSED_TEXT_IN_CONTENT = "Parsed text data is not allowed in element content definition."
+    EMPTY_ELEMENT_CONTENT = "Element declared EMPTY must not have any content."
 
 
 class ErrorToken:
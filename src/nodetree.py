@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from array import array
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from symboltable import SymbolTable
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+class NodeKind(IntEnum):
+    DOCUMENT = 0
+    ELEMENT = 1
+    ENTITY = 2
+    TEXT = 3
+    CDATA = 4
+    COMMENT = 5
+    INSTRUCTIONS = 6
+
+
+class NodeTable:
+    def __init__(self, symbols: SymbolTable | None = None) -> None:
+        """Document tree stored as parallel array columns, one row per node in document order.
+
+        Row 0 is the document node. Links are row indices, -1 means none. Start and end are offsets
+        into TextBuffer.valid_chars of the buffers in slot and end_slot, they differ when a stream piece
+        ends inside the element. End moves to the end-tag once the element is closed.
+        """
+        self.kind = array("b")
+        self.parent = array("q")
+        self.first_child = array("q")
+        self.last_child = array("q")
+        self.next_sibling = array("q")
+        self.name_id = array("l")
+        self.slot = array("l")
+        self.start = array("q")
+        self.end_slot = array("l")
+        self.end = array("q")
+        # Interned names, shared with the parser when the table is built by XmlValidator
+        self.symbols = SymbolTable() if symbols is None else symbols
+        self.add_node(NodeKind.DOCUMENT, -1, -1, -1, 0, 0)
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def add_node(self, kind: NodeKind, parent: int, name_id: int, slot: int, start: int, end: int) -> int:
+        """Appends a row, name_id comes from symbols and is -1 for nodes without a name."""
+        index = len(self.kind)
+        self.kind.append(kind)
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        self.name_id.append(name_id)
+        self.slot.append(slot)
+        self.start.append(start)
+        self.end_slot.append(slot)
+        self.end.append(end)
+        if parent >= 0:
+            if self.last_child[parent] < 0:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[self.last_child[parent]] = index
+            self.last_child[parent] = index
+        return index
+
+    def set_end(self, index: int, slot: int, end: int) -> None:
+        self.end_slot[index] = slot
+        self.end[index] = end
+
+    def get_root(self) -> NodeRef:
+        return NodeRef(self, 0)
+
+    def iter_kind(self, kind: NodeKind) -> Iterator[NodeRef]:
+        """Nodes of one kind in document order, a scan over a single column."""
+        for index, node_kind in enumerate(self.kind):
+            if node_kind == kind:
+                yield NodeRef(self, index)
+
+    def iter_named(self, name: str) -> Iterator[NodeRef]:
+        name_id = self.symbols.get_id(name)
+        if name_id < 0:
+            return
+        for index, node_name_id in enumerate(self.name_id):
+            if node_name_id == name_id:
+                yield NodeRef(self, index)
+
+
+class NodeRef:
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: NodeTable, index: int) -> None:
+        """Lightweight view of one row of a NodeTable."""
+        self.table = table
+        self.index = index
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, NodeRef):
+            return False
+        return self.table is other.table and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+
+    def __repr__(self) -> str:
+        return f"NodeRef({self.kind.name}, {self.name!r}, {self.index})"
+
+    def __iter__(self) -> Iterator[NodeRef]:
+        return self.iter_children()
+
+    @property
+    def kind(self) -> NodeKind:
+        return NodeKind(self.table.kind[self.index])
+
+    @property
+    def name(self) -> str:
+        name_id = self.table.name_id[self.index]
+        if name_id < 0:
+            return ""
+        return self.table.symbols.get_name(name_id)
+
+    @property
+    def name_id(self) -> int:
+        return self.table.name_id[self.index]
+
+    @property
+    def slot(self) -> int:
+        return self.table.slot[self.index]
+
+    @property
+    def start(self) -> int:
+        return self.table.start[self.index]
+
+    @property
+    def end_slot(self) -> int:
+        return self.table.end_slot[self.index]
+
+    @property
+    def end(self) -> int:
+        return self.table.end[self.index]
+
+    @property
+    def parent(self) -> NodeRef | None:
+        return self.get_ref(self.table.parent[self.index])
+
+    @property
+    def first_child(self) -> NodeRef | None:
+        return self.get_ref(self.table.first_child[self.index])
+
+    @property
+    def next_sibling(self) -> NodeRef | None:
+        return self.get_ref(self.table.next_sibling[self.index])
+
+    def get_ref(self, index: int) -> NodeRef | None:
+        if index < 0:
+            return None
+        return NodeRef(self.table, index)
+
+    def iter_children(self) -> Iterator[NodeRef]:
+        index = self.table.first_child[self.index]
+        while index >= 0:
+            yield NodeRef(self.table, index)
+            index = self.table.next_sibling[index]
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+
+class SymbolTable:
+    def __init__(self) -> None:
+        """Per-document interning of element, attribute and namespace prefix names to small integers."""
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def copy(self) -> SymbolTable:
+        symbols = SymbolTable()
+        symbols.names = list(self.names)
+        symbols.ids = dict(self.ids)
+        return symbols
+
+    def intern(self, name: str) -> int:
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = name_id
+        return name_id
+
+    def get_id(self, name: str) -> int:
+        """Id of an already interned name, -1 when the name was never seen."""
+        return self.ids.get(name, -1)
+
+    def get_name(self, name_id: int) -> str:
+        return self.names[name_id]
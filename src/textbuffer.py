@@ -1,17 +1,43 @@
 from __future__ import annotations
 
+import re
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
 from typing import NamedTuple
 
 
+# Everything outside #x9 | #xA | #xD | [#x20-#xD7FF] | [#xE000-#xFFFD] | [#x10000-#x10FFFF]
+INVALID_CLASS = r"\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff"
+# C1 controls, #xFDD0-#xFDEF and the last two code points of every supplementary plane
+DISCOURAGED_CLASS = r"\x7f-\x84\x86-\x9f\ufdd0-\ufdef" + "".join(
+    rf"\U{plane:04x}fffe\U{plane:04x}ffff" for plane in range(0x1, 0x11)
+)
+INVALID_CHARS = re.compile(f"[{INVALID_CLASS}]")
+DISCOURAGED_CHARS = re.compile(f"[{DISCOURAGED_CLASS}]")
+# Bytes decode_xml could not decode, see DECODE_ERRORS in xmlencoding
+UNDECODABLE_CHARS = re.compile(r"[\udc00-\udcff]")
+# Any character that keeps a buffer off the fast path
+SPECIAL_CHARS = re.compile(f"[\\r{INVALID_CLASS}{DISCOURAGED_CLASS}]")
+
+
 class CharInfo(NamedTuple):
     position: int
     code: int
 
 
+class CharPos(NamedTuple):
+    position: int
+    line: int
+    column: int
+
+
 class TextBuffer:
-    def __init__(self, chars: str, bufferslot: int) -> None:
+    def __init__(self, chars: str, bufferslot: int, start: CharPos | None = None, is_clean: bool = False) -> None:
         """Processes and classifies characters in XML text."""
         self.bufferslot = bufferslot
+        # Position of the first character when the buffer is a piece of a larger stream
+        self.start = CharPos(0, 1, 1) if start is None else start
         # #x9 | #xA | #xD | [#x20-#xD7FF] | [#xE000-#xFFFD] | [#x10000-#x10FFFF]
         self.valid_chars: str
         # INVALID AND SKIPPED CHARACTERS
@@ -24,6 +50,19 @@ class TextBuffer:
         # C1 Control Characters (#x7F-#x84, #x86-#x9F).
         # Noncharacters (#xFDD0-#xFDEF, and #x[1-10]FFFE-#x[1-10]FFFF).
         self.valid_but_discouraged_chars: list[CharInfo] = []
+        # UNDECODABLE BYTES
+        # Bytes the encoding could not decode, they are kept in valid_chars as U+FFFD.
+        self.undecodable_chars: list[CharInfo] = []
+        # NORMALIZATION POINTS
+        # Sorted offsets in valid_chars where one original character was dropped, either the LF of a CRLF
+        # pair or a skipped invalid character. Duplicates mean several characters dropped at the same place.
+        self.removed_points = array("q")
+        # Offsets in valid_chars where lines start, built on first use.
+        self.line_starts: array[int] | None = None
+        if is_clean:
+            # Already checked at byte level, see decode_xml
+            self.valid_chars = chars
+            return
         self.read(chars)
 
     def is_discouraged(self, code: int) -> bool:
@@ -46,29 +85,60 @@ class TextBuffer:
 
     def read(self, chars: str) -> None:
         """Reads and processes the input characters."""
-        valid_chars: list[str] = []
-        invalid_and_skipped_chars: list[CharInfo] = []
-        valid_but_discouraged_chars: list[CharInfo] = []
-        i = 0
+        self.line_starts = None
+        if SPECIAL_CHARS.search(chars) is None:
+            # Clean input is used as is, no copy is made
+            self.valid_chars = chars
+            self.invalid_and_skipped_chars = []
+            self.valid_but_discouraged_chars = []
+            self.undecodable_chars = []
+            self.removed_points = array("q")
+            return
+        self.undecodable_chars = [
+            CharInfo(match.start(), ord(match.group())) for match in UNDECODABLE_CHARS.finditer(chars)
+        ]
+        if self.undecodable_chars:
+            chars = UNDECODABLE_CHARS.sub("\ufffd", chars)
+        self.invalid_and_skipped_chars = [
+            CharInfo(match.start(), ord(match.group())) for match in INVALID_CHARS.finditer(chars)
+        ]
+        self.valid_but_discouraged_chars = [
+            CharInfo(match.start(), ord(match.group())) for match in DISCOURAGED_CHARS.finditer(chars)
+        ]
+        removed_positions = [char_info.position for char_info in self.invalid_and_skipped_chars]
+        if "\r\n" in chars:
+            removed_positions.extend(match.start() + 1 for match in re.finditer(r"\r\n", chars))
+            removed_positions.sort()
+        self.removed_points = array("q", [position - i for i, position in enumerate(removed_positions)])
+        valid_chars = chars
+        if "\r" in valid_chars:
+            # Normalize line breaks correctly
+            valid_chars = valid_chars.replace("\r\n", "\n").replace("\r", "\n")
+        if self.invalid_and_skipped_chars:
+            valid_chars = INVALID_CHARS.sub("", valid_chars)
+        self.valid_chars = valid_chars
 
-        while i < len(chars):
-            char = chars[i]
-            code = ord(char)
+    def get_valid_pos(self, original_pos: int) -> int:
+        """Maps an offset in the original input to valid_chars, a dropped character maps to where it was."""
+        return bisect_left(range(len(self.valid_chars)), original_pos, key=self.get_original_pos)
 
-            # Normalize line breaks correctly
-            if code == 0xD:  # '\r'
-                if i + 1 < len(chars) and chars[i + 1] == "\n":
-                    i += 1  # Skip the '\n' in "\r\n"
-                valid_chars.append("\n")
-            elif self.is_valid(code):
-                if self.is_discouraged(code):
-                    valid_but_discouraged_chars.append(CharInfo(i, code))
-                valid_chars.append(char)
-            else:
-                invalid_and_skipped_chars.append(CharInfo(i, code))
-
-            i += 1
-
-        self.valid_chars = "".join(valid_chars)
-        self.invalid_and_skipped_chars = invalid_and_skipped_chars
-        self.valid_but_discouraged_chars = valid_but_discouraged_chars
+    def get_original_pos(self, pos: int) -> int:
+        """Maps an offset in valid_chars back to the offset in the original input."""
+        return pos + bisect_right(self.removed_points, pos)
+
+    def get_char_pos(self, pos: int) -> CharPos:
+        """Maps an offset in valid_chars to the original offset, line and column (both starting at 1)."""
+        if self.line_starts is None:
+            self.line_starts = array("q", [0])
+            self.line_starts.extend(match.end() for match in re.finditer(r"\n", self.valid_chars))
+        line = bisect_right(self.line_starts, pos)
+        line_start = self.line_starts[line - 1]
+        original_pos = self.get_original_pos(pos)
+        column = original_pos - self.get_original_pos(line_start) + 1
+        if line == 1:
+            column += self.start.column - 1
+        return CharPos(self.start.position + original_pos, self.start.line + line - 1, column)
+
+    def get_end_pos(self) -> CharPos:
+        """Position right after the last character, where the next piece of a stream starts."""
+        return self.get_char_pos(len(self.valid_chars))
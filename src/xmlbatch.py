@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from dtd.dtdentity import ExpansionLimits
+    from errcl import CritErr
+    from errcl import ValidErr
+
+from dtd.dtdcore import Dtd
+from errcl import ErrorCollector
+from xmlvalidator import XmlValidator
+
+
+class ErrorSummary(NamedTuple):
+    err: CritErr | ValidErr
+    # -1 when the position is unknown
+    position: int
+    line: int
+    column: int
+
+
+class DocumentSummary(NamedTuple):
+    doc_index: int
+    # Path of the document, None for buffers
+    source: str | None
+    errors: list[ErrorSummary]
+    # Exception that stopped the validation, None when it finished
+    failure: str | None = None
+
+    @property
+    def is_valid(self) -> bool:
+        return self.failure is None and len(self.errors) == 0
+
+
+class BatchOptions(NamedTuple):
+    dtd: Dtd
+    lazy_entities: bool
+
+
+class BatchWorker:
+    # Options of this worker process, passed as initargs of the pool and kept until the process exits
+    options: BatchOptions | None = None
+
+    @classmethod
+    def start(cls, options: BatchOptions) -> None:
+        cls.options = options
+
+    @classmethod
+    def validate(cls, task: tuple[int, str | bytes | Path]) -> DocumentSummary:
+        if cls.options is None:
+            raise ValueError("Worker is not started.")
+        return validate_document(task[0], task[1], cls.options)
+
+
+def validate_document(doc_index: int, document: str | bytes | Path, options: BatchOptions) -> DocumentSummary:
+    source = str(document) if isinstance(document, Path) else None
+    xmlvalidator = XmlValidator(lazy_entities=options.lazy_entities, dtd=options.dtd)
+    try:
+        if isinstance(document, Path):
+            xmlvalidator.add_file(document)
+        else:
+            xmlvalidator.add_buffer(document)
+        xmlvalidator.build()
+    except Exception as exc:
+        return DocumentSummary(doc_index, source, summarize_errors(xmlvalidator), f"{type(exc).__name__}: {exc}")
+    return DocumentSummary(doc_index, source, summarize_errors(xmlvalidator))
+
+
+def summarize_errors(xmlvalidator: XmlValidator) -> list[ErrorSummary]:
+    errors: list[ErrorSummary] = []
+    for error in xmlvalidator.err.tokens:
+        pos = xmlvalidator.get_error_pos(error)
+        if pos is None:
+            errors.append(ErrorSummary(error.err, -1, 0, 0))
+        else:
+            errors.append(ErrorSummary(error.err, pos.position, pos.line, pos.column))
+    return errors
+
+
+def get_worker_count(workers: int | None) -> int:
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+class BatchValidator:
+    def __init__(
+        self,
+        workers: int | None = None,
+        dtd: Dtd | None = None,
+        expansion_limits: ExpansionLimits | None = None,
+        lazy_entities: bool = False,
+    ) -> None:
+        """Validates many documents on a process pool that is started once and reused by every call.
+
+        The parsed DTD is sent to each worker process once, every document gets its own copy of it.
+        With a single worker the documents are validated in this process. The caller owns the pool,
+        use the validator as a context manager or call close.
+        """
+        self.workers = get_worker_count(workers)
+        if self.workers < 1:
+            raise ValueError("At least one worker is required.")
+        self.options = BatchOptions(Dtd(ErrorCollector(), expansion_limits) if dtd is None else dtd, lazy_entities)
+        self.pool: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> BatchValidator:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=BatchWorker.start, initargs=(self.options,))
+        return self.pool
+
+    def validate_many(self, paths_or_buffers: Iterable[str | bytes | os.PathLike[str]]) -> list[DocumentSummary]:
+        """Summaries in the order of the documents, str and bytes are buffers, path-like objects are files."""
+        tasks = [
+            (index, document if isinstance(document, (str, bytes)) else Path(document))
+            for index, document in enumerate(paths_or_buffers)
+        ]
+        if self.workers == 1:
+            return [validate_document(index, document, self.options) for index, document in tasks]
+        # a few chunks per worker keep the queue short without starving workers on uneven documents
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        return list(self.get_pool().map(BatchWorker.validate, tasks, chunksize=chunksize))
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+def validate_many(
+    paths_or_buffers: Iterable[str | bytes | os.PathLike[str]],
+    workers: int | None = None,
+    dtd: Dtd | None = None,
+) -> list[DocumentSummary]:
+    """Validates documents on a pool that lives for this call, keep a BatchValidator to reuse one."""
+    with BatchValidator(workers, dtd) as batch:
+        return batch.validate_many(paths_or_buffers)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import codecs
+import re
+from typing import NamedTuple
+
+
+class XmlEncoding(NamedTuple):
+    name: str
+    bom_length: int
+
+
+# XML 1.0 Appendix F, byte order marks (UTF-32 LE has to be checked before UTF-16 LE)
+BYTE_ORDER_MARKS: list[tuple[bytes, str]] = [
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+]
+# XML 1.0 Appendix F, first four bytes of "<?xml" without a byte order mark
+SIGNATURES: list[tuple[bytes, str]] = [
+    (b"\x00\x00\x00\x3c", "utf-32-be"),
+    (b"\x3c\x00\x00\x00", "utf-32-le"),
+    (b"\x00\x3c\x00\x3f", "utf-16-be"),
+    (b"\x3c\x00\x3f\x00", "utf-16-le"),
+    (b"\x3c\x3f\x78\x6d", "utf-8"),
+    (b"\x4c\x6f\xa7\x94", "cp500"),
+]
+# Sniffed encodings that fix the byte width, the declaration cannot change them
+FIXED_WIDTH_ENCODINGS = {"utf-16-be", "utf-16-le", "utf-32-be", "utf-32-le"}
+ENCODING_DECL = re.compile(r"<\?xml\s[^>]*?\bencoding\s*=\s*([\"'])([A-Za-z][A-Za-z0-9._-]*)\1")
+# Pure ASCII without CR and control characters never needs the TextBuffer character scan
+UNCLEAN_ASCII = re.compile(rb"[^\t\n\x20-\x7e]")
+# Error handler of every decode, a byte that cannot be decoded becomes the lone surrogate U+DC00 + byte.
+# TextBuffer keeps them as U+FFFD and the validator reports them.
+DECODE_ERRORS = "xml-undecodable"
+UNDECODABLE_BASE = 0xDC00
+
+
+def escape_undecodable(error: UnicodeError) -> tuple[str, int]:
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    undecodable = error.object[error.start : error.end]
+    return "".join(chr(UNDECODABLE_BASE + byte) for byte in undecodable), error.end
+
+
+codecs.register_error(DECODE_ERRORS, escape_undecodable)
+
+
+def detect_encoding(data: bytes) -> XmlEncoding:
+    """Detects the encoding from the byte order mark or the XML declaration."""
+    for bom, name in BYTE_ORDER_MARKS:
+        if data.startswith(bom):
+            return XmlEncoding(name, len(bom))
+    for signature, name in SIGNATURES:
+        if data.startswith(signature):
+            family = name
+            break
+    else:
+        return XmlEncoding("utf-8", 0)
+    if family in FIXED_WIDTH_ENCODINGS:
+        return XmlEncoding(family, 0)
+    match = ENCODING_DECL.match(data[:1024].decode(family, errors="replace"))
+    if match is None:
+        return XmlEncoding(family, 0)
+    try:
+        declared = codecs.lookup(match.group(2)).name
+    except LookupError:
+        return XmlEncoding(family, 0)
+    if declared.startswith(("utf-16", "utf-32")):
+        return XmlEncoding(family, 0)
+    return XmlEncoding(declared, 0)
+
+
+def decode_xml(data: bytes) -> tuple[str, bool]:
+    """Decodes raw XML bytes, the flag tells if the text is clean ASCII and needs no further checks.
+
+    Bytes that cannot be decoded are kept as lone surrogates, see DECODE_ERRORS.
+    """
+    encoding = detect_encoding(data)
+    if encoding.bom_length > 0:
+        data = data[encoding.bom_length :]
+    if encoding.name not in FIXED_WIDTH_ENCODINGS and encoding.name != "cp500" and data.isascii():
+        return data.decode("ascii"), UNCLEAN_ASCII.search(data) is None
+    return data.decode(encoding.name, DECODE_ERRORS), False
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ElementTree
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+from xmlencoding import decode_xml
+
+
+CATALOG_NAMESPACE = "{urn:oasis:names:tc:entity:xmlns:xml:catalog}"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+# Decoded external files shared by every resolver, keyed by path, size and modification time
+EXTERNAL_CACHE_SIZE = 128
+SPACES = re.compile(r"[ \t\r\n]+")
+
+
+class ExternalText(NamedTuple):
+    path: Path
+    chars: str
+    # Clean ASCII that TextBuffer does not have to check again, see decode_xml
+    is_clean: bool
+
+
+@lru_cache(maxsize=EXTERNAL_CACHE_SIZE)
+def read_external(path: Path, size: int, mtime_ns: int) -> tuple[str, bool]:
+    # size and mtime_ns are only part of the key, a changed file is read again
+    return decode_xml(path.read_bytes())
+
+
+def normalize_public_id(public_id: str) -> str:
+    return SPACES.sub(" ", public_id).strip(" ")
+
+
+def get_local_path(uri: str, base: Path | None) -> Path | None:
+    """Local file of a system identifier or catalog uri, None for identifiers with a non-file scheme."""
+    parts = urlsplit(uri)
+    if parts.scheme == "file":
+        return Path(unquote(parts.path))
+    # one letter schemes are drive letters
+    if len(parts.scheme) > 1:
+        return None
+    path = Path(uri)
+    if base is not None and not path.is_absolute():
+        path = base / path
+    return path
+
+
+class XmlCatalog:
+    def __init__(self, path: str | PathLike[str]) -> None:
+        """Entries of an OASIS XML catalog file, nextCatalog files are read when they are first needed.
+
+        Supported entries are system, rewriteSystem, systemSuffix, public, nextCatalog and group,
+        with xml:base and prefer.
+        """
+        self.path = Path(path)
+        self.system: dict[str, Path] = {}
+        self.rewrite_system: list[tuple[str, Path]] = []
+        self.system_suffix: list[tuple[str, Path]] = []
+        # Public identifier, target and whether the entry applies when a system identifier is given too
+        self.public: dict[str, tuple[Path, bool]] = {}
+        self.next_catalogs: list[Path] = []
+        self.loaded_next_catalogs: list[XmlCatalog] | None = None
+        root = ElementTree.parse(self.path).getroot()
+        self.read_entries(root, self.path.parent, root.get("prefer", "public") == "public")
+
+    def read_entries(self, element: ElementTree.Element, base: Path, prefer_public: bool) -> None:
+        for entry in element:
+            if not isinstance(entry.tag, str):
+                continue
+            name = entry.tag.removeprefix(CATALOG_NAMESPACE)
+            entry_base = base / entry.get(XML_BASE, "")
+            if name == "group":
+                prefer = entry.get("prefer", "public" if prefer_public else "system")
+                self.read_entries(entry, entry_base, prefer == "public")
+                continue
+            uri = entry.get("uri") or entry.get("rewritePrefix") or entry.get("catalog")
+            if uri is None:
+                continue
+            target = get_local_path(uri, entry_base)
+            if target is None:
+                continue
+            if name == "system":
+                self.system.setdefault(entry.get("systemId", ""), target)
+            elif name == "rewriteSystem":
+                self.rewrite_system.append((entry.get("systemIdStartString", ""), target))
+            elif name == "systemSuffix":
+                self.system_suffix.append((entry.get("systemIdSuffix", ""), target))
+            elif name == "public":
+                self.public.setdefault(normalize_public_id(entry.get("publicId", "")), (target, prefer_public))
+            elif name == "nextCatalog":
+                self.next_catalogs.append(target)
+        # longest match wins
+        self.rewrite_system.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self.system_suffix.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    def get_next_catalogs(self) -> list[XmlCatalog]:
+        if self.loaded_next_catalogs is None:
+            self.loaded_next_catalogs = [XmlCatalog(path) for path in self.next_catalogs if path.is_file()]
+        return self.loaded_next_catalogs
+
+    def resolve(self, public_id: str | None, system_id: str | None) -> Path | None:
+        if system_id is not None:
+            if system_id in self.system:
+                return self.system[system_id]
+            for start, prefix in self.rewrite_system:
+                if start and system_id.startswith(start):
+                    return prefix / system_id[len(start) :]
+            for suffix, target in self.system_suffix:
+                if suffix and system_id.endswith(suffix):
+                    return target
+        if public_id is not None:
+            public_entry = self.public.get(normalize_public_id(public_id))
+            if public_entry is not None and (system_id is None or public_entry[1]):
+                return public_entry[0]
+        for catalog in self.get_next_catalogs():
+            path = catalog.resolve(public_id, system_id)
+            if path is not None:
+                return path
+        return None
+
+
+class XmlResolver:
+    def __init__(self, catalogs: list[str | PathLike[str]] | None = None) -> None:
+        """Maps public and system identifiers to local files through catalogs, then relative to the referencing file.
+
+        Identifiers with a non-file scheme are never fetched, only a catalog can map them.
+        """
+        self.catalogs = [XmlCatalog(path) for path in catalogs or []]
+
+    def resolve(self, public_id: str | None, system_id: str | None, base: Path | None = None) -> Path | None:
+        for catalog in self.catalogs:
+            path = catalog.resolve(public_id, system_id)
+            if path is not None:
+                return path
+        if system_id is None:
+            return None
+        return get_local_path(system_id, base)
+
+    def load(self, public_id: str | None, system_id: str | None, base: Path | None = None) -> ExternalText | None:
+        path = self.resolve(public_id, system_id, base)
+        if path is None:
+            return None
+        try:
+            path = path.resolve()
+            stat = path.stat()
+            chars, is_clean = read_external(path, stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            return None
+        return ExternalText(path, chars, is_clean)
@@ -16,6 +16,8 @@ from xmltokens.xmlchars import XmlChars
 
 
 class AttList:
+    __slots__ = ("proc", "startseq", "parent", "err", "endseq", "tokens", "element_name", "attr_defs")
+
     def __init__(
         self,
         proc: XmlProcessor,
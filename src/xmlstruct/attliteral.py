@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from typing import TYPE_CHECKING
 
 from xmltokens.xmlcharref import XmlCharRef
@@ -8,12 +9,114 @@ from xmltokens.xmlcharref import XmlCharRef
 if TYPE_CHECKING:
     from dtd.dtdcore import Dtd
     from errcl import ErrorCollector
-    from xmltokens import XmlProccesor
 
 from xmltokens import XmlChars
+from xmltokens import XmlLazyChars
+from xmltokens import XmlProccesor
+from xmltokens import XmlSpans
+from xmltokens.xmllazy import detach
+
+
+# Runs of attribute value characters that need no handling in lazy mode
+ATT_VALUE_RUN = re.compile(r"[^<&'\"]*")
+# Runs that are copied as they are, no quote, reference or space to normalize
+ATT_VALUE_PLAIN_RUN = re.compile(r"[^<&'\"\t\n\r]*")
+# Spaces that are normalized to #x20
+ATT_VALUE_SPACE = re.compile(r"[\t\n\r]")
+
+
+def normalize_white_spaces(chars: XmlChars) -> XmlChars:
+    # runs between tabs and line breaks are kept as they are, only those characters are replaced
+    parts: list[XmlChars] = []
+    pos = 0
+    for space in ATT_VALUE_SPACE.finditer(chars.strchars):
+        if space.start() > pos:
+            parts.append(chars[pos : space.start()])
+        parts.append(XmlChars(XmlCharRef(" ", chars[space.start()].xmlchars[0])))
+        pos = space.end()
+    if pos == 0:
+        return chars
+    if pos < len(chars):
+        parts.append(chars[pos:])
+    return XmlSpans.join(parts)
+
+
+def is_endquote(proc: XmlProccesor, startquote: XmlChars | None) -> bool:
+    return (
+        startquote is not None
+        and proc.match(startquote.strchars)
+        and proc.read(0, 1).get_entity_id() == startquote.get_entity_id()
+    )
+
+
+def parse_att_value(proc: XmlProccesor, dtd: Dtd, startquote: XmlChars | None) -> tuple[XmlChars, XmlChars]:
+    """Normalized value and its end quote, the end quote is empty when the value ends without it."""
+    parts: list[XmlChars] = []
+    endquote = XmlChars()
+    while not proc.is_end():
+        run = proc.scan(ATT_VALUE_PLAIN_RUN)
+        if len(run) > 0:
+            parts.append(run)
+            continue
+        if proc.match("<"):
+            break
+        if is_endquote(proc, startquote):
+            endquote = proc.read(0, 1)
+            proc.move(1)
+            break
+        if proc.match("&#"):
+            chrref = proc.get_chrref()
+            if chrref is None:
+                # error chrref not ended properly
+                parts.append(proc.read(0, 1))
+                proc.move(1)
+                continue
+            chrref_value = dtd.entity.get_chrref_value(chrref)
+            if chrref_value is None:
+                # error chrref not recognized
+                parts.append(proc.read(0, 1))
+                proc.move(1)
+                continue
+            parts.append(chrref_value)
+            proc.move(len(chrref.xmlchars))
+            continue
+        if proc.peek_char() == "&":
+            gent_ref = proc.get_gent_ref()
+            if gent_ref is None:
+                # error gent_ref not ended properly
+                parts.append(proc.read(0, 1))
+                proc.move(1)
+                continue
+            deref_gent = dtd.entity.deref_gent(gent_ref)
+            if deref_gent is None:
+                # error chrref not recognized
+                parts.append(proc.read(0, 1))
+                proc.move(1)
+                continue
+            parts.append(normalize_white_spaces(deref_gent))
+            proc.move(len(gent_ref.xmlchars))
+            continue
+        if proc.is_space_at() and proc.peek_char() != " ":
+            parts.append(XmlChars(XmlCharRef(" ", proc.read(0, 1).xmlchars[0])))
+            proc.move()
+            continue
+        parts.append(proc.read())
+        proc.move()
+    if len(parts) == 1:
+        return parts[0], endquote
+    if parts:
+        return XmlSpans.join(parts), endquote
+    return XmlChars(), endquote
+
+
+def expand_att_value(raw: XmlChars, dtd: Dtd) -> XmlChars:
+    # the raw text is parsed the same way as in eager mode, it holds no end quote
+    return parse_att_value(XmlProccesor(raw), dtd, None)[0]
 
 
 class AttLiteral:
+    __slots__ = ("proc", "dtd", "err", "startquote", "endquote", "content", "raw")
+
     def __init__(
         self,
         proc: XmlProccesor,
@@ -26,72 +129,45 @@ class AttLiteral:
         self.startquote = XmlChars()
         self.endquote = XmlChars()
         self.content = XmlChars()
-        self.parse_startquote()
-        self.parse()
-
-    def normalize_white_spaces(self, deref_gent: XmlChars):
-        norm_deref_gent = XmlChars()
-        for char in deref_gent.xmlchars:
-            if char.strchars in {"\r", "\n", "\t"}:
-                norm_deref_gent.append(XmlCharRef(" ", char))
-            else:
-                norm_deref_gent.append(char)
-        return norm_deref_gent
+        # Raw text between the quotes, kept in lazy mode, detached from the document
+        self.raw: XmlChars | None = None
+        self.startquote = self.parse_startquote()
+        if self.dtd.entity.is_lazy:
+            self.raw = self.parse_lazy()
+            self.content = XmlLazyChars(self.raw, self.dtd, expand_att_value)
+        else:
+            self.content, self.endquote = parse_att_value(self.proc, self.dtd, self.startquote)
+
+    def is_empty(self) -> bool:
+        if self.raw is not None:
+            return len(self.raw) == 0
+        return self.content == ""
 
     def parse_startquote(self) -> XmlChars:
-        startqoute = self.proc.read(0, 1)
-        if startqoute is None or not startqoute.is_quote():
+        if not self.proc.is_quote_at():
             raise ValueError()
+        startqoute = self.proc.read(0, 1)
         self.proc.move(1)
         return startqoute
 
-    def parse(self) -> None:
+    def parse_lazy(self) -> XmlChars:
+        parts: list[XmlChars] = []
         while not self.proc.is_end():
-            if self.proc.match("<"):
-                return
-            if (
-                self.proc.match(self.startquote.strchars)
-                and self.proc.read(0, 1).xmlchars[0].entity_id == self.startquote.xmlchars[0].entity_id
-            ):
+            parts.append(self.proc.scan(ATT_VALUE_RUN))
+            if self.proc.is_end() or self.proc.match("<"):
+                break
+            if is_endquote(self.proc, self.startquote):
                 self.endquote = self.proc.read(0, 1)
                 self.proc.move(1)
-                return
-            if self.proc.read(0, 2) == "&#":
-                chrref = self.proc.get_chrref()
-                if chrref is None:
-                    # error chrref not ended properly
-                    self.content.append(self.proc.read(0, 1))
-                    self.proc.move(1)
-                    continue
-                chrref_value = self.dtd.entity.get_chrref_value(chrref)
-                if chrref_value is None:
-                    # error chrref not recognized
-                    self.content.append(self.proc.read(0, 1))
-                    self.proc.move(1)
-                    continue
-                self.content.append(chrref_value)
-                self.proc.move(len(chrref.xmlchars))
-                continue
-            if self.proc.read(0, 1) == "&":
+                break
+            if self.proc.peek_char() == "&" and not self.proc.match("&#"):
                 gent_ref = self.proc.get_gent_ref()
-                if gent_ref is None:
-                    # error gent_ref not ended properly
-                    self.content.append(self.proc.read(0, 1))
-                    self.proc.move(1)
+                if gent_ref is not None:
+                    # the reference stays as a placeholder, only its entity is checked
+                    self.dtd.entity.check_gent(gent_ref)
+                    parts.append(gent_ref)
+                    self.proc.move(len(gent_ref))
                     continue
-                deref_gent = self.dtd.entity.deref_gent(gent_ref)
-                if deref_gent is None:
-                    # error chrref not recognized
-                    self.content.append(self.proc.read(0, 1))
-                    self.proc.move(1)
-                    continue
-                norm_deref_gent = self.normalize_white_spaces(deref_gent)
-                self.content.append(norm_deref_gent)
-                self.proc.move(len(gent_ref.xmlchars))
-                continue
-            if self.proc.read(0, 1).is_space() and self.proc.read(0, 1) != " ":
-                normalized_space = XmlCharRef(" ", self.proc.read(0, 1).xmlchars[0])
-                self.content.append(normalized_space)
-                continue
-            self.content.append(self.proc.read())
+            parts.append(self.proc.read())
             self.proc.move()
+        return detach(XmlSpans.join(parts))
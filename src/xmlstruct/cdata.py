@@ -12,10 +12,13 @@ if TYPE_CHECKING:
     from .includeignore import IncludeIgnore
     from .tag import Tag
 
+from errcl import CritErr
 from xmltokens.xmlchars import XmlChars
 
 
 class CData:
+    __slots__ = ("proc", "startseq", "parent", "err", "endseq", "tokens", "content")
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -23,10 +26,41 @@ class CData:
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
         err: ErrorCollector,
     ) -> None:
-        self.proc = proc
-        self.startseq = startseq
+        self.proc: XmlProcessor | None = proc
+        self.startseq: XmlChars | None = startseq
         self.parent = parent
-        self.err = err
+        self.err: ErrorCollector | None = err
         self.endseq: XmlChars | None = None
-        self.tokens: list[XmlChars] = []
+        self.tokens: list[XmlChars] | None = []
         self.content: XmlChars | None = None
+        self.parse()
+        self.verify_location()
+
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing."""
+        self.proc = None
+        self.err = None
+        self.tokens = None
+        self.startseq = None
+        self.endseq = None
+
+    def parse(self) -> None:
+        end = self.proc.find("]]>")
+        if end < 0:
+            # unterminated, the section runs to the end of the text
+            end = self.proc.get_length() - self.proc.pointer
+        self.content = self.proc.read(0, end)
+        self.tokens.append(self.content)
+        self.proc.move(end)
+        if self.proc.match("]]>"):
+            self.endseq = self.proc.read(0, 3)
+            self.tokens.append(self.endseq)
+            self.proc.move(3)
+        else:
+            self.err.add(self.startseq, CritErr.NODE_MISSING_END)
+
+    def verify_location(self) -> None:
+        from xmlstruct.tag import Tag
+
+        if not isinstance(self.parent, Tag):
+            self.err.add(self.startseq, CritErr.CDATA_LOCATION_INVALID)
@@ -12,10 +12,13 @@ if TYPE_CHECKING:
     from .includeignore import IncludeIgnore
     from .tag import Tag
 
+from errcl import CritErr
 from xmltokens.xmlchars import XmlChars
 
 
 class Comment:
+    __slots__ = ("proc", "startseq", "parent", "err", "endseq", "tokens", "content")
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -23,10 +26,47 @@ class Comment:
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
         err: ErrorCollector,
     ) -> None:
-        self.proc = proc
-        self.startseq = startseq
+        self.proc: XmlProcessor | None = proc
+        self.startseq: XmlChars | None = startseq
         self.parent = parent
-        self.err = err
+        self.err: ErrorCollector | None = err
         self.endseq: XmlChars | None = None
-        self.tokens: list[XmlChars] = []
+        self.tokens: list[XmlChars] | None = []
         self.content: XmlChars | None = None
+        self.parse()
+        self.verify_content()
+
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing."""
+        self.proc = None
+        self.err = None
+        self.tokens = None
+        self.startseq = None
+        self.endseq = None
+
+    def parse(self) -> None:
+        end = self.proc.find("-->")
+        if end < 0:
+            # unterminated, the comment runs to the end of the text
+            end = self.proc.get_length() - self.proc.pointer
+        self.content = self.proc.read(0, end)
+        self.tokens.append(self.content)
+        self.proc.move(end)
+        if self.proc.match("-->"):
+            self.endseq = self.proc.read(0, 3)
+            self.tokens.append(self.endseq)
+            self.proc.move(3)
+        else:
+            self.err.add(self.startseq, CritErr.NODE_MISSING_END)
+
+    def verify_content(self) -> None:
+        # "--" is not allowed anywhere in the comment, neither is a "-" right before "-->"
+        if self.content is None:
+            return
+        double_hyphen = self.content.find("--")
+        while double_hyphen >= 0:
+            self.err.add(self.content, CritErr.COMMENT_DOUBLE_HYPHEN, double_hyphen)
+            double_hyphen = self.content.find("--", double_hyphen + 2)
+        ending = self.content[-2:].strchars
+        if self.endseq is not None and ending.endswith("-") and ending != "--":
+            self.err.add(self.content, CritErr.COMMENT_DOUBLE_HYPHEN, len(self.content) - 1)
@@ -24,6 +24,21 @@ from xmltokens.xmlchars import XmlChars
 
 
 class Doctype:
+    __slots__ = (
+        "proc",
+        "startseq",
+        "parent",
+        "err",
+        "endseq",
+        "tokens",
+        "root_name",
+        "extern_system",
+        "extern_public",
+        "intern_declarations_closed",
+        "closed",
+        "children",
+    )
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -55,10 +70,3 @@ class Doctype:
             | Text
             | XmlDecl
         ] = []
-
-    def get_active_node(self) -> Tag | Doctype | IncludeIgnore:
-        if len(self.children) == 0:
-            return self
-        if isinstance(self.children[-1], (Tag, Doctype, IncludeIgnore)) and not self.children[-1].closed:
-            return self.children[-1].get_active_node()
-        return self
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 
 
 if TYPE_CHECKING:
+    from dtd.dtdcore import Dtd
     from errcl import ErrorCollector
     from xmltokens.xmlproc import XmlProcessor
     from xmlvalidator import XmlValidator
@@ -12,22 +13,69 @@ if TYPE_CHECKING:
     from .includeignore import IncludeIgnore
     from .tag import Tag
 
+from errcl import CritErr
+from xmltokens.xmlcharclass import is_xmlname
 from xmltokens.xmlchars import XmlChars
 
 
 class Element:
+    __slots__ = ("proc", "startseq", "parent", "dtd", "err", "endseq", "tokens", "name", "definitions")
+
     def __init__(
         self,
         proc: XmlProcessor,
         startseq: XmlChars,
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
+        dtd: Dtd,
         err: ErrorCollector,
     ) -> None:
-        self.proc = proc
-        self.startseq = startseq
+        self.proc: XmlProcessor | None = proc
+        self.startseq: XmlChars | None = startseq
         self.parent = parent
-        self.err = err
+        self.dtd: Dtd | None = dtd
+        self.err: ErrorCollector | None = err
         self.endseq: XmlChars | None = None
-        self.tokens: list[XmlChars] = []
+        self.tokens: list[XmlChars] | None = []
         self.name: XmlChars | None = None
         self.definitions: list[XmlChars] | None = None
+        self.parse_name()
+        self.parse_definitions()
+        self.parse_end()
+        self.define_element()
+
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing, the compiled model stays in dtd.element."""
+        self.proc = None
+        self.dtd = None
+        self.err = None
+        self.tokens = None
+        self.startseq = None
+        self.endseq = None
+
+    def parse_name(self) -> None:
+        self.tokens.append(self.proc.get_spaces())
+        self.name = self.proc.scan_name()
+        self.tokens.append(self.name)
+        self.tokens.append(self.proc.get_spaces())
+
+    def parse_definitions(self) -> None:
+        # content models never contain ">", the whole model is compiled at once by dtd.element
+        definitions = self.proc.scan_until("<>")
+        self.tokens.append(definitions)
+        self.definitions = [definitions]
+
+    def parse_end(self) -> None:
+        if self.proc.match(">"):
+            self.endseq = self.proc.read()
+            self.tokens.append(self.endseq)
+            self.proc.move()
+            return
+        self.err.add(self.startseq, CritErr.NODE_MISSING_END)
+
+    def define_element(self) -> None:
+        if self.name is None or not is_xmlname(self.name.strchars):
+            self.err.add(self.startseq, CritErr.ELEMENT_NAME_INVALID)
+            return
+        if self.definitions is None:
+            return
+        self.dtd.element.define_element(self.name, self.definitions[0])
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from re import A
+import re
 from typing import TYPE_CHECKING
 
 
 if TYPE_CHECKING:
+    from dtd.dtdcore import Dtd
     from errcl import ErrorCollector
     from xmltokens.xmlproc import XmlProcessor
     from xmlvalidator import XmlValidator
@@ -17,20 +18,49 @@ from errcl import CritErr
 from xmltokens.xmlchars import XmlChars
 
 
+# End-tag name runs up to a space, "<", ">" or "/>".
+END_TAG_NAME_RUN = re.compile(r"(?:[^ \t\r\n<>/]|/(?!>))*")
+
+
 class EndTag:
+    __slots__ = (
+        "proc",
+        "parent",
+        "dtd",
+        "err",
+        "open_nodes",
+        "closed_tag",
+        "implicitly_closed",
+        "tokens",
+        "startseq",
+        "endseq",
+        "name",
+        "name_id",
+    )
+
     def __init__(
         self,
         proc: XmlProcessor,
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
+        dtd: Dtd,
         err: ErrorCollector,
+        open_nodes: list[Tag | Doctype | IncludeIgnore] | None = None,
     ) -> None:
         self.proc = proc
         self.parent = parent
+        self.dtd = dtd
         self.err = err
+        # Open nodes from the root down, shared with the validator and truncated when a tag is closed
+        self.open_nodes = open_nodes
+        self.closed_tag: Tag | None = None
+        # Open tags inside closed_tag that this end-tag closes as well, innermost first
+        self.implicitly_closed: list[Tag] = []
         self.tokens: list[XmlChars] = []
         self.startseq = XmlChars()
         self.endseq = XmlChars()
         self.name = XmlChars()
+        # Tags were interned when they were opened, an unknown name cannot close any of them
+        self.name_id = -1
         self.parse_startseq()
         self.parse_name()
         self.parse_space()
@@ -51,51 +81,33 @@ class EndTag:
         self.startseq = startseq
 
     def parse_name(self) -> None:
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                self.parse_end()
-                return
-            if not self.proc.read().is_space():
-                break
-            self.name.append(self.proc.read())
-            self.proc.move()
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                self.parse_end()
-                return
-            if self.proc.read().is_space():
-                return
-            self.name.append(self.proc.read())
-            self.proc.move()
+        spaces = self.proc.get_spaces()
+        name = self.proc.scan(END_TAG_NAME_RUN)
+        self.name = name if len(spaces) == 0 else XmlChars(spaces, name)
+        if len(name) > 0:
+            self.name_id = self.dtd.symbols.get_id(name.strchars)
 
     def parse_space(self) -> None:
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                return
-            if self.proc.read().is_space():
-                self.proc.get_spaces()
-                break
+        self.proc.get_spaces()
 
     def parse_trailing(self) -> None:
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                return
-            self.proc.move()
-        self.err.add(self.proc.read(), CritErr.END_TAG_INVALID_TRAILING)
+        trailing = self.proc.scan_until_tag_end()
+        if len(trailing) > 0:
+            self.err.add(trailing, CritErr.END_TAG_INVALID_TRAILING)
 
     def is_parse_end(self) -> bool:
-        if self.proc.read() == "<" or self.proc.read() == ">":
+        if self.proc.peek_char() in {"<", ">"}:
             return True
-        if self.proc.read(0, 2) == "/>":
+        if self.proc.match("/>"):
             return True
         return False
 
     def parse_end(self) -> None:
         if self.proc.is_end():
             return
-        if self.proc.read() == "<":
+        if self.proc.match("<"):
             return
-        if self.proc.read() == ">":
+        if self.proc.match(">"):
             self.endseq = self.proc.read()
             self.tokens.append(self.proc.read())
             self.proc.move()
@@ -105,26 +117,33 @@ class EndTag:
         if self.startseq.get_entity_id() != self.endseq.get_entity_id():
             self.err.add(self.endseq, CritErr.NODE_START_END)
 
+    def get_open_nodes(self) -> list[Tag | Doctype | IncludeIgnore]:
+        from xmlvalidator import XmlValidator
+
+        open_nodes: list[Tag | Doctype | IncludeIgnore] = []
+        node = self.parent
+        while not isinstance(node, XmlValidator):
+            open_nodes.append(node)
+            node = node.parent
+        open_nodes.reverse()
+        return open_nodes
+
     def close_matching_start_tag(self) -> None:
         from xmlstruct.doctype import Doctype
         from xmlstruct.includeignore import IncludeIgnore
-        from xmlstruct.tag import Tag
-        from xmlvalidator import XmlValidator
 
-        active_node = self.parent
+        open_nodes = self.get_open_nodes() if self.open_nodes is None else self.open_nodes
         missing_close_tags: list[Tag] = []
-        while not isinstance(active_node, XmlValidator):
-            if isinstance(active_node, (Doctype, IncludeIgnore)):
+        for depth in range(len(open_nodes) - 1, -1, -1):
+            node = open_nodes[depth]
+            if isinstance(node, (Doctype, IncludeIgnore)):
                 self.err.add(self.startseq, CritErr.END_TAG_NESTED_IN_DTD)
-                active_node = active_node.parent
-                continue
-            if isinstance(active_node, Tag):
-                if active_node.close_tag(self.name):
-                    if len(missing_close_tags) > 0:
-                        for tag in missing_close_tags:
-                            self.err.add(tag.startseq, CritErr.TAG_NOT_CLOSED)
-                    break
-                else:
-                    missing_close_tags.append(active_node)
-                    active_node = active_node.parent
                 continue
+            if node.close_tag(self.name_id):
+                for tag in missing_close_tags:
+                    self.err.add(tag.startseq, CritErr.TAG_NOT_CLOSED)
+                self.closed_tag = node
+                self.implicitly_closed = missing_close_tags
+                del open_nodes[depth:]
+                return
+            missing_close_tags.append(node)
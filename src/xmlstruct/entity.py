@@ -8,6 +8,8 @@ from errcl import CritErr
 
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from dtd.dtdcore import Dtd
     from errcl import ErrorCollector
     from xmltokens import XmlProccesor
@@ -27,32 +29,70 @@ class EntityType(Enum):
 
 
 class Entity:
+    __slots__ = (
+        "proc",
+        "dtd",
+        "parent",
+        "err",
+        "tokens",
+        "startseq",
+        "endseq",
+        "is_pent",
+        "name",
+        "internal_value",
+        "entity_type",
+        "value",
+        "is_syslit",
+        "public_value",
+        "system_value",
+        "is_ndata",
+        "ndata_value",
+        "undef_trail",
+        "is_finished",
+        "base",
+    )
+
     def __init__(
         self,
         proc: XmlProccesor,
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
         dtd: Dtd,
         err: ErrorCollector,
+        base: Path | None = None,
     ) -> None:
-        self.proc = proc
-        self.dtd = dtd
+        self.proc: XmlProccesor | None = proc
+        self.dtd: Dtd | None = dtd
         self.parent = parent
-        self.err = err
-        self.tokens: list[XmlChars] = []
-        self.startseq = XmlChars()
-        self.endseq = XmlChars()
-        self.is_pent: bool = False
-        self.name = XmlChars()
-        self.internal_value= XmlChars()
+        self.err: ErrorCollector | None = err
+        self.tokens: list[XmlChars] | None = []
+        self.startseq: XmlChars | None = self.parse_startseq()
+        self.endseq: XmlChars | None = None
+        self.is_pent: bool | None = None
+        self.name: XmlChars | None = None
+        self.internal_value: XmlChars | None = None
         self.entity_type: EntityType | None = None
         self.value = XmlChars()
-        self.
         self.is_syslit: bool = False
         self.public_value: XmlChars | None = None
         self.system_value: XmlChars | None = None
         self.is_ndata: bool = False
         self.ndata_value: XmlChars | None = None
         self.undef_trail: list[XmlChars] = []
+        self.is_finished = False
+        # Directory of the resource that declares the entity, see GeneralEntity.base
+        self.base = base
+        self.parse_tokens()
+        self.check_integrity()
+        self.register_entity()
+
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing."""
+        self.proc = None
+        self.dtd = None
+        self.err = None
+        self.tokens = None
+        self.startseq = None
+        self.endseq = None
 
     def parse_startseq(self) -> XmlChars:
         startseq = self.proc.read(0, len("<!ENTITY"))
@@ -61,15 +101,76 @@ class Entity:
         self.proc.move(len("<!ENTITY"))
         return startseq
 
+    def parse_tokens(self) -> None:
+        # a "<" ends the declaration without being part of it, it starts the next markup
+        while not self.is_finished and not self.proc.is_end():
+            spaces = self.proc.get_spaces()
+            if len(spaces) > 0:
+                self.tokens.append(spaces)
+                continue
+            if self.proc.match("<"):
+                self.is_finished = True
+                break
+            xmlchars = self.read_token()
+            if self.can_xmlchars_be_added(xmlchars):
+                self.tokens.append(xmlchars)
+            else:
+                self.undef_trail.append(xmlchars)
+        if self.tokens and self.tokens[-1] == ">":
+            self.endseq = self.tokens[-1]
+
+    def read_token(self) -> XmlChars:
+        """Next quoted literal, ">", "%" or run of other chars, the pointer moves past it."""
+        if self.proc.is_quote_at():
+            quote = self.proc.peek_char()
+            self.proc.move()
+            length = self.proc.find(quote)
+            self.proc.move(-1)
+            length = self.proc.get_length() - self.proc.pointer if length < 0 else length + 2
+        elif self.proc.match(">") or self.proc.match_followed_by_space("%"):
+            length = 1
+        else:
+            length = len(self.proc.scan_until(" \t\r\n<>\"'"))
+            self.proc.move(-length)
+            length = max(length, 1)
+        xmlchars = self.proc.read(0, length)
+        self.proc.move(length)
+        return xmlchars
+
     def check_integrity(self) -> None:
-        if self.name is None:
-            self.err.add(self.startseq, CritErr.ELEMENT_INVALID)
+        if len(self.undef_trail) > 0:
+            self.err.add(self.undef_trail[0], CritErr.ENTITY_DECL_INVALID)
+        elif self.name is None or self.entity_type is None:
+            self.err.add(self.startseq, CritErr.ENTITY_DECL_INVALID)
+        elif self.internal_value is None and self.system_value is None:
+            self.err.add(self.startseq, CritErr.ENTITY_DECL_INVALID)
+        if self.endseq is None:
+            self.err.add(self.startseq, CritErr.NODE_MISSING_END)
+
+    def register_entity(self) -> None:
+        """Declares the entity in the DTD, external entities keep their identifiers and base."""
+        if self.name is None or not self.name.is_xmlname():
             return
-        if self.entity_type is None:
-            self.err.add(self.startseq, CritErr.ELEMENT_INVALID)
+        if self.entity_type == EntityType.INTERNAL:
+            if self.internal_value is None:
+                return
+            replacement_text: XmlChars | str = self.internal_value
+            system_id = None
+        elif self.system_value is None:
             return
-        if self.endseq is None:
-            self.err.add(self.startseq, CritErr.ELEMENT_INVALID)
+        else:
+            replacement_text = ""
+            system_id = self.system_value.strchars
+        public_id = None if self.public_value is None else self.public_value.strchars
+        if self.is_pent:
+            self.dtd.entity.register_pent(self.name, replacement_text, system_id, public_id, self.base)
+            return
+        ndata = None if self.ndata_value is None else self.ndata_value.strchars
+        self.dtd.entity.register_gent(self.name, replacement_text, False, system_id, public_id, ndata, self.base)
+
+    def is_literal(self, xmlchars: XmlChars) -> bool:
+        strchars = xmlchars.strchars
+        return len(strchars) >= 2 and strchars[0] in {"'", '"'} and strchars[-1] == strchars[0]
 
     def can_xmlchars_be_added(self, xmlchars: XmlChars) -> bool:
         if self.is_finished:
@@ -88,7 +189,7 @@ class Entity:
         if self.name is None:
             self.name = xmlchars
             if not self.name.is_xmlname():
-                self.err.add(self.name, CritErr.XMLNAME_ERROR)
+                self.err.add(self.name, CritErr.ENTITY_NAME_INVALID)
             return True
         if self.entity_type is None:
             if xmlchars == "SYSTEM":
@@ -100,9 +201,13 @@ class Entity:
                 self.entity_type = EntityType.EXTERNAL_PUBLIC
                 return True
             self.entity_type = EntityType.INTERNAL
-        if self.entity_type == EntityType.INTERNAL and self.internal_value is None:
-            self.internal_value = xmlchars.strip_quotes()
-            return True
+        if self.entity_type == EntityType.INTERNAL:
+            if self.internal_value is None and self.is_literal(xmlchars):
+                self.internal_value = xmlchars.strip_quotes()
+                return True
+            return False
+        if not self.is_literal(xmlchars):
+            return self.can_ndata_be_added(xmlchars)
         if self.entity_type == EntityType.EXTERNAL_SYSTEM and self.system_value is None:
             self.is_syslit = False
             self.system_value = xmlchars.strip_quotes()
@@ -115,10 +220,18 @@ class Entity:
                 self.is_syslit = False
                 self.system_value = xmlchars.strip_quotes()
                 return True
-        if not self.is_pent and xmlchars == "NDATA":
+        return False
+
+    def can_ndata_be_added(self, xmlchars: XmlChars) -> bool:
+        # only external general entities are unparsed, NDATA follows their system literal
+        if self.is_pent or self.system_value is None:
+            return False
+        if not self.is_ndata and xmlchars == "NDATA":
             self.is_ndata = True
             return True
         if self.is_ndata and self.ndata_value is None:
             self.ndata_value = xmlchars
+            if not xmlchars.is_xmlname():
+                self.err.add(xmlchars, CritErr.ENTITY_NAME_INVALID)
             return True
         return False
@@ -14,6 +14,8 @@ from xmltokens import XmlChars
 
 
 class EntityLiteral:
+    __slots__ = ("proc", "dtd", "err", "startquote", "endquote", "content")
+
     def __init__(
         self,
         proc: XmlProccesor,
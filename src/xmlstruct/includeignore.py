@@ -24,6 +24,8 @@ from xmltokens.xmlchars import XmlChars
 
 
 class IncludeIgnore:
+    __slots__ = ("proc", "startseq", "parent", "err", "endseq", "tokens", "include", "closed", "children")
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -52,10 +54,3 @@ class IncludeIgnore:
             | Text
             | XmlDecl
         ] = []
-
-    def get_active_node(self) -> Tag | Doctype | IncludeIgnore:
-        if len(self.children) == 0:
-            return self
-        if isinstance(self.children[-1], (Tag, Doctype, IncludeIgnore)) and not self.children[-1].closed:
-            return self.children[-1].get_active_node()
-        return self
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from typing import TYPE_CHECKING
 
 
@@ -12,10 +13,18 @@ if TYPE_CHECKING:
     from .includeignore import IncludeIgnore
     from .tag import Tag
 
+from errcl import CritErr
+from xmltokens.xmlcharclass import is_xmlname
 from xmltokens.xmlchars import XmlChars
 
 
+# Target runs up to a space or "?>".
+PI_TARGET_RUN = re.compile(r"(?:[^ \t\r\n?]|\?(?!>))*")
+
+
 class Instructions:
+    __slots__ = ("proc", "startseq", "parent", "err", "endseq", "tokens", "target", "content")
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -23,11 +32,52 @@ class Instructions:
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
         err: ErrorCollector,
     ) -> None:
-        self.proc = proc
-        self.startseq = startseq
+        self.proc: XmlProcessor | None = proc
+        self.startseq: XmlChars | None = startseq
         self.parent = parent
-        self.err = err
+        self.err: ErrorCollector | None = err
         self.endseq: XmlChars | None = None
-        self.tokens: list[XmlChars] = []
+        self.tokens: list[XmlChars] | None = []
         self.target: XmlChars | None = None
         self.content: XmlChars | None = None
+        self.parse_target()
+        self.parse_content()
+        self.verify_target()
+
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing."""
+        self.proc = None
+        self.err = None
+        self.tokens = None
+        self.startseq = None
+        self.endseq = None
+
+    def parse_target(self) -> None:
+        self.target = self.proc.scan(PI_TARGET_RUN)
+        self.tokens.append(self.target)
+        self.tokens.append(self.proc.get_spaces())
+
+    def parse_content(self) -> None:
+        end = self.proc.find("?>")
+        if end < 0:
+            # unterminated, the instruction runs to the end of the text
+            end = self.proc.get_length() - self.proc.pointer
+        self.content = self.proc.read(0, end)
+        self.tokens.append(self.content)
+        self.proc.move(end)
+        if self.proc.match("?>"):
+            self.endseq = self.proc.read(0, 2)
+            self.tokens.append(self.endseq)
+            self.proc.move(2)
+        else:
+            self.err.add(self.startseq, CritErr.NODE_MISSING_END)
+
+    def verify_target(self) -> None:
+        if self.target is None or len(self.target) == 0:
+            self.err.add(self.startseq, CritErr.PI_TARGET_INVALID, -1)
+            return
+        if not is_xmlname(self.target.strchars):
+            self.err.add(self.target, CritErr.PI_TARGET_INVALID)
+            return
+        if self.target.strchars.lower() == "xml":
+            self.err.add(self.target, CritErr.PI_TARGET_RESERVED)
@@ -16,6 +16,8 @@ from xmltokens.xmlchars import XmlChars
 
 
 class Notation:
+    __slots__ = ("proc", "startseq", "parent", "err", "endseq", "tokens", "name", "value")
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -10,9 +10,12 @@ if TYPE_CHECKING:
 
 from errcl import CritErr
 from xmltokens import XmlChars
+from xmltokens.xmlcharclass import PUBID_INVALID_CHAR
 
 
 class PubidLiteral:
+    __slots__ = ("proc", "dtd", "err", "startquote", "endquote", "content")
+
     def __init__(
         self,
         proc: XmlProccesor,
@@ -25,9 +28,6 @@ class PubidLiteral:
         self.startquote = XmlChars()
         self.endquote = XmlChars()
         self.content = XmlChars()
-        self.PUBID_CHAR_SET = set(
-            "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-'()+,./:=?;!*#@$_% \n"
-        )
         self.parse_startquote()
         self.parse_content()
         self.validate_chars()
@@ -40,18 +40,11 @@ class PubidLiteral:
         self.startquote = startqoute
 
     def parse_content(self) -> None:
-        while not self.proc.is_end():
-            if self.proc.read() == self.startquote:
-                self.endquote = self.proc.read()
-                self.proc.move()
-                return
-            self.content.append(self.proc.read())
+        self.content = self.proc.scan_quoted(self.startquote.strchars)
+        if self.proc.match(self.startquote.strchars):
+            self.endquote = self.proc.read()
             self.proc.move()
 
-    def validate_chars(self):
-        if len(self.content.xmlchars) == 0:
-            return
-        i = 0
-        while i < len(self.content.xmlchars):
-            if self.content.xmlchars[i] not in self.PUBID_CHAR_SET:
-                self.err.add(self.content, CritErr.PUBID_LITERAL_CHAR_NOT_ALLOWED, i)
+    def validate_chars(self) -> None:
+        for match in PUBID_INVALID_CHAR.finditer(self.content.strchars):
+            self.err.add(self.content, CritErr.PUBID_LITERAL_CHAR_NOT_ALLOWED, match.start())
@@ -13,6 +13,8 @@ from xmltokens.xmlcharref import XmlCharRef
 
 
 class SystemLiteral:
+    __slots__ = ("proc", "dtd", "err", "startquote", "endquote", "content")
+
     def __init__(
         self,
         proc: XmlProccesor,
@@ -36,10 +38,7 @@ class SystemLiteral:
         self.startquote = startqoute
 
     def parse_content(self) -> None:
-        while not self.proc.is_end():
-            if self.proc.read() == self.startquote:
-                self.endquote = self.proc.read()
-                self.proc.move()
-                return
-            self.content.append(self.proc.read())
+        self.content = self.proc.scan_quoted(self.startquote.strchars)
+        if self.proc.match(self.startquote.strchars):
+            self.endquote = self.proc.read()
             self.proc.move()
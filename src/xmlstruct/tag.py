@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from dtd.dtdcore import Dtd
+    from dtd.dtdelement import ContentModel
     from errcl import ErrorCollector
     from xmltokens.xmlproc import XmlProcessor
     from xmlvalidator import XmlValidator
@@ -36,6 +37,26 @@ class AttrSwitch(Enum):
 
 
 class Tag:
+    __slots__ = (
+        "proc",
+        "parent",
+        "dtd",
+        "err",
+        "tokens",
+        "startseq",
+        "endseq",
+        "closed",
+        "is_invalid",
+        "name",
+        "attributes",
+        "children",
+        "table_index",
+        "name_id",
+        "prefix_id",
+        "content_model",
+        "model_state",
+    )
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -43,15 +64,23 @@ class Tag:
         dtd: Dtd,
         err: ErrorCollector,
     ) -> None:
-        self.proc = proc
+        self.proc: XmlProcessor | None = proc
         self.parent = parent
-        self.dtd = dtd
-        self.err = err
-        self.tokens: list[XmlChars] = []
-        self.startseq = XmlChars()
-        self.endseq = XmlChars()
+        self.dtd: Dtd | None = dtd
+        self.err: ErrorCollector | None = err
+        self.tokens: list[XmlChars] | None = []
+        self.startseq: XmlChars | None = XmlChars()
+        self.endseq: XmlChars | None = XmlChars()
         self.closed: bool = False
         self.is_invalid: bool = False
+        # Row in XmlValidator.node_table, -1 when no table is built
+        self.table_index = -1
+        # Name and namespace prefix interned in dtd.symbols, -1 when missing
+        self.name_id = -1
+        self.prefix_id = -1
+        # Declared content model and automaton state after the children seen so far, see XmlValidator.validate_child
+        self.content_model: ContentModel | None = None
+        self.model_state = 0
         self.name: XmlChars = XmlChars()
         self.attributes: dict[XmlChars, XmlChars] = {}
         self.children: list[
@@ -76,12 +105,15 @@ class Tag:
         self.verify_location()
         self.verify_start_and_end_entity_origin()
 
-    def get_active_node(self) -> Tag | Doctype | IncludeIgnore:
-        if len(self.children) == 0:
-            return self
-        if isinstance(self.children[-1], (Tag, Doctype, IncludeIgnore)) and not self.children[-1].closed:
-            return self.children[-1].get_active_node()
-        return self
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing, start and end sequences stay until the tag is closed."""
+        self.proc = None
+        self.dtd = None
+        self.err = None
+        self.tokens = None
+        if self.closed:
+            self.startseq = None
+            self.endseq = None
 
     def parse_startseq(self) -> None:
         startseq = self.proc.read(0, len("<"))
@@ -101,15 +133,15 @@ class Tag:
     def parse_end(self) -> None:
         if self.proc.is_end():
             return
-        if self.proc.read(0, 1) == "<":
+        if self.proc.match("<"):
             return
-        if self.proc.read(0, 2) == "/>":
+        if self.proc.match("/>"):
             self.closed = True
             self.endseq = self.proc.read(0, 2)
             self.tokens.append(self.proc.read(0, 2))
             self.proc.move(2)
             return
-        if self.proc.read(0, 1) == ">":
+        if self.proc.match(">"):
             self.endseq = self.proc.read()
             self.tokens.append(self.proc.read())
             self.proc.move()
@@ -118,49 +150,31 @@ class Tag:
     def parse_name(self) -> None:
         if self.is_invalid:
             return
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                return
-            if not self.proc.read().is_space():
-                break
-            self.name.append(self.proc.read())
-            self.proc.move()
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                return
-            if self.proc.read().is_quote() or self.proc.read() == "=":
-                self.err.add(self.startseq, CritErr.TAG_NAME_INVALID)
-                self.is_invalid = True
-                return
-            if self.proc.read().is_space():
-                return
-            self.name.append(self.proc.read())
-            self.proc.move()
+        spaces = self.proc.get_spaces()
+        name = self.proc.scan_name()
+        self.name = name if len(spaces) == 0 else XmlChars(spaces, name)
+        if len(name) > 0:
+            self.name_id = self.dtd.symbols.intern(name.strchars)
+            prefix, colon, _ = name.strchars.partition(":")
+            if colon:
+                self.prefix_id = self.dtd.symbols.intern(prefix)
+        if self.proc.is_quote_at() or self.proc.peek_char() == "=":
+            self.err.add(self.startseq, CritErr.TAG_NAME_INVALID)
+            self.is_invalid = True
 
     def parse_attr_name(self) -> XmlChars:
-        attr_name = XmlChars()
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                break
-            if self.proc.read() == "=":
-                break
-            if self.proc.read().is_quote():
-                break
-            if self.proc.read().is_space():
-                break
-            attr_name.append(self.proc.read())
-            self.proc.move()
-        return attr_name
+        return self.proc.scan_name()
 
     def parse_attributes(self) -> None:
         if self.is_invalid:
             return
         attr_name = XmlChars()
+        attr_ids: set[int] = set()
         attr_switch: AttrSwitch = AttrSwitch.NAME
         while not self.proc.is_end():
             if self.is_parse_end():
                 return
-            if self.proc.read().is_space():
+            if self.proc.is_space_at():
                 self.tokens.append(self.proc.get_spaces())
                 continue
             if attr_switch == AttrSwitch.NAME:
@@ -172,7 +186,7 @@ class Tag:
                 self.tokens.append(attr_name)
                 continue
             if attr_switch == AttrSwitch.EQUAL:
-                if self.proc.read() != "=":
+                if self.proc.peek_char() != "=":
                     self.err.add(self.proc.read(), CritErr.ATTR_EXPECTED_EQUAL)
                     return
                 attr_switch = AttrSwitch.VALUE
@@ -180,28 +194,31 @@ class Tag:
                 self.proc.move()
                 continue
             if attr_switch == AttrSwitch.VALUE:
-                if not self.proc.read().is_quote():
+                if not self.proc.is_quote_at():
                     self.err.add(self.proc.read(), CritErr.ATTR_EXPECTED_VALUE)
                     return
-                attr_value = AttLiteral(self.proc, self.dtd, self.err).content
-                if attr_value == "":
+                attr_literal = AttLiteral(self.proc, self.dtd, self.err)
+                attr_value = attr_literal.content
+                if attr_literal.is_empty():
                     self.err.add(self.proc.read(), CritErr.ATTR_EXPECTED_VALUE)
                     return
-                self.attributes[attr_name] = attr_value
+                attr_id = self.dtd.symbols.intern(attr_name.strchars)
+                if attr_id in attr_ids:
+                    self.err.add(attr_name, CritErr.ATTR_DUPLICATE)
+                else:
+                    attr_ids.add(attr_id)
+                    self.attributes[attr_name] = attr_value
                 self.tokens.append(attr_value)
                 attr_switch = AttrSwitch.NAME
                 attr_name = XmlChars()
-                if not self.proc.read().is_space():
+                if not self.proc.is_space_at():
                     if self.is_parse_end():
                         continue
                     self.err.add(self.proc.read(), CritErr.ATTR_EXPECTED_SPACE)
                 continue
 
     def parse_invalid(self) -> None:
-        while not self.proc.is_end():
-            if self.is_parse_end():
-                return
-            self.proc.move()
+        self.proc.scan_until_tag_end()
 
     def verify_location(self) -> None:
         from xmlstruct.doctype import Doctype
@@ -221,12 +238,12 @@ class Tag:
         if self.endseq == "":
             self.err.add(self.startseq, CritErr.NODE_MISSING_END)
 
-    def close_tag(self, end_tag_name: XmlChars) -> bool:
-        if self.name == "":
+    def close_tag(self, end_tag_name_id: int) -> bool:
+        if self.name_id < 0:
             return False
         if self.closed:
             return False
-        if self.name.strchars.strip() == end_tag_name.strchars.strip():
+        if self.name_id == end_tag_name_id:
             self.closed = True
             return True
         return False
@@ -4,29 +4,130 @@ from typing import TYPE_CHECKING
 
 
 if TYPE_CHECKING:
+    from dtd.dtdcore import Dtd
     from errcl import ErrorCollector
-    from xmltokens.xmlproc import XmlProcessor
     from xmlvalidator import XmlValidator
 
     from .doctype import Doctype
     from .includeignore import IncludeIgnore
     from .tag import Tag
 
-from xmltokens.xmlchars import XmlChars
+from errcl import CritErr
+from xmltokens import XmlChars
+from xmltokens import XmlLazyChars
+from xmltokens import XmlProccesor
+from xmltokens import XmlSpans
+from xmltokens.xmllazy import detach
+
+
+def verify_chars(chars: XmlChars, err: ErrorCollector) -> None:
+    cdata_end = chars.find("]]>")
+    while cdata_end >= 0:
+        err.add(chars, CritErr.TEXT_CDATA_END, cdata_end)
+        cdata_end = chars.find("]]>", cdata_end + 3)
+
+
+def parse_ref(proc: XmlProccesor, dtd: Dtd) -> XmlChars | None:
+    if proc.match("&#"):
+        chrref = proc.get_chrref()
+        if chrref is None:
+            return None
+        chrref_value = dtd.entity.get_chrref_value(chrref)
+        if chrref_value is None:
+            return None
+        proc.move(len(chrref))
+        return chrref_value
+    gent_ref = proc.get_gent_ref()
+    if gent_ref is None:
+        return None
+    deref_gent = dtd.entity.deref_gent(gent_ref)
+    if deref_gent is None:
+        return None
+    proc.move(len(gent_ref))
+    return deref_gent
+
+
+def parse_text(proc: XmlProccesor, dtd: Dtd, err: ErrorCollector | None) -> XmlChars:
+    """Character data up to the next "<" with references expanded, runs are verified when err is given."""
+    parts: list[XmlChars] = []
+    while not proc.is_end() and not proc.match("<"):
+        run = proc.scan_until("<&")
+        if len(run) > 0:
+            if err is not None:
+                verify_chars(run, err)
+            parts.append(run)
+            continue
+        if proc.match("<"):
+            break
+        ref_value = parse_ref(proc, dtd)
+        if ref_value is None:
+            # not a reference, the ampersand stays as it is
+            parts.append(proc.read())
+            proc.move()
+            continue
+        parts.append(ref_value)
+    if len(parts) == 1:
+        return parts[0]
+    if parts:
+        return XmlSpans.join(parts)
+    return XmlChars()
+
+
+def expand_text(raw: XmlChars, dtd: Dtd) -> XmlChars:
+    # the raw run is parsed the same way as in eager mode, its "]]>" errors are already reported
+    return parse_text(XmlProccesor(raw), dtd, None)
 
 
 class Text:
+    __slots__ = ("proc", "parent", "dtd", "err", "tokens", "content", "raw")
+
     def __init__(
         self,
-        proc: XmlProcessor,
-        startseq: XmlChars,
+        proc: XmlProccesor,
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
+        dtd: Dtd,
         err: ErrorCollector,
     ) -> None:
-        self.proc = proc
-        self.startseq = startseq
+        """Character data up to the next markup, one node per run."""
+        self.proc: XmlProccesor | None = proc
         self.parent = parent
-        self.err = err
-        self.endseq: XmlChars | None = None
-        self.tokens: list[XmlChars] = []
-        self.content: XmlChars | None = None
+        self.dtd: Dtd | None = dtd
+        self.err: ErrorCollector | None = err
+        self.tokens: list[XmlChars] | None = []
+        self.content: XmlChars = XmlChars()
+        # Raw run with unexpanded references, kept in lazy mode, detached from the document
+        self.raw: XmlChars | None = None
+        if self.dtd.entity.is_lazy:
+            self.raw = self.parse_lazy()
+            self.content = XmlLazyChars(self.raw, self.dtd, expand_text)
+        else:
+            self.parse()
+
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing."""
+        self.proc = None
+        self.dtd = None
+        self.err = None
+        self.tokens = None
+
+    def is_empty(self) -> bool:
+        if self.raw is not None:
+            return len(self.raw) == 0
+        return len(self.content) == 0
+
+    def parse(self) -> None:
+        self.content = parse_text(self.proc, self.dtd, self.err)
+
+    def parse_lazy(self) -> XmlChars:
+        raw = self.proc.scan_until("<")
+        verify_chars(raw, self.err)
+        ref_start = raw.find("&")
+        while ref_start >= 0:
+            ref_end = raw.find(";", ref_start)
+            if ref_end < 0:
+                break
+            if not raw.match("&#", ref_start):
+                # the reference stays as a placeholder, only its entity is checked
+                self.dtd.entity.check_gent(raw[ref_start : ref_end + 1])
+            ref_start = raw.find("&", ref_end)
+        return detach(raw)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from typing import TYPE_CHECKING
 
 
@@ -12,10 +13,18 @@ if TYPE_CHECKING:
     from .includeignore import IncludeIgnore
     from .tag import Tag
 
+from errcl import CritErr
 from xmltokens.xmlchars import XmlChars
 
 
+# One pseudo-attribute with its leading spaces, the value is in group 2 or 3 depending on the quote.
+XML_DECL_ATTR = re.compile(r"[ \t\r\n]+([A-Za-z]+)[ \t\r\n]*=[ \t\r\n]*(?:\"([^\"]*)\"|'([^']*)')")
+XML_DECL_SPACES = re.compile(r"[ \t\r\n]*")
+
+
 class XmlDecl:
+    __slots__ = ("proc", "startseq", "parent", "err", "endseq", "tokens", "attributes")
+
     def __init__(
         self,
         proc: XmlProcessor,
@@ -23,10 +32,58 @@ class XmlDecl:
         parent: Tag | Doctype | IncludeIgnore | XmlValidator,
         err: ErrorCollector,
     ) -> None:
-        self.proc = proc
-        self.startseq = startseq
+        self.proc: XmlProcessor | None = proc
+        self.startseq: XmlChars | None = startseq
         self.parent = parent
-        self.err = err
+        self.err: ErrorCollector | None = err
         self.endseq: XmlChars | None = None
-        self.tokens: list[XmlChars] = []
-        self.attributes: list = []
+        self.tokens: list[XmlChars] | None = []
+        self.attributes: list[tuple[XmlChars, XmlChars]] = []
+        self.parse()
+        self.verify_location()
+
+    def release_parser_state(self) -> None:
+        """Drops state only needed while parsing."""
+        self.proc = None
+        self.err = None
+        self.tokens = None
+        self.startseq = None
+        self.endseq = None
+
+    def parse(self) -> None:
+        end = self.proc.find("?>")
+        if end < 0:
+            # unterminated, the declaration runs to the end of the text
+            end = self.proc.get_length() - self.proc.pointer
+        body = self.proc.read(0, end)
+        self.tokens.append(body)
+        self.proc.move(end)
+        if self.proc.match("?>"):
+            self.endseq = self.proc.read(0, 2)
+            self.tokens.append(self.endseq)
+            self.proc.move(2)
+        else:
+            self.err.add(self.startseq, CritErr.NODE_MISSING_END)
+        self.parse_attributes(body)
+
+    def parse_attributes(self, body: XmlChars) -> None:
+        text = body.strchars
+        pos = 0
+        while (match := XML_DECL_ATTR.match(text, pos)) is not None:
+            value_group = 2 if match.group(2) is not None else 3
+            self.attributes.append(
+                (body[match.start(1) : match.end(1)], body[match.start(value_group) : match.end(value_group)])
+            )
+            pos = match.end()
+        pos = XML_DECL_SPACES.match(text, pos).end()
+        if pos < len(text):
+            self.err.add(body, CritErr.XML_DECL_INVALID, pos)
+        if len(self.attributes) == 0 or self.attributes[0][0] != "version":
+            self.err.add(self.startseq, CritErr.XML_DECL_VERSION_MISSING, -1)
+
+    def verify_location(self) -> None:
+        from xmlvalidator import XmlValidator
+
+        # only the very first node of the document may be the declaration
+        if not isinstance(self.parent, XmlValidator) or len(self.parent.children) > 0:
+            self.err.add(self.startseq, CritErr.XML_DECL_LOCATION_INVALID)
@@ -1,4 +1,8 @@
 from .xmlchar import XmlChar as XmlChar
 from .xmlcharref import XmlCharRef as XmlCharRef
 from .xmlchars import XmlChars as XmlChars
+from .xmlspans import XmlSpan as XmlSpan
+from .xmlspans import XmlSpans as XmlSpans
+from .xmllazy import XmlLazyChars as XmlLazyChars
+from .xmlview import XmlCharsView as XmlCharsView
 from .xmlproc import XmlProcessor as XmlProccesor
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import re
+
+
+# Flags in CHAR_CLASSES
+NAME_START_CHAR = 1
+NAME_CHAR = 2
+PUBID_CHAR = 4
+
+# [4] NameStartChar
+NAME_START_RANGES: list[tuple[int, int]] = [
+    (ord(":"), ord(":")),
+    (ord("A"), ord("Z")),
+    (ord("_"), ord("_")),
+    (ord("a"), ord("z")),
+    (0xC0, 0xD6),
+    (0xD8, 0xF6),
+    (0xF8, 0x2FF),
+    (0x370, 0x37D),
+    (0x37F, 0x1FFF),
+    (0x200C, 0x200D),
+    (0x2070, 0x218F),
+    (0x2C00, 0x2FEF),
+    (0x3001, 0xD7FF),
+    (0xF900, 0xFDCF),
+    (0xFDF0, 0xFFFD),
+    (0x10000, 0xEFFFF),
+]
+# [4a] NameChar on top of NameStartChar
+NAME_EXTRA_RANGES: list[tuple[int, int]] = [
+    (ord("-"), ord(".")),
+    (ord("0"), ord("9")),
+    (0xB7, 0xB7),
+    (0x300, 0x36F),
+    (0x203F, 0x2040),
+]
+# [13] PubidChar
+PUBID_CHARS = " \r\nabcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-'()+,./:=?;!*#@$_%"
+
+
+def build_char_classes() -> bytearray:
+    """One byte of flags per BMP code point, characters above are looked up in the ranges."""
+    char_classes = bytearray(0x10000)
+    for ranges, flags in ((NAME_START_RANGES, NAME_START_CHAR | NAME_CHAR), (NAME_EXTRA_RANGES, NAME_CHAR)):
+        for first, last in ranges:
+            if first > 0xFFFF:
+                continue
+            last = min(last, 0xFFFF)
+            char_classes[first : last + 1] = bytes([flags]) * (last - first + 1)
+    for char in PUBID_CHARS:
+        char_classes[ord(char)] |= PUBID_CHAR
+    return char_classes
+
+
+def get_regex_class(ranges: list[tuple[int, int]]) -> str:
+    return "".join(
+        re.escape(chr(first)) if first == last else f"{re.escape(chr(first))}-{re.escape(chr(last))}"
+        for first, last in ranges
+    )
+
+
+CHAR_CLASSES = build_char_classes()
+NAME_START_CLASS = get_regex_class(NAME_START_RANGES)
+NAME_CLASS = NAME_START_CLASS + get_regex_class(NAME_EXTRA_RANGES)
+NAME = re.compile(f"[{NAME_START_CLASS}][{NAME_CLASS}]*")
+NMTOKEN = re.compile(f"[{NAME_CLASS}]+")
+PUBID_LITERAL = re.compile(f"[{re.escape(PUBID_CHARS)}]*")
+PUBID_INVALID_CHAR = re.compile(f"[^{re.escape(PUBID_CHARS)}]")
+
+
+def get_char_class(char: str) -> int:
+    if len(char) != 1:
+        return 0
+    code = ord(char)
+    if code <= 0xFFFF:
+        return CHAR_CLASSES[code]
+    for first, last in NAME_START_RANGES:
+        if first <= code <= last:
+            return NAME_START_CHAR | NAME_CHAR
+    return 0
+
+
+def is_namestartchar(char: str) -> bool:
+    return get_char_class(char) & NAME_START_CHAR != 0
+
+
+def is_namechar(char: str) -> bool:
+    return get_char_class(char) & NAME_CHAR != 0
+
+
+def is_pubidchar(char: str) -> bool:
+    return get_char_class(char) & PUBID_CHAR != 0
+
+
+def is_xmlname(chars: str) -> bool:
+    return NAME.fullmatch(chars) is not None
+
+
+def is_nmtoken(chars: str) -> bool:
+    return NMTOKEN.fullmatch(chars) is not None
+
+
+def is_pubid_literal(chars: str) -> bool:
+    return PUBID_LITERAL.fullmatch(chars) is not None
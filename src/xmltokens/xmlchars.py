@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from . import xmlcharclass
+
 
 if TYPE_CHECKING:
     from .xmlchar import XmlChar
@@ -45,11 +47,14 @@ class XmlChars:
         return len(self.xmlchars)
 
     def get_entity_id(self) -> int:
-        if len(self.xmlchars) == 0:
+        return self.get_range_entity_id(0, len(self.xmlchars))
+
+    def get_range_entity_id(self, start: int, end: int) -> int:
+        if start >= min(end, len(self.xmlchars)):
             return -1
-        first = self.xmlchars[0].entity_id
-        i = 0
-        while i < len(self.xmlchars):
+        first = self.xmlchars[start].entity_id
+        i = start
+        while i < min(end, len(self.xmlchars)):
             if first != self.xmlchars[i].entity_id:
                 raise ValueError("Internal xmlvalidator library error, please report immediately.")
             i += 1
@@ -105,79 +110,25 @@ class XmlChars:
     def match(self, text: str, offset: int = 0) -> bool:
         return self.strchars[offset : offset + len(text)] == text
 
+    def find(self, text: str, offset: int = 0) -> int:
+        return self.strchars.find(text, offset)
+
     def is_space(self, offset: int = 0) -> bool:
         if self.strchars[offset] in {" ", "\n", "\t", "\r"}:
             return True
         return False
 
     def is_namestartchar(self, char: str) -> bool:
-        if len(char) != 1:
-            return False
-        codechar = ord(char)
-        if codechar == ord(":"):
-            return True
-        if ord("A") <= codechar <= ord("Z"):
-            return True
-        if codechar == ord("_"):
-            return True
-        if ord("a") <= codechar <= ord("z"):
-            return True
-        if (
-            0xC0 <= codechar <= 0xD6
-            or 0xD8 <= codechar <= 0xF6
-            or 0xF8 <= codechar <= 0x2FF
-            or 0x370 <= codechar <= 0x37D
-            or 0x37F <= codechar <= 0x1FFF
-            or 0x200C <= codechar <= 0x200D
-            or 0x2070 <= codechar <= 0x218F
-            or 0x2C00 <= codechar <= 0x2FEF
-            or 0x3001 <= codechar <= 0xD7FF
-            or 0xF900 <= codechar <= 0xFDCF
-            or 0xFDF0 <= codechar <= 0xFFFD
-            or 0x10000 <= codechar <= 0xEFFFF
-        ):
-            return True
-        return False
+        return xmlcharclass.is_namestartchar(char)
 
     def is_namechar(self, char: str) -> bool:
-        if len(char) != 1:
-            return False
-        if self.is_namestartchar(char):
-            return True
-        codechar = ord(char)
-        if codechar == ord("-"):
-            return True
-        if codechar == ord("."):
-            return True
-        if ord("0") <= codechar <= ord("9"):
-            return True
-        if codechar == 0xB7 or 0x0300 <= codechar <= 0x036F or 0x203F <= codechar <= 0x2040:
-            return True
-        return False
+        return xmlcharclass.is_namechar(char)
 
     def is_xmlname(self) -> bool:
-        error_pointers: list[int] = []
-        if not self.is_namestartchar(self.strchars[0]):
-            error_pointers.append(0)
-        i = 1
-        while i < len(self.strchars):
-            if not self.is_namechar(self.strchars[i]):
-                error_pointers.append(i)
-            i += 1
-        if len(error_pointers) > 0:
-            return False
-        return True
+        return xmlcharclass.is_xmlname(self.strchars)
 
     def is_nmtoken(self) -> bool:
-        error_pointers: list[int] = []
-        i = 0
-        while i < len(self.strchars):
-            if not self.is_namechar(self.strchars[i]):
-                error_pointers.append(i)
-            i += 1
-        if len(error_pointers) > 0:
-            return False
-        return True
+        return xmlcharclass.is_nmtoken(self.strchars)
 
     def is_attvalue(self) -> bool:
         # both qoutes are already included in buffer separation
@@ -204,26 +155,10 @@ class XmlChars:
         return True
 
     def is_pubidchar(self, char: str) -> bool:
-        if len(char) != 1:
-            return False
-        if char in {" ", "\r", "\n"}:  # 0x20 | 0x0D | 0x0A
-            return True
-        if char.isalnum():  # [a-zA-Z0-9]
-            return True
-        if char in {"-()+,./:=?;!*#@$_%"}:
-            return True
-        return False
+        return xmlcharclass.is_pubidchar(char)
 
     def check_pubid_literal(self) -> bool:
-        error_pointers: list[int] = []
-        i = 0
-        while i < len(self.strchars):
-            if not self.is_pubidchar(self.strchars[i]):
-                error_pointers.append(i)
-            i += 1
-        if len(error_pointers) > 0:
-            return False
-        return True
+        return xmlcharclass.is_pubid_literal(self.strchars)
 
     def strip_quotes(self) -> XmlChars:
         start = 0
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .xmlchars import XmlChars
+from .xmlspans import XmlSpans
+from .xmlview import XmlCharsView
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from dtd.dtdcore import Dtd
+
+    from .xmlchar import XmlChar
+    from .xmlcharref import XmlCharRef
+
+
+def detach(chars: XmlChars) -> XmlChars:
+    """Same chars without a reference to the document they were read from."""
+    if isinstance(chars, XmlCharsView):
+        chars = chars.materialize()
+    if isinstance(chars, XmlSpans):
+        return chars.copy_detached()
+    return chars
+
+
+class XmlLazyChars(XmlChars):
+    def __init__(self, raw: XmlChars, dtd: Dtd, expand: Callable[[XmlChars, Dtd], XmlChars]) -> None:
+        """Placeholder for XmlChars that are built by expand(raw, dtd) on first access and kept afterwards.
+
+        Only the detached raw text and the DTD are held, not the parse node or the document buffer.
+        """
+        self.raw: XmlChars | None = detach(raw)
+        self.dtd: Dtd | None = dtd
+        self.expand: Callable[[XmlChars, Dtd], XmlChars] | None = expand
+        self.expanded: XmlChars | None = None
+
+    @property
+    def is_expanded(self) -> bool:
+        return self.expanded is not None
+
+    @property
+    def strchars(self) -> str:  # type: ignore[override]
+        return self.materialize().strchars
+
+    @property
+    def xmlchars(self) -> list[XmlChar | XmlCharRef]:  # type: ignore[override]
+        return self.materialize().xmlchars
+
+    def materialize(self) -> XmlChars:
+        if self.expanded is None:
+            if self.expand is None or self.raw is None or self.dtd is None:
+                raise ValueError("Internal xmlvalidator library error, please report immediately.")
+            self.expanded = self.expand(self.raw, self.dtd)
+            self.raw = None
+            self.dtd = None
+            self.expand = None
+        return self.expanded
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+    def __getitem__(self, index: int | slice) -> XmlChars:
+        return self.materialize()[index]
+
+    def get_range_entity_id(self, start: int, end: int) -> int:
+        return self.materialize().get_range_entity_id(start, end)
+
+    def add_entity_id(self, entity_id: int) -> None:
+        self.materialize().add_entity_id(entity_id)
+
+    def copy_with_new_entity_id(self, new_entity_id: int) -> XmlChars:
+        return self.materialize().copy_with_new_entity_id(new_entity_id)
+
+    def remove(self, start: int, end: int) -> None:
+        self.materialize().remove(start, end)
+
+    def insert(self, xmlchar: XmlChar | XmlCharRef | XmlChars, pointer: int | None = None) -> None:
+        self.materialize().insert(xmlchar, pointer)
+
+    def append(self, *xmlchars: XmlChar | XmlCharRef | XmlChars) -> None:
+        self.materialize().append(*xmlchars)
+
+    def strip_quotes(self) -> XmlChars:
+        return self.materialize().strip_quotes()
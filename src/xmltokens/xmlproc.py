@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import re
+from bisect import bisect_right
 from typing import TYPE_CHECKING
 
-from xmltokens import xmlchars
-
 
 if TYPE_CHECKING:
     pass
 
 from .xmlchars import XmlChars
+from .xmlspans import XmlSpans
+from .xmlview import XmlCharsView
+
+
+# Runs of name characters as tags see them, stops at spaces, quotes, equal sign, "<", ">" and "/>".
+NAME_RUN = re.compile(r"(?:[^ \t\r\n'\"=<>/]|/(?!>))*")
+# Runs of anything up to "<", ">" or "/>".
+TAG_END_RUN = re.compile(r"(?:[^<>/]|/(?!>))*")
+SCAN_UNTIL_CACHE: dict[str, re.Pattern[str]] = {}
 
 
 class XmlProcessor:
@@ -16,29 +25,168 @@ class XmlProcessor:
         self,
         xmlchars: XmlChars,
     ) -> None:
-        self.xmlchars = xmlchars
         self.pointer: int = 0
+        # Piece table with the gap at the pointer: replaced text is done and kept as pieces in head,
+        # everything after it is read straight from tail, so a replacement never copies the document.
+        self.head: list[XmlChars] = []
+        # Position of each head piece, reads behind the pointer look up their piece instead of joining
+        self.head_starts: list[int] = []
+        self.head_len = 0
+        self.tail = xmlchars
+        self.tail_start = 0
+
+    @property
+    def xmlchars(self) -> XmlChars:
+        self.flush()
+        return self.tail
+
+    @xmlchars.setter
+    def xmlchars(self, xmlchars: XmlChars) -> None:
+        self.head = []
+        self.head_starts = []
+        self.head_len = 0
+        self.tail = xmlchars
+        self.tail_start = 0
+
+    def flush(self) -> None:
+        if not self.head:
+            return
+        self.xmlchars = self.join([*self.head, self.tail[self.tail_start :]])
+
+    def join(self, pieces: list[XmlChars]) -> XmlChars:
+        if isinstance(self.tail, XmlSpans):
+            return XmlSpans.join(pieces)
+        xmlchars = XmlChars()
+        xmlchars.append(*[piece.materialize() if isinstance(piece, XmlCharsView) else piece for piece in pieces])
+        return xmlchars
+
+    def get_tail_pos(self, offset: int = 0) -> int:
+        """Maps pointer + offset to a position in tail, pieces are joined first when it points into head."""
+        pos = self.pointer + offset
+        if pos < self.head_len:
+            self.flush()
+        return pos - self.head_len + self.tail_start
+
+    def is_in_head(self, offset: int = 0) -> bool:
+        return self.pointer + offset < self.head_len
+
+    def get_piece_index(self, pos: int) -> int:
+        return bisect_right(self.head_starts, pos) - 1
+
+    def slice_piece(self, piece: XmlChars, start: int, end: int) -> XmlChars:
+        # a view of a view points at the original source, views never nest
+        if isinstance(piece, XmlCharsView):
+            return piece[start:end]
+        return XmlCharsView(piece, start, end)
+
+    def get_range(self, pos: int, length: int) -> list[XmlChars]:
+        """Views of the pieces that hold pos to pos + length, the tail is only cut to the part in range."""
+        views: list[XmlChars] = []
+        index = self.get_piece_index(pos)
+        while length > 0 and index < len(self.head):
+            piece = self.head[index]
+            piece_pos = pos - self.head_starts[index]
+            piece_len = min(length, len(piece) - piece_pos)
+            views.append(self.slice_piece(piece, piece_pos, piece_pos + piece_len))
+            pos += piece_len
+            length -= piece_len
+            index += 1
+        if length > 0:
+            tail_pos = pos - self.head_len + self.tail_start
+            views.append(XmlCharsView(self.tail, tail_pos, tail_pos + length))
+        return views
+
+    def get_range_text(self, pos: int, length: int) -> str:
+        if pos >= self.head_len:
+            tail_pos = pos - self.head_len + self.tail_start
+            return self.tail.strchars[tail_pos : tail_pos + length]
+        return "".join(view.strchars for view in self.get_range(pos, min(length, self.get_length() - pos)))
+
+    def get_head_text(self) -> str:
+        """Text from the pointer to the end of head, only as long as the replaced text."""
+        return self.get_range_text(self.pointer, self.head_len - self.pointer)
+
+    def get_length(self) -> int:
+        return self.head_len + len(self.tail) - self.tail_start
 
     def remainder(self) -> XmlChars:
-        return XmlChars(*self.xmlchars[self.pointer :])
+        pos = self.get_tail_pos()
+        return self.tail[pos:]
 
     def match(self, text: str, offset: int = 0) -> bool:
-        return self.xmlchars.match(text, self.pointer + offset)
+        if self.pointer + offset < 0:
+            return False
+        return self.get_range_text(self.pointer + offset, len(text)) == text
 
     def match_followed_by_space(self, text: str, offset: int = 0) -> bool:
-        if not self.xmlchars.match(text, self.pointer + offset):
+        if not self.match(text, offset):
             return False
-        return self.xmlchars.is_space(self.pointer + offset + len(text))
+        return self.is_space_at(offset + len(text))
+
+    def peek_char(self, offset: int = 0) -> str:
+        if self.pointer + offset < 0:
+            return ""
+        return self.get_range_text(self.pointer + offset, 1)
+
+    def is_space_at(self, offset: int = 0) -> bool:
+        return self.peek_char(offset) in {" ", "\n", "\t", "\r"}
+
+    def is_quote_at(self, offset: int = 0) -> bool:
+        return self.peek_char(offset) in {"'", '"'}
 
     def get_spaces(self) -> XmlChars:
-        spaces = XmlChars()
-        while self.read().is_space():
-            spaces.append(self.read())
-            self.move()
+        length = 0
+        while self.is_space_at(length):
+            length += 1
+        spaces = self.read(0, length)
+        self.move(length)
         return spaces
 
+    def scan(self, pattern: re.Pattern[str]) -> XmlChars:
+        if self.is_in_head():
+            length = self.scan_head(pattern)
+        else:
+            pos = self.get_tail_pos()
+            match = pattern.match(self.tail.strchars, pos)
+            length = 0 if match is None else match.end() - pos
+        scanned = self.read(0, length)
+        self.move(length)
+        return scanned
+
+    def scan_head(self, pattern: re.Pattern[str]) -> int:
+        """Length of the run of pattern from a pointer inside head, the tail is only read as far as the run goes."""
+        text = self.get_head_text()
+        match = pattern.match(text)
+        if match is not None and match.end() == len(text):
+            # the run goes on in the tail, one more char keeps the lookahead of patterns like NAME_RUN
+            tail_match = pattern.match(self.tail.strchars, self.tail_start)
+            tail_end = self.tail_start if tail_match is None else tail_match.end()
+            match = pattern.match(text + self.tail.strchars[self.tail_start : tail_end + 1])
+        return 0 if match is None else match.end()
+
+    def scan_until(self, charset: str) -> XmlChars:
+        pattern = SCAN_UNTIL_CACHE.get(charset)
+        if pattern is None:
+            pattern = re.compile("[^" + "".join(re.escape(char) for char in charset) + "]*")
+            SCAN_UNTIL_CACHE[charset] = pattern
+        return self.scan(pattern)
+
+    def scan_name(self) -> XmlChars:
+        return self.scan(NAME_RUN)
+
+    def scan_until_tag_end(self) -> XmlChars:
+        return self.scan(TAG_END_RUN)
+
+    def scan_quoted(self, quote: str) -> XmlChars:
+        length = self.find(quote)
+        if length < 0:
+            length = self.get_length() - self.pointer
+        scanned = self.read(0, length)
+        self.move(length)
+        return scanned
+
     def get_pent_ref(self) -> XmlChars | None:
-        if self.read() != "%":
+        if self.peek_char() != "%":
             return None
         pent_ref_end_pos = self.find(";")
         if pent_ref_end_pos < 0:
@@ -46,7 +194,7 @@ class XmlProcessor:
         return self.read(0, pent_ref_end_pos + 1)
 
     def get_gent_ref(self) -> XmlChars | None:
-        if self.read() != "&":
+        if self.peek_char() != "&":
             return None
         ref_end_pos = self.find(";")
         if ref_end_pos < 0:
@@ -54,7 +202,7 @@ class XmlProcessor:
         return self.read(0, ref_end_pos + 1)
 
     def get_chrref(self) -> XmlChars | None:
-        if self.read() != "&#":
+        if not self.match("&#"):
             return None
         chrref_end_pos = self.find(";")
         if chrref_end_pos < 0:
@@ -65,25 +213,82 @@ class XmlProcessor:
         self.pointer += num
 
     def is_end(self) -> bool:
-        if self.pointer >= len(self.xmlchars.xmlchars):
+        if self.pointer >= self.get_length():
             return True
         return False
 
     def read(self, offset: int = 0, length: int = 1) -> XmlChars:
         if offset < 0 or length < 0:
             return XmlChars()
-        if self.pointer + offset + length > len(self.xmlchars.xmlchars):
+        pos = self.pointer + offset
+        if pos + length > self.get_length():
             return XmlChars()
-        start = self.pointer + offset
-        end = self.pointer + offset + length
-        return XmlChars(*self.xmlchars.xmlchars[start:end])
+        if pos >= self.head_len:
+            start = pos - self.head_len + self.tail_start
+            return XmlCharsView(self.tail, start, start + length)
+        views = self.get_range(pos, length)
+        if len(views) == 1:
+            return views[0]
+        # only the chars in range are joined
+        return self.join(views)
 
     def find(self, text: str) -> int:
-        find_pos = self.xmlchars.strchars.find(text, self.pointer)
+        if not self.is_in_head():
+            pos = self.get_tail_pos()
+            find_pos = self.tail.find(text, pos)
+            if find_pos < 0:
+                return find_pos
+            return find_pos - pos
+        # a match may start in head and end in the tail
+        head_text = self.get_head_text()
+        find_pos = (head_text + self.tail.strchars[self.tail_start : self.tail_start + len(text) - 1]).find(text)
+        if find_pos >= 0:
+            return find_pos
+        find_pos = self.tail.find(text, self.tail_start)
         if find_pos < 0:
             return find_pos
-        return find_pos - self.pointer
+        return len(head_text) + find_pos - self.tail_start
 
     def ins_repl_text(self, length_to_replace: int, replace_text: XmlChars) -> None:
-        self.xmlchars.remove(self.pointer, self.pointer + length_to_replace)
-        self.xmlchars.insert(replace_text, self.pointer)
+        # Text up to the pointer and the replacement become pieces, the tail is never copied.
+        # Views handed out by read() keep pointing at the text they were read from.
+        if self.is_in_head():
+            self.split_head(length_to_replace, replace_text)
+            return
+        pos = self.get_tail_pos()
+        if pos > self.tail_start:
+            self.head_starts.append(self.pointer - (pos - self.tail_start))
+            self.head.append(XmlCharsView(self.tail, self.tail_start, pos))
+        self.head_starts.append(self.pointer)
+        self.head.append(replace_text)
+        self.head_len = self.pointer + len(replace_text)
+        self.tail_start = pos + length_to_replace
+
+    def split_head(self, length_to_replace: int, replace_text: XmlChars) -> None:
+        """Replaces text from a pointer inside head, the piece at the pointer is split and later pieces stay."""
+        index = self.get_piece_index(self.pointer)
+        piece_pos = self.pointer - self.head_starts[index]
+        pieces = self.head[:index]
+        if piece_pos > 0:
+            pieces.append(self.slice_piece(self.head[index], 0, piece_pos))
+        pieces.append(replace_text)
+        replaced_end = self.pointer + length_to_replace
+        if replaced_end < self.head_len:
+            end_index = self.get_piece_index(replaced_end)
+            end_pos = replaced_end - self.head_starts[end_index]
+            end_piece = self.head[end_index]
+            if end_pos > 0:
+                pieces.append(self.slice_piece(end_piece, end_pos, len(end_piece)))
+            else:
+                pieces.append(end_piece)
+            pieces.extend(self.head[end_index + 1 :])
+        else:
+            self.tail_start += replaced_end - self.head_len
+        starts = self.head_starts[:index]
+        length = self.head_starts[index]
+        for piece in pieces[index:]:
+            starts.append(length)
+            length += len(piece)
+        self.head = pieces
+        self.head_starts = starts
+        self.head_len = length
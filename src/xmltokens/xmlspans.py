@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from .xmlchar import XmlChar
+from .xmlcharref import XmlCharRef
+from .xmlchars import XmlChars
+from .xmlview import XmlCharsView
+
+
+if TYPE_CHECKING:
+    from textbuffer import TextBuffer
+
+
+class XmlSpan(NamedTuple):
+    buffer_slot: int
+    start: int
+    end: int
+    entity_id: int
+
+
+class XmlSpans(XmlChars):
+    def __init__(self, sources: dict[int, str] | None = None) -> None:
+        """Compact XmlChars stored as runs over TextBuffer.valid_chars.
+
+        A span whose buffer range has the same length as its text maps characters one to one.
+        Any other span is a replacement (character reference, normalized space) and every
+        character in it points back to the whole buffer range, same as XmlCharRef.
+        The spans double as the provenance table, entity_id overrides all of them at once so
+        re-tagging expanded entity text does not touch the spans.
+        """
+        self.sources: dict[int, str] = {} if sources is None else sources
+        self.strchars = ""
+        self.spans: list[XmlSpan] = []
+        self.offsets = array("q")
+        self.entity_id: int | None = None
+        # spans and offsets are shared with a copy and have to be copied before they change
+        self.is_shared = False
+
+    @classmethod
+    def from_buffer(cls, buffer: TextBuffer, entity_id: int) -> XmlSpans:
+        xmlspans = cls({buffer.bufferslot: buffer.valid_chars})
+        xmlspans.add_span(XmlSpan(buffer.bufferslot, 0, len(buffer.valid_chars), entity_id), buffer.valid_chars)
+        return xmlspans
+
+    @classmethod
+    def from_str(cls, chars: str, entity_id: int) -> XmlSpans:
+        xmlspans = cls()
+        xmlspans.add_span(XmlSpan(-1, -1, -1, entity_id), chars)
+        return xmlspans
+
+    @classmethod
+    def join(cls, pieces: list[XmlChars]) -> XmlSpans:
+        """Concatenates pieces in one pass, strchars is built once instead of once per piece."""
+        xmlspans = cls()
+        texts: list[str] = []
+        length = 0
+        for piece in pieces:
+            if isinstance(piece, XmlCharsView):
+                piece = piece.materialize()
+            if not isinstance(piece, XmlSpans):
+                converted = cls()
+                converted.append(piece)
+                piece = converted
+            xmlspans.sources.update(piece.sources)
+            for span_index, span in enumerate(piece.spans):
+                span_len = piece.get_span_len(span_index)
+                xmlspans.push_span(span._replace(entity_id=piece.get_span_entity_id(span_index)), span_len, length)
+                length += span_len
+            texts.append(piece.strchars)
+        xmlspans.strchars = "".join(texts)
+        return xmlspans
+
+    @property
+    def xmlchars(self) -> list[XmlChar | XmlCharRef]:  # type: ignore[override]
+        return [self.get_xmlchar(index) for index in range(len(self.strchars))]
+
+    def __len__(self) -> int:
+        return len(self.strchars)
+
+    def __getitem__(self, index: int | slice) -> XmlChars:
+        if isinstance(index, int):
+            if index < 0:
+                index += len(self.strchars)
+            if not 0 <= index < len(self.strchars):
+                raise IndexError("XmlSpans index out of range")
+            return self.get_slice(index, index + 1)
+        start, stop, step = index.indices(len(self.strchars))
+        if step != 1:
+            return XmlChars(*[self.get_xmlchar(i) for i in range(start, stop, step)])
+        return self.get_slice(start, stop)
+
+    def get_span_len(self, span_index: int) -> int:
+        if span_index + 1 < len(self.offsets):
+            return self.offsets[span_index + 1] - self.offsets[span_index]
+        return len(self.strchars) - self.offsets[span_index]
+
+    def is_direct(self, span_index: int) -> bool:
+        span = self.spans[span_index]
+        return span.buffer_slot >= 0 and span.end - span.start == self.get_span_len(span_index)
+
+    def get_span_entity_id(self, span_index: int) -> int:
+        if self.entity_id is not None:
+            return self.entity_id
+        return self.spans[span_index].entity_id
+
+    def unshare(self) -> None:
+        if self.is_shared:
+            self.spans = list(self.spans)
+            self.offsets = array("q", self.offsets)
+            self.is_shared = False
+
+    def add_span(self, span: XmlSpan, text: str) -> None:
+        if not text:
+            return
+        self.unshare()
+        if self.entity_id is not None and self.entity_id != span.entity_id:
+            if self.spans:
+                self.spans = [old_span._replace(entity_id=self.entity_id) for old_span in self.spans]
+            self.entity_id = None
+        self.push_span(span, len(text), len(self.strchars))
+        self.strchars += text
+
+    def push_span(self, span: XmlSpan, span_len: int, length: int) -> None:
+        """Adds a span of span_len characters after the first length characters, strchars is left to the caller."""
+        if self.spans:
+            last = self.spans[-1]
+            if (
+                last.buffer_slot == span.buffer_slot >= 0
+                and last.entity_id == span.entity_id
+                and last.end == span.start
+                and span.end - span.start == span_len
+                and last.end - last.start == length - self.offsets[-1]
+            ):
+                self.spans[-1] = last._replace(end=span.end)
+                return
+        self.offsets.append(length)
+        self.spans.append(span)
+
+    def get_xmlchar(self, index: int) -> XmlChar | XmlCharRef:
+        span_index = bisect_right(self.offsets, index) - 1
+        span = self.spans[span_index]
+        entity_id = self.get_span_entity_id(span_index)
+        char = self.strchars[index]
+        if span.buffer_slot < 0:
+            return XmlChar(char, -1, -1, entity_id)
+        if self.is_direct(span_index) or span.end <= span.start:
+            return XmlChar(char, span.buffer_slot, span.start + index - self.offsets[span_index], entity_id)
+        source = self.sources.get(span.buffer_slot, "")
+        return XmlCharRef(
+            char,
+            *[XmlChar(source[pos : pos + 1], span.buffer_slot, pos, entity_id) for pos in range(span.start, span.end)],
+        )
+
+    def get_slice(self, start: int, stop: int) -> XmlSpans:
+        xmlspans = XmlSpans(self.sources)
+        if start >= stop:
+            return xmlspans
+        if start == 0 and stop >= len(self.strchars):
+            return self.copy_with_new_entity_id(self.entity_id)
+        span_index = bisect_right(self.offsets, start) - 1
+        while span_index < len(self.spans):
+            offset = self.offsets[span_index]
+            if offset >= stop:
+                break
+            span = self.spans[span_index]
+            span_len = self.get_span_len(span_index)
+            clip_start = max(start, offset)
+            clip_stop = min(stop, offset + span_len)
+            if self.is_direct(span_index):
+                span = span._replace(start=span.start + clip_start - offset, end=span.start + clip_stop - offset)
+            xmlspans.add_span(span, self.strchars[clip_start:clip_stop])
+            span_index += 1
+        xmlspans.entity_id = self.entity_id
+        return xmlspans
+
+    def get_entity_id(self) -> int:
+        return self.get_range_entity_id(0, len(self.strchars))
+
+    def get_range_entity_id(self, start: int, end: int) -> int:
+        if start >= end or len(self.spans) == 0:
+            return -1
+        if self.entity_id is not None:
+            return self.entity_id
+        span_index = bisect_right(self.offsets, start) - 1
+        first = self.spans[span_index].entity_id
+        while span_index < len(self.spans) and self.offsets[span_index] < end:
+            if first != self.spans[span_index].entity_id:
+                raise ValueError("Internal xmlvalidator library error, please report immediately.")
+            span_index += 1
+        return first
+
+    def is_quote(self) -> bool:
+        return self.strchars in {"'", '"'}
+
+    def add_entity_id(self, entity_id: int) -> None:
+        self.entity_id = entity_id
+
+    def copy_with_new_entity_id(self, new_entity_id: int | None) -> XmlSpans:
+        xmlspans = XmlSpans(self.sources)
+        xmlspans.replace_with(self)
+        xmlspans.entity_id = new_entity_id
+        return xmlspans
+
+    def copy_detached(self) -> XmlSpans:
+        """Copy that keeps only the sources its replacement spans read from, direct spans need none."""
+        xmlspans = self.copy_with_new_entity_id(self.entity_id)
+        xmlspans.sources = {
+            span.buffer_slot: self.sources[span.buffer_slot]
+            for span_index, span in enumerate(self.spans)
+            if span.buffer_slot in self.sources and not self.is_direct(span_index)
+        }
+        return xmlspans
+
+    def replace_with(self, xmlspans: XmlSpans) -> None:
+        self.strchars = xmlspans.strchars
+        self.spans = xmlspans.spans
+        self.offsets = xmlspans.offsets
+        self.entity_id = xmlspans.entity_id
+        self.is_shared = True
+        xmlspans.is_shared = True
+
+    def remove(self, start: int, end: int) -> None:
+        if start < 0 or start >= len(self.strchars) or start >= end:
+            return
+        xmlspans = self.get_slice(0, start)
+        xmlspans.append(self.get_slice(end, len(self.strchars)))
+        self.replace_with(xmlspans)
+
+    def insert(self, xmlchar: XmlChar | XmlCharRef | XmlChars, pointer: int | None = None) -> None:
+        if pointer is None:
+            pointer = len(self.strchars)
+        elif not (0 <= pointer <= len(self.strchars)):
+            raise IndexError("Pointer out of bounds")
+        if xmlchar:
+            xmlspans = self.get_slice(0, pointer)
+            xmlspans.append(xmlchar, self.get_slice(pointer, len(self.strchars)))
+            self.replace_with(xmlspans)
+
+    def append(self, *xmlchars: XmlChar | XmlCharRef | XmlChars) -> None:
+        for xmlchar in xmlchars:
+            if isinstance(xmlchar, XmlCharsView):
+                xmlchar = xmlchar.materialize()
+            if isinstance(xmlchar, XmlSpans):
+                if xmlchar.sources is not self.sources:
+                    self.sources.update(xmlchar.sources)
+                if len(self.strchars) == 0:
+                    self.replace_with(xmlchar)
+                    continue
+                for span_index, span in enumerate(xmlchar.spans):
+                    offset = xmlchar.offsets[span_index]
+                    span = span._replace(entity_id=xmlchar.get_span_entity_id(span_index))
+                    self.add_span(span, xmlchar.strchars[offset : offset + xmlchar.get_span_len(span_index)])
+            elif isinstance(xmlchar, XmlChars):
+                for char in xmlchar.xmlchars:
+                    self.append_xmlchar(char)
+            else:
+                self.append_xmlchar(xmlchar)
+
+    def append_xmlchar(self, xmlchar: XmlChar | XmlCharRef) -> None:
+        buffer_slot = xmlchar.get_buffer_slot()
+        buffer_pos = xmlchar.get_buffer_pos()
+        if buffer_slot < 0 or buffer_pos < 0:
+            self.add_span(XmlSpan(-1, -1, -1, xmlchar.entity_id), xmlchar.strchars)
+            return
+        if isinstance(xmlchar, XmlCharRef):
+            last_pos = xmlchar.xmlchars[-1].get_buffer_pos()
+            buffer_end = max(last_pos, buffer_pos) + 1
+            self.add_span(XmlSpan(buffer_slot, buffer_pos, buffer_end, xmlchar.entity_id), xmlchar.strchars)
+            return
+        self.add_span(XmlSpan(buffer_slot, buffer_pos, buffer_pos + 1, xmlchar.entity_id), xmlchar.strchars)
+
+    def strip_quotes(self) -> XmlChars:
+        start = 0
+        end = len(self.strchars)
+        if end > 0 and self.strchars[0] in {"'", '"'}:
+            start += 1
+        if end > start and self.strchars[-1] in {"'", '"'}:
+            end -= 1
+        return self.get_slice(start, end)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .xmlchars import XmlChars
+
+
+if TYPE_CHECKING:
+    from .xmlchar import XmlChar
+    from .xmlcharref import XmlCharRef
+
+
+class XmlCharsView(XmlChars):
+    def __init__(self, source: XmlChars, start: int, end: int) -> None:
+        """Read-only window over another XmlChars, nothing is copied until provenance is needed."""
+        self.source = source
+        self.text = source.strchars
+        self.start = start
+        self.end = end
+        # Sliced on first access, most views are only matched against the source text
+        self.cached_strchars: str | None = None
+
+    @property
+    def strchars(self) -> str:  # type: ignore[override]
+        if self.cached_strchars is None:
+            self.cached_strchars = self.text[self.start : self.end]
+        return self.cached_strchars
+
+    @property
+    def xmlchars(self) -> list[XmlChar | XmlCharRef]:  # type: ignore[override]
+        return self.materialize().xmlchars
+
+    def materialize(self) -> XmlChars:
+        if self.start >= self.end:
+            return XmlChars()
+        return self.source[self.start : self.end]
+
+    def __repr__(self) -> str:
+        return self.strchars
+
+    def __hash__(self) -> int:
+        return hash(self.strchars)
+
+    def __eq__(self, chars: object) -> bool:
+        if isinstance(chars, XmlCharsView):
+            return self.strchars == chars.strchars
+        if not isinstance(chars, str):
+            if not hasattr(chars, "strchars"):
+                return False
+            chars = chars.strchars
+        return len(chars) == self.end - self.start and self.text.startswith(chars, self.start)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, index: int | slice) -> XmlChars:
+        if isinstance(index, int):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("XmlCharsView index out of range")
+            return XmlCharsView(self.source, self.start + index, self.start + index + 1)
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            return self.materialize()[index]
+        return XmlCharsView(self.source, self.start + start, self.start + max(start, stop))
+
+    def get_entity_id(self) -> int:
+        return self.source.get_range_entity_id(self.start, self.end)
+
+    def get_range_entity_id(self, start: int, end: int) -> int:
+        return self.source.get_range_entity_id(self.start + start, self.start + min(end, len(self)))
+
+    def is_quote(self) -> bool:
+        return self.end - self.start == 1 and self.text[self.start] in {"'", '"'}
+
+    def is_space(self, offset: int = 0) -> bool:
+        return self.text[self.start + offset] in {" ", "\n", "\t", "\r"}
+
+    def match(self, text: str, offset: int = 0) -> bool:
+        start = self.start + offset
+        return start + len(text) <= self.end and self.text.startswith(text, start)
+
+    def find(self, text: str, offset: int = 0) -> int:
+        find_pos = self.text.find(text, self.start + offset, self.end)
+        if find_pos < 0:
+            return find_pos
+        return find_pos - self.start
+
+    def add_entity_id(self, entity_id: int) -> None:
+        raise ValueError("XmlCharsView is read-only, use copy_with_new_entity_id.")
+
+    def copy_with_new_entity_id(self, new_entity_id: int) -> XmlChars:
+        return self.materialize().copy_with_new_entity_id(new_entity_id)
+
+    def remove(self, start: int, end: int) -> None:
+        raise ValueError("XmlCharsView is read-only, materialize it first.")
+
+    def insert(self, xmlchar: XmlChar | XmlCharRef | XmlChars, pointer: int | None = None) -> None:
+        raise ValueError("XmlCharsView is read-only, materialize it first.")
+
+    def append(self, *xmlchars: XmlChar | XmlCharRef | XmlChars) -> None:
+        raise ValueError("XmlCharsView is read-only, materialize it first.")
+
+    def strip_quotes(self) -> XmlChars:
+        start = self.start
+        end = self.end
+        if end > start and self.text[start] in {"'", '"'}:
+            start += 1
+        if end > start and self.text[end - 1] in {"'", '"'}:
+            end -= 1
+        return XmlCharsView(self.source, start, end)
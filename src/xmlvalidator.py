@@ -1,14 +1,34 @@
 from __future__ import annotations
 
+import codecs
+import mmap
+import re
+from pathlib import Path
 from typing import TYPE_CHECKING
+from typing import TextIO
 
 
 if TYPE_CHECKING:
-    pass
+    from os import PathLike
+
+    from dtd.dtdcache import DtdCache
+    from dtd.dtdentity import ExpansionLimits
+    from dtd.dtdentity import GeneralEntity
+    from errcl import ErrorToken
+    from xmlresolver import XmlResolver
 
 from dtd.dtdcore import Dtd
+from dtd.dtdelement import ContentKind
+from errcl import CritErr
 from errcl import ErrorCollector
+from errcl import ValidErr
+from nodetree import NodeKind
+from nodetree import NodeTable
+from textbuffer import CharPos
 from textbuffer import TextBuffer
+from xmlencoding import DECODE_ERRORS
+from xmlencoding import decode_xml
+from xmlencoding import detect_encoding
 from xmlstruct.attlist import AttList
 from xmlstruct.cdata import CData
 from xmlstruct.comment import Comment
@@ -22,60 +42,670 @@ from xmlstruct.notation import Notation
 from xmlstruct.tag import Tag
 from xmlstruct.text import Text
 from xmlstruct.xmldecl import XmlDecl
-from xmltokens import XmlChar
-from xmltokens import XmlCharRef
 from xmltokens import XmlChars
 from xmltokens import XmlProccesor
+from xmltokens import XmlSpans
+
+
+# Markup that may contain "<", a stream piece never ends inside it
+MARKUP_ENDS = (("<!--", "-->"), ("<![CDATA[", "]]>"), ("<?", "?>"))
+# Chars that change the state inside a tag, a ">" in a quoted value does not end it
+TAG_STOPS = re.compile(r"[<>\"']")
+# Reference that is not finished at the end of a text run
+OPEN_REF = re.compile(r"&[^ \t\r\n&;<]*\Z")
 
 
 class XmlValidator:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        expansion_limits: ExpansionLimits | None = None,
+        lazy_entities: bool = False,
+        compact_tree: bool = False,
+        node_table: bool = False,
+        dtd: Dtd | None = None,
+        resolver: XmlResolver | None = None,
+        dtd_cache: DtdCache | None = None,
+    ) -> None:
         self.err = ErrorCollector()
-        self.buffers: list[TextBuffer] = []
+        # Retained nodes drop parser-only state, see release_parser_state
+        self.compact_tree = compact_tree
+        # Stream pieces no error and no open node refers to are released and leave None in their slot
+        self.buffers: list[TextBuffer | None] = []
+        # Stream pieces without errors that are kept while an open node starts in them
+        self.releasable_slots: list[int] = []
         self.root_entity: XmlChars | None = None
+        self.root_file: Path | None = None
+        self.root_file_encoding: str | None = None
         self.ext_subset: XmlChars | None = None
-        self.dtd = Dtd(self.err)
-        self.children: list[Entity | Tag] = []
+        # A shared, already parsed DTD is copied, its expansion limits replace expansion_limits
+        self.dtd = Dtd(self.err, expansion_limits) if dtd is None else dtd.copy(self.err)
+        self.dtd.entity.is_lazy = lazy_entities
+        # External entities and subsets are only loaded with a resolver, each file once per document
+        self.resolver = resolver
+        self.external_slots: dict[Path, int] = {}
+        if resolver is not None:
+            self.dtd.entity.load_external = self.load_external_entity
+        # Compiled external DTDs, see load_dtd
+        self.dtd_cache = dtd_cache
+        self.children: list[CData | Comment | Element | Entity | Instructions | Tag | Text | XmlDecl] = []
+        # Open nodes from the root down, the last one is the active node
+        self.open_nodes: list[Tag | Doctype | IncludeIgnore] = []
+        # Element tree as flat arrays, see NodeTable. Tags then keep only their open child, like a stream,
+        # the table holds everything else.
+        self.node_table: NodeTable | None = NodeTable(self.dtd.symbols) if node_table else None
+        self.root_bufferslot = 0
+        # Streaming state, chunks after the last possible end of a piece wait for the next chunk
+        self.pending: list[str] = []
+        # Scanning resumes at scan_pos of pending, scan_window holds the chars from there on
+        self.scan_pos = 0
+        self.scan_window = ""
+        # End sequence of the comment, CDATA section or processing instruction the scan is in
+        self.markup_end = ""
+        # Quote of the attribute value the scan is in, "" between values of a tag, None outside tags
+        self.tag_quote: str | None = None
+        # The last piece was cut inside a text run, its parent and whether the run was reported already
+        self.is_text_cut = False
+        self.split_text_parent: Tag | Doctype | IncludeIgnore | XmlValidator | None = None
+        self.is_split_text_reported = False
+        self.text_row = -1
+        self.stream_pos = CharPos(0, 1, 1)
 
     def get_active_node(self) -> Tag | Doctype | IncludeIgnore | XmlValidator:
-        if len(self.children) == 0:
+        if len(self.open_nodes) == 0:
             return self
-        if isinstance(self.children[-1], (Tag, Doctype, IncludeIgnore)) and not self.children[-1].closed:
-            return self.children[-1].get_active_node()
-        return self
+        return self.open_nodes[-1]
 
     def build(self) -> None:
+        if self.root_entity is None and self.root_file is not None:
+            self.stream_file(self.root_file, self.root_file_encoding)
+            return
         if self.root_entity is None:
             raise ValueError("Root entity not found.")
-        main = XmlProccesor(self.root_entity)
+        self.parse(XmlProccesor(self.root_entity), self.root_bufferslot)
+        if self.compact_tree:
+            self.release_parser_state()
+
+    def parse(self, main: XmlProccesor, bufferslot: int = 0) -> None:
         while not main.is_end():
             parent = self.get_active_node()
+            start = main.pointer
+            if main.match("<!--"):
+                node = Comment(main, self.read_startseq(main, "<!--"), parent, self.err)
+                self.validate_markup(parent, node)
+                self.add_leaf_node(node, NodeKind.COMMENT, parent, bufferslot, start, main.pointer)
+                continue
+            if main.match("<![CDATA["):
+                node = CData(main, self.read_startseq(main, "<![CDATA["), parent, self.err)
+                self.validate_text(parent, node)
+                self.add_leaf_node(node, NodeKind.CDATA, parent, bufferslot, start, main.pointer)
+                continue
+            if main.match_followed_by_space("<?xml"):
+                node = XmlDecl(main, self.read_startseq(main, "<?xml"), parent, self.err)
+                parent.children.append(node)
+                if self.compact_tree:
+                    node.release_parser_state()
+                continue
+            if main.match("<?"):
+                node = Instructions(main, self.read_startseq(main, "<?"), parent, self.err)
+                self.validate_markup(parent, node)
+                self.add_leaf_node(node, NodeKind.INSTRUCTIONS, parent, bufferslot, start, main.pointer)
+                continue
+            if main.match_followed_by_space("<!ELEMENT"):
+                node = Element(main, self.read_startseq(main, "<!ELEMENT"), parent, self.dtd, self.err)
+                self.children.append(node)
+                if self.compact_tree:
+                    node.release_parser_state()
+                continue
             if main.match_followed_by_space("<!ENTITY"):
                 node = Entity(main, parent, self.dtd, self.err)
                 self.children.append(node)
+                if self.node_table is not None:
+                    self.node_table.add_node(
+                        NodeKind.ENTITY, self.get_table_index(parent), -1, bufferslot, start, main.pointer
+                    )
+                if self.compact_tree:
+                    node.release_parser_state()
                 continue
             if main.match("</"):
-                node = EndTag(main, parent, self.err)
+                node = EndTag(main, parent, self.dtd, self.err, self.open_nodes)
+                # tags left open inside the closed one end here too, each is checked against its model
+                for tag in node.implicitly_closed:
+                    self.validate_end(tag, tag.name)
+                    if self.node_table is not None:
+                        self.node_table.set_end(tag.table_index, bufferslot, main.pointer)
+                if node.closed_tag is not None:
+                    self.validate_end(node.closed_tag, node.name)
+                if self.node_table is not None and node.closed_tag is not None:
+                    self.node_table.set_end(node.closed_tag.table_index, bufferslot, main.pointer)
+                    self.drop_closed_tag(node.closed_tag)
                 continue
             if main.match("<"):
                 node = Tag(main, parent, self.dtd, self.err)
-                parent.children.append(node)
+                self.validate_child(parent, node)
+                if self.node_table is None or not (node.closed and isinstance(parent, Tag)):
+                    parent.children.append(node)
+                if not node.closed:
+                    self.open_nodes.append(node)
+                if self.node_table is not None:
+                    node.table_index = self.node_table.add_node(
+                        NodeKind.ELEMENT,
+                        self.get_table_index(parent),
+                        node.name_id,
+                        bufferslot,
+                        start,
+                        main.pointer,
+                    )
+                if self.compact_tree:
+                    node.release_parser_state()
                 continue
+            node = Text(main, parent, self.dtd, self.err)
+            # a run cut at the end of the last stream piece goes on here, it is reported and tabled once
+            is_continued = start == 0 and self.split_text_parent is parent
+            if not (is_continued and self.is_split_text_reported):
+                self.is_split_text_reported = self.validate_text(parent, node)
+            if is_continued and self.node_table is not None:
+                self.node_table.set_end(self.text_row, bufferslot, main.pointer)
+                self.add_leaf_node(node, NodeKind.TEXT, parent, bufferslot, start, main.pointer, is_tabled=False)
+            else:
+                self.text_row = self.add_leaf_node(node, NodeKind.TEXT, parent, bufferslot, start, main.pointer)
+
+    def validate_child(self, parent: Tag | Doctype | IncludeIgnore | XmlValidator, node: Tag) -> None:
+        """Moves the content model of the parent past one more child.
+
+        Only open tags hold a model state, but closed tags stay in the tree. Memory is bounded by the depth
+        only when closed nodes are dropped, as in a stream or with node_table.
+        """
+        if len(self.dtd.element.models) == 0 or node.name_id < 0:
+            return
+        node.content_model = self.dtd.element.get_model(node.name_id)
+        if node.content_model is None:
+            self.err.add(node.name, ValidErr.UNDEFINED_ELEMENT)
+        elif not node.content_model.is_deterministic:
+            # reported where it is declared, its automaton cannot tell which position a child takes
+            node.content_model = None
+        if isinstance(parent, Tag) and parent.content_model is not None:
+            next_state = parent.content_model.get_next_state(parent.model_state, node.name_id)
+            if next_state < 0:
+                if parent.content_model.kind == ContentKind.MIXED:
+                    self.err.add(node.name, ValidErr.MIXED_UNDEFINED_TAG)
+                else:
+                    self.err.add(node.name, ValidErr.ELEMENT_NOT_ALLOWED)
+                # one error per element, the rest of its children is not checked
+                parent.content_model = None
+            else:
+                parent.model_state = next_state
+        if node.closed:
+            self.validate_end(node, node.name)
+
+    def validate_end(self, tag: Tag, error_token: XmlChars) -> None:
+        if tag.content_model is not None and not tag.content_model.is_accepting(tag.model_state):
+            self.err.add(error_token, ValidErr.INCOMPLETE_DEFINITION)
+        tag.content_model = None
+
+    def validate_markup(
+        self, parent: Tag | Doctype | IncludeIgnore | XmlValidator, node: Comment | Instructions
+    ) -> None:
+        """Reports comments and processing instructions in EMPTY content, other content models allow them."""
+        if isinstance(parent, Tag) and parent.content_model is not None:
+            if parent.content_model.kind == ContentKind.EMPTY:
+                self.err.add(node.startseq, ValidErr.EMPTY_ELEMENT_CONTENT)
+
+    def validate_text(self, parent: Tag | Doctype | IncludeIgnore | XmlValidator, node: CData | Text) -> bool:
+        """Reports text the content model of the parent does not allow, True when it was reported."""
+        if not isinstance(parent, Tag) or parent.content_model is None or parent.content_model.allows_text():
+            return False
+        chars = node.raw if isinstance(node, Text) and node.raw is not None else node.content
+        if chars is None or len(chars) == 0:
+            return False
+        # element content allows spaces between children, EMPTY allows nothing
+        offset = 0
+        if isinstance(node, Text) and parent.content_model.kind == ContentKind.CHILDREN:
+            offset = len(chars) - len(chars.strchars.lstrip(" \t\r\n"))
+            if offset == len(chars):
+                return False
+        self.err.add(chars, ValidErr.NO_PARSED_TEXT_IN_CONTENT, offset)
+        return True
+
+    def read_startseq(self, main: XmlProccesor, startseq: str) -> XmlChars:
+        chars = main.read(0, len(startseq))
+        main.move(len(startseq))
+        return chars
+
+    def add_leaf_node(
+        self,
+        node: CData | Comment | Instructions | Text,
+        kind: NodeKind,
+        parent: Tag | Doctype | IncludeIgnore | XmlValidator,
+        bufferslot: int,
+        start: int,
+        end: int,
+        is_tabled: bool = True,
+    ) -> int:
+        """Row of the node in the node table, -1 when it is not tabled."""
+        if self.node_table is None or not isinstance(parent, Tag):
+            parent.children.append(node)
+        row = -1
+        if self.node_table is not None and is_tabled:
+            row = self.node_table.add_node(kind, self.get_table_index(parent), -1, bufferslot, start, end)
+        if self.compact_tree:
+            node.release_parser_state()
+        return row
+
+    def drop_closed_tag(self, tag: Tag) -> None:
+        # the table holds the closed tag, its parent only kept it while it was open
+        if isinstance(tag.parent, Tag) and tag.parent.children and tag.parent.children[-1] is tag:
+            tag.parent.children.pop()
+
+    def get_table_index(self, node: Tag | Doctype | IncludeIgnore | XmlValidator) -> int:
+        while isinstance(node, (Doctype, IncludeIgnore)):
+            node = node.parent
+        if isinstance(node, Tag):
+            return node.table_index
+        return 0
+
+    def feed(self, chunk: str) -> None:
+        """Parses the part of the stream that is complete, the rest waits in pending for the next chunk.
+
+        Only the new chunk is scanned, the chunks are joined once when a piece is cut.
+        """
+        if not chunk:
+            return
+        self.pending.append(chunk)
+        boundary = self.get_piece_end(chunk)
+        if boundary <= 0:
+            return
+        chars = "".join(self.pending)
+        self.pending = [chars[boundary:]] if boundary < len(chars) else []
+        self.scan_pos -= boundary
+        self.parse_piece(chars[:boundary])
+        self.split_text_parent = self.get_active_node() if self.is_text_cut else None
+
+    def get_piece_end(self, chunk: str) -> int:
+        """Last position of pending where a piece can end, 0 when there is none.
+
+        A piece ends before a "<" outside comments, CDATA sections and processing instructions,
+        or inside the text run at the end of the chunk. Scanning resumes where the previous chunk stopped,
+        only the few chars that could start or end markup with the new chunk are read again.
+        """
+        window = self.scan_window + chunk
+        offset = self.scan_pos
+        boundary = 0
+        pos = 0
+        text_start = 0
+        while pos < len(window):
+            if self.markup_end:
+                markup_end = window.find(self.markup_end, pos)
+                if markup_end < 0:
+                    pos = max(pos, len(window) - len(self.markup_end) + 1)
+                    break
+                pos = text_start = markup_end + len(self.markup_end)
+                self.markup_end = ""
+                continue
+            if self.tag_quote is not None:
+                stop = TAG_STOPS.search(window, pos)
+                if stop is None:
+                    pos = len(window)
+                    break
+                char = stop.group()
+                if char == "<":
+                    # a "<" starts new markup even inside a quoted value, as it does for the parser
+                    self.tag_quote = None
+                    pos = text_start = stop.start()
+                    continue
+                if self.tag_quote == "" and char == ">":
+                    self.tag_quote = None
+                    text_start = stop.end()
+                elif self.tag_quote == "" and char != ">":
+                    self.tag_quote = char
+                elif self.tag_quote == char:
+                    self.tag_quote = ""
+                pos = stop.end()
+                continue
+            markup_start = window.find("<", pos)
+            if markup_start < 0:
+                pos = len(window)
+                break
+            startseq = window[markup_start : markup_start + len(MARKUP_ENDS[1][0])]
+            if any(len(startseq) < len(seq) and seq.startswith(startseq) for seq, _ in MARKUP_ENDS):
+                # the next chunk decides which markup it is
+                pos = markup_start
+                break
+            boundary = offset + markup_start
+            for startseq, endseq in MARKUP_ENDS:
+                if window.startswith(startseq, markup_start):
+                    self.markup_end = endseq
+                    pos = markup_start + len(startseq)
+                    break
+            else:
+                self.tag_quote = ""
+                pos = markup_start + 1
+        self.is_text_cut = False
+        if not self.markup_end and self.tag_quote is None:
+            cut = self.get_text_cut(window, text_start, pos)
+            if cut > text_start:
+                self.is_text_cut = not window.startswith("<", cut)
+            boundary = max(boundary, offset + cut)
+            pos = cut
+        self.scan_window = window[pos:]
+        self.scan_pos = offset + pos
+        return boundary
+
+    def get_text_cut(self, window: str, start: int, end: int) -> int:
+        """End of the text run that can be parsed now, a reference, line break or "]]>" may go on in the next chunk."""
+        cut = end
+        ref = OPEN_REF.search(window, start, end)
+        if ref is not None:
+            cut = ref.start()
+        while cut > start and window[cut - 1] in "]\r":
+            cut -= 1
+        return cut
+
+    def close(self) -> None:
+        if self.pending:
+            self.parse_piece("".join(self.pending))
+        self.pending = []
+        self.scan_pos = 0
+        self.scan_window = ""
+        self.markup_end = ""
+        self.tag_quote = None
+        self.is_text_cut = False
+        self.split_text_parent = None
+        if self.compact_tree:
+            self.release_parser_state()
+
+    def validate_stream(self, fp: TextIO, chunk_size: int = 1 << 16) -> None:
+        while chunk := fp.read(chunk_size):
+            self.feed(chunk)
+        self.close()
+
+    def stream_file(self, path: Path, encoding: str | None = None, chunk_size: int = 1 << 20) -> None:
+        with path.open("rb") as file:
+            if path.stat().st_size == 0:
+                self.close()
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                pos = 0
+                if encoding is None:
+                    encoding, pos = detect_encoding(mapped[:1024])
+                decoder = codecs.getincrementaldecoder(encoding)(DECODE_ERRORS)
+                while pos < len(mapped):
+                    self.feed(decoder.decode(mapped[pos : pos + chunk_size]))
+                    pos += chunk_size
+                self.feed(decoder.decode(b"", final=True))
+        self.close()
+
+    def parse_piece(self, chars: str) -> None:
+        buffer = TextBuffer(chars, len(self.buffers), self.stream_pos)
+        self.buffers.append(buffer)
+        self.dtd.entity.add_document_chars(len(buffer.valid_chars))
+        self.stream_pos = buffer.get_end_pos()
+        errors_count = len(self.err.tokens)
+        self.report_undecodable(buffer)
+        self.parse(XmlProccesor(XmlSpans.from_buffer(buffer, 1)), buffer.bufferslot)
+        self.prune_closed_nodes()
+        self.release_buffers(buffer.bufferslot, errors_count)
+
+    def release_buffers(self, bufferslot: int, errors_count: int) -> None:
+        """Releases stream pieces once no error and no open node refers to them, O(depth) per piece."""
+        error_slots = {self.get_error_slot(error) for error in self.err.tokens[errors_count:]}
+        self.releasable_slots = [slot for slot in self.releasable_slots if slot not in error_slots]
+        if bufferslot not in error_slots:
+            self.releasable_slots.append(bufferslot)
+        # tags report errors at their start sequence when they are closed later
+        open_slots = {
+            node.startseq.xmlchars[0].get_buffer_slot()
+            for node in self.open_nodes
+            if node.startseq is not None and len(node.startseq) > 0
+        }
+        for slot in self.releasable_slots:
+            if slot not in open_slots:
+                self.buffers[slot] = None
+        self.releasable_slots = [slot for slot in self.releasable_slots if slot in open_slots]
+
+    def prune_closed_nodes(self) -> None:
+        # only the open nodes are kept, closed root tags stay for the single root check
+        for child in self.children:
+            if isinstance(child, Tag) and child.closed:
+                child.children = []
+        for depth, node in enumerate(self.open_nodes):
+            node.children = self.open_nodes[depth + 1 : depth + 2]
+
+    def release_parser_state(self) -> None:
+        # tags closed after they were created still hold their start and end sequences
+        nodes: list[CData | Comment | Element | Entity | Instructions | Tag | Text | XmlDecl] = list(self.children)
+        while nodes:
+            node = nodes.pop()
+            node.release_parser_state()
+            if isinstance(node, Tag):
+                nodes.extend(
+                    child
+                    for child in node.children
+                    if isinstance(child, (CData, Comment, Instructions, Tag, Text, XmlDecl))
+                )
 
     def set_root_entity(self, buffer: TextBuffer) -> None:
-        xmlchars_arr: list[XmlChar] = []
-        for char_pos, char in enumerate(buffer.valid_chars):
-            xmlchars_arr.append(XmlChar(char, buffer.bufferslot, char_pos, 1))
-        self.root_entity = XmlChars(*xmlchars_arr)
+        self.root_entity = XmlSpans.from_buffer(buffer, 1)
+        self.root_bufferslot = buffer.bufferslot
 
     def set_extsubset(self, buffer: TextBuffer) -> None:
-        xmlchars_arr: list[XmlChar] = []
-        for char_pos, char in enumerate(buffer.valid_chars):
-            xmlchars_arr.append(XmlChar(char, buffer.bufferslot, char_pos, 2))
-        self.ext_subset = XmlChars(*xmlchars_arr)
+        self.ext_subset = XmlSpans.from_buffer(buffer, 2)
+
+    def load_external(
+        self, public_id: str | None, system_id: str | None, base: Path | None = None
+    ) -> TextBuffer | None:
+        """Buffer of an external resource, relative system ids resolve against base or the document directory."""
+        if self.resolver is None:
+            return None
+        if base is None and self.root_file is not None:
+            base = self.root_file.parent
+        external = self.resolver.load(public_id, system_id, base)
+        if external is None:
+            return None
+        bufferslot = self.external_slots.get(external.path)
+        if bufferslot is not None:
+            return self.buffers[bufferslot]
+        buffer = TextBuffer(external.chars, len(self.buffers), is_clean=external.is_clean)
+        self.buffers.append(buffer)
+        self.external_slots[external.path] = buffer.bufferslot
+        self.dtd.entity.add_document_chars(len(buffer.valid_chars))
+        self.report_undecodable(buffer)
+        return buffer
+
+    def report_undecodable(self, buffer: TextBuffer) -> None:
+        """Reports the bytes decode_xml could not decode, TextBuffer keeps them as U+FFFD."""
+        if len(buffer.undecodable_chars) == 0:
+            return
+        chars = XmlSpans.from_buffer(buffer, -1)
+        for char_info in buffer.undecodable_chars:
+            self.err.add(chars, CritErr.CHAR_UNDECODABLE, buffer.get_valid_pos(char_info.position))
+
+    def load_external_entity(self, gent: GeneralEntity) -> XmlChars | None:
+        buffer = self.load_external(gent.public_id, gent.system_id, gent.base)
+        if buffer is None:
+            return None
+        xmlchars = XmlSpans.from_buffer(buffer, gent.entity_id)
+        # the text declaration of an external parsed entity is not part of its replacement text
+        if xmlchars.match("<?xml") and xmlchars.is_space(len("<?xml")):
+            textdecl_end = xmlchars.find("?>")
+            if textdecl_end >= 0:
+                return xmlchars[textdecl_end + 2 :]
+        return xmlchars
+
+    def load_extsubset(self, public_id: str | None, system_id: str | None) -> bool:
+        buffer = self.load_external(public_id, system_id)
+        if buffer is None:
+            return False
+        self.set_extsubset(buffer)
+        return True
 
-    def add_buffer(self, buffer: str) -> None:
+    def load_dtd(self, public_id: str | None, system_id: str | None) -> bool:
+        """Declarations of an external DTD, called before the document is parsed.
+
+        With a dtd_cache the DTD is compiled once per text and modules, a DTD with errors is never stored.
+        """
+        buffer = self.load_external(public_id, system_id)
+        if buffer is None:
+            return False
+        if self.dtd_cache is not None:
+            cached = self.dtd_cache.load(buffer.valid_chars)
+            if cached is not None:
+                self.use_dtd(cached)
+                return True
+        error_count = len(self.err.tokens)
+        modules = self.compile_dtd(buffer)
+        if self.dtd_cache is not None and len(self.err.tokens) == error_count:
+            self.dtd_cache.store(buffer.valid_chars, self.dtd, modules)
+        return True
+
+    def compile_dtd(self, buffer: TextBuffer) -> list[Path]:
+        """Parses declarations into self.dtd and returns the files the resolver loaded for them."""
+        first_module = len(self.external_slots)
+        # declarations of an external DTD are not part of the document tree
+        self.parse_dtd(XmlProccesor(XmlSpans.from_buffer(buffer, 2)), self.get_buffer_base(buffer), [])
+        return list(self.external_slots)[first_module:]
+
+    def parse_dtd(self, main: XmlProccesor, base: Path | None, calling_stack: list[int]) -> None:
+        """Declarations of an external DTD, parameter entity references between them are expanded in place.
+
+        Only ELEMENT and ENTITY declarations are compiled, other declarations and text are reported and skipped.
+        calling_stack holds the ids of the external parameter entities being parsed, a module that includes
+        itself again is reported once and parsing always ends.
+        """
+        while not main.is_end():
+            if len(main.get_spaces()) > 0:
+                continue
+            if main.pointer == 0 and main.match_followed_by_space("<?xml"):
+                # the text declaration of an external DTD or module
+                textdecl_end = main.find("?>")
+                main.move(main.get_length() if textdecl_end < 0 else textdecl_end + 2)
+                continue
+            if main.match("<!--"):
+                Comment(main, self.read_startseq(main, "<!--"), self, self.err)
+                continue
+            if main.match("<?"):
+                Instructions(main, self.read_startseq(main, "<?"), self, self.err)
+                continue
+            if main.match_followed_by_space("<!ELEMENT"):
+                Element(main, self.read_startseq(main, "<!ELEMENT"), self, self.dtd, self.err)
+                continue
+            if main.match_followed_by_space("<!ENTITY"):
+                Entity(main, self, self.dtd, self.err, base)
+                continue
+            pent_ref = main.get_pent_ref()
+            if pent_ref is not None:
+                main.move(len(pent_ref))
+                self.parse_pent(pent_ref, base, calling_stack)
+                continue
+            self.skip_dtd_markup(main)
+
+    def parse_pent(self, pent_ref: XmlChars, base: Path | None, calling_stack: list[int]) -> None:
+        """Parses the declarations of a parameter entity, external ones are loaded through the resolver."""
+        pent = self.dtd.entity.get_pent_repl(pent_ref)
+        if pent is None:
+            self.err.add(pent_ref, CritErr.ENTITY_UNDEFINED)
+            return
+        if pent.system_id is None:
+            replacement_text = self.dtd.entity.deref_pent(pent_ref)
+            if replacement_text is not None:
+                self.parse_dtd(XmlProccesor(replacement_text), base, calling_stack)
+            return
+        if pent.entity_id in calling_stack:
+            self.err.add(pent_ref, CritErr.ENTITY_RECURSION)
+            return
+        buffer = self.load_external(pent.public_id, pent.system_id, pent.base)
+        if buffer is None:
+            self.err.add(pent_ref, CritErr.ENTITY_LOAD_FAILED)
+            return
+        module = XmlProccesor(XmlSpans.from_buffer(buffer, pent.entity_id))
+        self.parse_dtd(module, self.get_buffer_base(buffer), [*calling_stack, pent.entity_id])
+
+    def skip_dtd_markup(self, main: XmlProccesor) -> None:
+        if main.match("<"):
+            # conditional sections, ATTLIST and NOTATION declarations are not compiled, tags are not allowed
+            error = CritErr.DTD_DECL_UNSUPPORTED if main.match("<!") else CritErr.DTD_TEXT_INVALID
+            if main.match("<!["):
+                length = self.get_section_length(main)
+            else:
+                end = main.find(">")
+                length = main.get_length() - main.pointer if end < 0 else end + 1
+            self.err.add(main.read(0, length), error)
+            main.move(length)
+            return
+        text = main.scan_until("<%")
+        if len(text) == 0:
+            # a "%" that starts no reference
+            text = main.read()
+            main.move()
+        self.err.add(text, CritErr.DTD_TEXT_INVALID)
+
+    def get_section_length(self, main: XmlProccesor) -> int:
+        """Length of the conditional section at the pointer, with the sections nested in it."""
+        start = main.pointer
+        depth = 0
+        while not main.is_end():
+            if main.match("<!["):
+                depth += 1
+                main.move(len("<!["))
+            elif main.match("]]>"):
+                depth -= 1
+                main.move(len("]]>"))
+                if depth == 0:
+                    break
+            elif len(main.scan_until("<]")) == 0:
+                main.move()
+        length = main.pointer - start
+        main.move(-length)
+        return length
+
+    def get_buffer_base(self, buffer: TextBuffer) -> Path | None:
+        """Directory of the file the resolver loaded into buffer, relative system ids in it resolve against it."""
+        for path, bufferslot in self.external_slots.items():
+            if bufferslot == buffer.bufferslot:
+                return path.parent
+        return None
+
+    def use_dtd(self, dtd: Dtd) -> None:
+        # the document keeps its own expansion limits and entity settings
+        limits, is_lazy = self.dtd.entity.limits, self.dtd.entity.is_lazy
+        document_chars = self.dtd.entity.document_chars
+        self.dtd = dtd.copy(self.err)
+        self.dtd.entity.limits, self.dtd.entity.is_lazy = limits, is_lazy
+        self.dtd.entity.add_document_chars(document_chars)
+        if self.resolver is not None:
+            self.dtd.entity.load_external = self.load_external_entity
+        if self.node_table is not None:
+            self.node_table.symbols = self.dtd.symbols
+
+    def add_file(self, path: str | PathLike[str], encoding: str | None = None) -> None:
+        # the file is mapped and decoded piece by piece when build() runs, encoding is detected when not given
+        self.root_file = Path(path)
+        self.root_file_encoding = encoding
+
+    def add_buffer(self, buffer: str | bytes) -> None:
         buffer_index = len(self.buffers)
-        root_entity_buffer = TextBuffer(buffer, buffer_index)
+        if isinstance(buffer, bytes):
+            chars, is_clean = decode_xml(buffer)
+            root_entity_buffer = TextBuffer(chars, buffer_index, is_clean=is_clean)
+        else:
+            root_entity_buffer = TextBuffer(buffer, buffer_index)
         self.buffers.append(root_entity_buffer)
+        self.dtd.entity.add_document_chars(len(root_entity_buffer.valid_chars))
+        self.report_undecodable(root_entity_buffer)
         self.set_root_entity(root_entity_buffer)
+
+    def get_error_slot(self, error: ErrorToken) -> int:
+        if not 0 <= error.intoken_pointer < len(error.xmlchars):
+            return -1
+        return error.xmlchars[error.intoken_pointer].xmlchars[0].get_buffer_slot()
+
+    def get_error_pos(self, error: ErrorToken) -> CharPos | None:
+        if not 0 <= error.intoken_pointer < len(error.xmlchars):
+            return None
+        xmlchar = error.xmlchars[error.intoken_pointer].xmlchars[0]
+        buffer_slot = xmlchar.get_buffer_slot()
+        if not 0 <= buffer_slot < len(self.buffers):
+            return None
+        buffer = self.buffers[buffer_slot]
+        if buffer is None:
+            return None
+        return buffer.get_char_pos(xmlchar.get_buffer_pos())
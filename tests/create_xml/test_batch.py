@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from dtd import Dtd
+from errcl import CritErr
+from errcl import ErrorCollector
+from xmlbatch import BatchValidator
+from xmlbatch import ErrorSummary
+from xmlbatch import validate_many
+
+
+def get_dtd() -> Dtd:
+    dtd = Dtd(ErrorCollector())
+    dtd.entity.register_gent("brand", "ACME &#169;", False)
+    return dtd
+
+
+def test__validate_many_keeps_order(tmp_path: Path) -> None:
+    svg = tmp_path / "a.svg"
+    svg.write_text('<svg><path d="1" d="2"/></svg>')
+    documents = ["<svg>&brand;<g></svg>", b"<svg/>", svg, tmp_path / "missing.svg"] * 5
+    with BatchValidator(workers=2, dtd=get_dtd()) as batch:
+        summaries = batch.validate_many(documents)
+        pool = batch.pool
+        assert batch.validate_many(documents) == summaries
+        assert batch.pool is pool
+    assert [summary.doc_index for summary in summaries] == list(range(len(documents)))
+    assert summaries[0].errors == [ErrorSummary(CritErr.TAG_NOT_CLOSED, 12, 1, 13)]
+    assert summaries[1].is_valid
+    assert summaries[2].source == str(svg)
+    assert [error.err for error in summaries[2].errors] == [CritErr.ATTR_DUPLICATE]
+    assert summaries[3].failure is not None
+    assert summaries == BatchValidator(workers=1, dtd=get_dtd()).validate_many(documents)
+
+
+def test__validate_many_closes_its_pool() -> None:
+    dtd = get_dtd()
+    assert validate_many(["<a>&brand;</a>"], workers=2, dtd=dtd)[0].is_valid
+    with BatchValidator(workers=2) as batch:
+        assert batch.validate_many(["<a/>"])[0].is_valid
+        assert batch.pool is not None
+    assert batch.pool is None
@@ -0,0 +1,36 @@
+from xmlstruct.tag import Tag
+from xmlvalidator import XmlValidator
+
+
+SVG = '<svg a="1">\n  <g>\n<path d="M0"/>\n  </g junk>\n<g><g></g><g>\n</svg>'
+
+
+def get_errors(xmlvalidator: XmlValidator) -> list:
+    return [(error.err, xmlvalidator.get_error_pos(error)) for error in xmlvalidator.err.tokens]
+
+
+def test__compact_tree_keeps_errors() -> None:
+    regular = XmlValidator()
+    regular.add_buffer(SVG)
+    regular.build()
+    compact = XmlValidator(compact_tree=True)
+    compact.add_buffer(SVG)
+    compact.build()
+    assert get_errors(compact) == get_errors(regular)
+    assert len(get_errors(compact)) == 3
+
+
+def test__compact_tree_drops_parser_state() -> None:
+    xmlvalidator = XmlValidator(compact_tree=True)
+    xmlvalidator.add_buffer(SVG)
+    xmlvalidator.build()
+    svg = xmlvalidator.children[0]
+    g = next(child for child in svg.children if isinstance(child, Tag))
+    path = next(child for child in g.children if isinstance(child, Tag))
+    assert not hasattr(svg, "__dict__")
+    assert path.name == "path"
+    assert path.attributes["d"] == "M0"
+    for node in (svg, path):
+        assert node.proc is None
+        assert node.tokens is None
+        assert node.startseq is None
@@ -0,0 +1,67 @@
+import io
+
+from errcl import ValidErr
+from xmlvalidator import XmlValidator
+
+
+DTD = """<!ELEMENT svg (title?, g*)>
+<!ELEMENT title (#PCDATA)>
+<!ELEMENT g (path+)>
+<!ELEMENT path EMPTY>
+"""
+
+
+def get_errors(xmlvalidator: XmlValidator) -> list:
+    return [(error.err, error.xmlchars.strchars) for error in xmlvalidator.err.tokens]
+
+
+def build(xml: str) -> XmlValidator:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer(DTD + xml)
+    xmlvalidator.build()
+    return xmlvalidator
+
+
+def test__valid_content() -> None:
+    assert get_errors(build("<svg>\n  <title>Hi</title>\n  <g><path/><path></path></g>\n</svg>")) == []
+
+
+def test__content_errors() -> None:
+    xml = "<svg><title>Hi <path/></title><g>text<path> </path></g><g></g><g><title/></g><path/><rect/></svg>"
+    assert get_errors(build(xml)) == [
+        (ValidErr.MIXED_UNDEFINED_TAG, "path"),
+        (ValidErr.NO_PARSED_TEXT_IN_CONTENT, "text"),
+        (ValidErr.NO_PARSED_TEXT_IN_CONTENT, " "),
+        (ValidErr.INCOMPLETE_DEFINITION, "g"),
+        (ValidErr.ELEMENT_NOT_ALLOWED, "title"),
+        (ValidErr.ELEMENT_NOT_ALLOWED, "path"),
+        (ValidErr.UNDEFINED_ELEMENT, "rect"),
+    ]
+
+
+def test__streamed_content_keeps_only_open_states() -> None:
+    xml = DTD + "<svg>" + "<g><path/></g>" * 1000 + "<g></g></svg>"
+    streamed = XmlValidator()
+    streamed.feed(xml[: len(xml) - len("<g></g></svg>")])
+    root = streamed.children[-1]
+    assert root.content_model is not None
+    assert len(root.children) <= 1
+    streamed.feed("<g></g></svg>")
+    streamed.close()
+    assert get_errors(streamed) == [(ValidErr.INCOMPLETE_DEFINITION, "g")]
+    assert root.content_model is None
+
+
+def test__empty_allows_no_markup() -> None:
+    xml = "<svg><g><path><!-- note --><?pi data?><![CDATA[x]]> </path><!-- ok --><?ok?></g></svg>"
+    assert get_errors(build(xml)) == [
+        (ValidErr.EMPTY_ELEMENT_CONTENT, "<!--"),
+        (ValidErr.EMPTY_ELEMENT_CONTENT, "<?"),
+        (ValidErr.NO_PARSED_TEXT_IN_CONTENT, "x"),
+        (ValidErr.NO_PARSED_TEXT_IN_CONTENT, " "),
+    ]
+
+
+def test__implicitly_closed_tags_are_checked() -> None:
+    errors = get_errors(build("<svg><g><path/></g><g></svg>"))
+    assert (ValidErr.INCOMPLETE_DEFINITION, "g") in errors
@@ -6,3 +6,11 @@ def test__simple_xml() -> None:
     xmlvalidator.add_buffer("""<tag a="1" b="2" c="3"></tag >""")
     xmlvalidator.build()
     print()
+
+def test__error_position():
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer("<a></a\r\n junk>")
+    xmlvalidator.build()
+    assert len(xmlvalidator.err.tokens) == 1
+    error_pos = xmlvalidator.get_error_pos(xmlvalidator.err.tokens[0])
+    assert error_pos == (9, 2, 2)
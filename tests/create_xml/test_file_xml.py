@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from xmlvalidator import XmlValidator
+
+
+def test__add_file(tmp_path: Path) -> None:
+    svg_path = tmp_path / "image.svg"
+    svg_path.write_bytes("<svg>\r\n<text>č</text>\r\n</svg junk>".encode())
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_file(svg_path)
+    xmlvalidator.build()
+    assert xmlvalidator.children[0].name == "svg"
+    assert xmlvalidator.children[0].closed
+    assert len(xmlvalidator.err.tokens) == 1
+    assert xmlvalidator.get_error_pos(xmlvalidator.err.tokens[0]) == (29, 3, 7)
+
+
+def test__add_file_split_multibyte_chars(tmp_path: Path) -> None:
+    svg_path = tmp_path / "image.svg"
+    svg_path.write_bytes(("<svg>" + "<g>žćč</g>" * 10 + "</svg>").encode())
+    xmlvalidator = XmlValidator()
+    xmlvalidator.stream_file(svg_path, "utf-8", chunk_size=3)
+    assert xmlvalidator.err.tokens == []
+    assert xmlvalidator.children[0].closed
+
+
+def test__add_empty_file(tmp_path: Path) -> None:
+    svg_path = tmp_path / "empty.svg"
+    svg_path.write_bytes(b"")
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_file(svg_path)
+    xmlvalidator.build()
+    assert xmlvalidator.children == []
+
+
+def test__add_file_detects_encoding(tmp_path: Path) -> None:
+    svg_path = tmp_path / "image.svg"
+    svg_path.write_bytes(b"\xff\xfe" + "<svg><g>ž</g></svg>".encode("utf-16-le"))
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_file(svg_path)
+    xmlvalidator.build()
+    assert xmlvalidator.err.tokens == []
+    assert xmlvalidator.children[0].name == "svg"
+    assert xmlvalidator.children[0].closed
@@ -0,0 +1,55 @@
+from xmltokens import XmlLazyChars
+from xmltokens import XmlSpans
+from xmlvalidator import XmlValidator
+
+
+DOC = '<doc a="&big;-&big;" b="x&#65;&lt;&undeclared;" c="plain"></doc>'
+
+
+def build(lazy_entities: bool) -> XmlValidator:
+    xmlvalidator = XmlValidator(lazy_entities=lazy_entities)
+    xmlvalidator.dtd.entity.register_gent("big", "one\ttwo " * 50, False)
+    xmlvalidator.add_buffer(DOC)
+    xmlvalidator.build()
+    return xmlvalidator
+
+
+def test__lazy_attributes_match_eager() -> None:
+    eager = build(False)
+    lazy = build(True)
+    eager_values = [value.strchars for value in eager.children[0].attributes.values()]
+    lazy_values = list(lazy.children[0].attributes.values())
+    assert all(isinstance(value, XmlLazyChars) and not value.is_expanded for value in lazy_values)
+    assert [value.strchars for value in lazy_values] == eager_values
+    assert eager_values[1] == "xA<&undeclared;"
+    assert len(lazy.err.tokens) == len(eager.err.tokens)
+
+
+def test__lazy_checks_each_entity_once() -> None:
+    lazy = build(True)
+    assert set(lazy.dtd.entity.gent_checks) == {"big", "lt", "undeclared"}
+    assert lazy.dtd.entity.gent_checks["undeclared"][1] is False
+
+
+def test__attribute_value_is_built_from_runs() -> None:
+    value = list(build(False).children[0].attributes.values())[0]
+    assert isinstance(value, XmlSpans)
+    assert value.strchars == "one two " * 50 + "-" + "one two " * 50
+    # the tab is replaced by a space that points back to it
+    assert value[3].xmlchars[0].strchars == " "
+
+
+def test__lazy_values_hold_only_raw_text() -> None:
+    xmlvalidator = XmlValidator(lazy_entities=True, compact_tree=True)
+    xmlvalidator.dtd.entity.register_gent("big", "one\ttwo " * 50, False)
+    xmlvalidator.add_buffer('<doc a="x &big;">text &big;</doc>')
+    xmlvalidator.build()
+    doc = xmlvalidator.children[0]
+    values = [*doc.attributes.values(), doc.children[0].content]
+    for value in values:
+        assert isinstance(value, XmlLazyChars)
+        assert value.raw.sources == {}
+        assert value.dtd is xmlvalidator.dtd
+        assert not hasattr(value.expand, "__self__")
+    assert [value.strchars for value in values] == ["x " + "one two " * 50, "text " + "one\ttwo " * 50]
+    assert values[0].raw is None
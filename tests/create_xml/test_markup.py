@@ -0,0 +1,72 @@
+import io
+
+from errcl import CritErr
+from xmlstruct.cdata import CData
+from xmlstruct.comment import Comment
+from xmlstruct.instructions import Instructions
+from xmlstruct.xmldecl import XmlDecl
+from xmltokens import XmlCharsView
+from xmlvalidator import XmlValidator
+
+
+SVG = (
+    "<?xml version='1.0' encoding=\"utf-8\"?>\n"
+    "<!-- a <b> -- c --->\n"
+    '<?xml-stylesheet href="a.css"?>\n'
+    "<svg><script><![CDATA[ if (a < b && c) { x = ']]' } ]]></script><?xml bad?><?1x?></svg>"
+)
+
+
+def get_errors(xmlvalidator: XmlValidator) -> list:
+    return [(error.err, xmlvalidator.get_error_pos(error).position) for error in xmlvalidator.err.tokens]
+
+
+def build(xml: str) -> XmlValidator:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer(xml)
+    xmlvalidator.build()
+    return xmlvalidator
+
+
+def test__markup_nodes() -> None:
+    xmlvalidator = build(SVG)
+    xml_decl, _, comment, _, instructions, _, svg = xmlvalidator.children
+    assert isinstance(xml_decl, XmlDecl)
+    assert [(name.strchars, value.strchars) for name, value in xml_decl.attributes] == [
+        ("version", "1.0"),
+        ("encoding", "utf-8"),
+    ]
+    assert isinstance(comment, Comment)
+    assert comment.content == " a <b> -- c -"
+    assert isinstance(instructions, Instructions)
+    assert (instructions.target, instructions.content) == ("xml-stylesheet", 'href="a.css"')
+    cdata = svg.children[0].children[0]
+    assert isinstance(cdata, CData)
+    assert isinstance(cdata.content, XmlCharsView)
+    assert cdata.content == " if (a < b && c) { x = ']]' } "
+
+
+def test__markup_errors() -> None:
+    assert get_errors(build(SVG)) == [
+        (CritErr.COMMENT_DOUBLE_HYPHEN, 50),
+        (CritErr.COMMENT_DOUBLE_HYPHEN, 55),
+        (CritErr.XML_DECL_INVALID, 162),
+        (CritErr.XML_DECL_VERSION_MISSING, 160),
+        (CritErr.XML_DECL_LOCATION_INVALID, 156),
+        (CritErr.PI_TARGET_INVALID, 169),
+    ]
+    assert get_errors(build("<!-- a")) == [(CritErr.NODE_MISSING_END, 0)]
+    assert get_errors(build("<![CDATA[a]]><svg/>")) == [(CritErr.CDATA_LOCATION_INVALID, 0)]
+
+
+def test__stream_does_not_split_markup() -> None:
+    expected = get_errors(build(SVG))
+    for chunk_size in range(1, len(SVG) + 1):
+        streamed = XmlValidator()
+        streamed.validate_stream(io.StringIO(SVG), chunk_size)
+        assert get_errors(streamed) == expected
+    streamed = XmlValidator()
+    streamed.feed("<svg><!-- <a> <b>")
+    assert streamed.pending == ["<!-- <a> <b>"]
+    streamed.feed(" --><g")
+    assert streamed.pending == ["<g"]
@@ -0,0 +1,63 @@
+import io
+
+from nodetree import NodeKind
+from nodetree import NodeRef
+from xmlvalidator import XmlValidator
+
+
+SVG = '<svg a="1">\n  <g>\n<path d="M0"/>\n  </g>\n<g><path/></g>\n</svg>'
+
+
+def get_rows(xmlvalidator: XmlValidator) -> list:
+    table = xmlvalidator.node_table
+    return [(table.kind[i], table.parent[i], table.get_root().get_ref(i).name) for i in range(len(table))]
+
+
+def get_elements(node: NodeRef) -> list[NodeRef]:
+    return [child for child in node if child.kind == NodeKind.ELEMENT]
+
+
+def test__node_table_structure() -> None:
+    xmlvalidator = XmlValidator(node_table=True)
+    xmlvalidator.add_buffer(SVG)
+    xmlvalidator.build()
+    table = xmlvalidator.node_table
+    svg = table.get_root().first_child
+    assert svg.kind == NodeKind.ELEMENT
+    assert [child.kind for child in svg] == [NodeKind.TEXT, NodeKind.ELEMENT, NodeKind.TEXT, NodeKind.ELEMENT, NodeKind.TEXT]
+    first_g, second_g = get_elements(svg)
+    assert [child.name for child in first_g] == ["", "path", ""]
+    assert (svg.start, svg.end) == (0, len(SVG))
+    path = get_elements(first_g)[0]
+    assert SVG[path.start : path.end] == '<path d="M0"/>'
+    assert SVG[second_g.start : second_g.end] == "<g><path/></g>"
+    assert [node.index for node in table.iter_named("path")] == [path.index, second_g.first_child.index]
+    text = path.next_sibling
+    assert SVG[text.start : text.end] == "\n  "
+    assert table.symbols.names == ["svg", "a", "g", "path", "d"]
+
+
+def test__node_table_from_stream() -> None:
+    xmlvalidator = XmlValidator(node_table=True)
+    xmlvalidator.add_buffer(SVG)
+    xmlvalidator.build()
+    expected = get_rows(xmlvalidator)
+    for chunk_size in range(1, len(SVG) + 1):
+        streamed = XmlValidator(node_table=True)
+        streamed.validate_stream(io.StringIO(SVG), chunk_size)
+        assert get_rows(streamed) == expected
+
+
+def test__node_table_keeps_only_open_tags() -> None:
+    xmlvalidator = XmlValidator(node_table=True)
+    xmlvalidator.add_buffer("<svg>" + "<g><path/>text</g>" * 100)
+    xmlvalidator.build()
+    svg = xmlvalidator.children[0]
+    assert svg.children == []
+    assert len(xmlvalidator.node_table) == 1 + 1 + 100 * 3
+    xmlvalidator = XmlValidator(node_table=True)
+    xmlvalidator.add_buffer("<svg><g><path/>")
+    xmlvalidator.build()
+    g = xmlvalidator.children[0].children[0]
+    assert g.name == "g"
+    assert g.children == []
@@ -0,0 +1,36 @@
+from errcl import CritErr
+from xmlvalidator import XmlValidator
+
+
+def test__deep_nesting() -> None:
+    depth = 5000
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer("<svg>" + "<g>" * depth + "<path/>" + "</g>" * depth + "</svg>")
+    xmlvalidator.build()
+    assert xmlvalidator.err.tokens == []
+    assert xmlvalidator.open_nodes == []
+    node = xmlvalidator.children[0]
+    for _ in range(depth):
+        assert node.closed
+        node = node.children[0]
+    assert node.name == "g"
+
+
+def test__end_tag_closes_through_open_tags() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer("<a><b><c></a>")
+    xmlvalidator.build()
+    assert [(error.err, error.xmlchars.strchars) for error in xmlvalidator.err.tokens] == [
+        (CritErr.TAG_NOT_CLOSED, "<"),
+        (CritErr.TAG_NOT_CLOSED, "<"),
+    ]
+    assert [xmlvalidator.get_error_pos(error).position for error in xmlvalidator.err.tokens] == [6, 3]
+    assert xmlvalidator.open_nodes == []
+    assert xmlvalidator.get_active_node() is xmlvalidator
+
+
+def test__unmatched_end_tag_keeps_open_nodes() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer("<a><b></x>")
+    xmlvalidator.build()
+    assert [tag.name for tag in xmlvalidator.open_nodes] == ["a", "b"]
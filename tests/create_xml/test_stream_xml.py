@@ -0,0 +1,94 @@
+import io
+
+from errcl import CritErr
+from xmlvalidator import XmlValidator
+
+
+SVG = '<svg a="1">\r\n  <g>\n<path d="M0"/>\n  </g junk>\r\n<g><g></g></g>\n</svg>'
+
+
+def get_errors(xmlvalidator: XmlValidator) -> list:
+    return [
+        (error.err, error.xmlchars.strchars, xmlvalidator.get_error_pos(error))
+        for error in xmlvalidator.err.tokens
+    ]
+
+
+def get_sorted_errors(xmlvalidator: XmlValidator) -> list:
+    errors = [(xmlvalidator.get_error_pos(error), error.err.name) for error in xmlvalidator.err.tokens]
+    return sorted(errors)
+
+
+def test__stream_matches_build() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer(SVG)
+    xmlvalidator.build()
+    expected = get_errors(xmlvalidator)
+    assert len(expected) == 1
+    assert expected[0][2] == (40, 4, 7)
+    for chunk_size in range(1, len(SVG) + 1):
+        streamed = XmlValidator()
+        streamed.validate_stream(io.StringIO(SVG), chunk_size)
+        assert get_errors(streamed) == expected
+
+
+def test__stream_keeps_only_open_nodes() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.feed("<svg>" + "<path/>" * 100 + "<g>")
+    xmlvalidator.feed("<path/>")
+    root = xmlvalidator.children[0]
+    assert len(root.children) == 1
+    assert root.children[0].name == "g"
+    xmlvalidator.feed("</g></svg>")
+    xmlvalidator.close()
+    assert root.closed
+    assert xmlvalidator.children == [root]
+    assert xmlvalidator.buffers.count(None) == len(xmlvalidator.buffers)
+
+
+def test__stream_cuts_text_runs() -> None:
+    xml = (
+        "<!ELEMENT svg (g*)>\n<!ELEMENT g EMPTY>\n"
+        '<svg>\r\n  <g a=">"/> text &amp; more\r\n ]]> text<g>x</g></svg>'
+    )
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer(xml)
+    xmlvalidator.build()
+    expected = get_sorted_errors(xmlvalidator)
+    assert len(expected) == 3
+    # a run cut into parts is validated before the rest of it is parsed, only the order of errors differs
+    for chunk_size in range(1, len(xml) + 1):
+        streamed = XmlValidator()
+        streamed.validate_stream(io.StringIO(xml), chunk_size)
+        assert get_sorted_errors(streamed) == expected
+
+
+def test__stream_scans_only_new_chunks() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.feed("<p>" + "text " * 100)
+    assert xmlvalidator.pending == []
+    xmlvalidator.feed("a &amp")
+    assert xmlvalidator.pending == ["&amp"]
+    xmlvalidator.feed("; b]]")
+    assert xmlvalidator.pending == ["]]"]
+    xmlvalidator.feed("<!-- " + "<a>" * 100)
+    assert xmlvalidator.scan_window == "a>"
+    xmlvalidator.feed(" --></p>")
+    xmlvalidator.close()
+    assert xmlvalidator.err.tokens == []
+
+
+def test__stream_keeps_pieces_of_open_tags() -> None:
+    for xml in ("<a><b></a>", SVG.replace("<g><g></g></g>", "<g><g></g>")):
+        xmlvalidator = XmlValidator()
+        xmlvalidator.add_buffer(xml)
+        xmlvalidator.build()
+        expected = get_errors(xmlvalidator)
+        assert CritErr.TAG_NOT_CLOSED in [error[0] for error in expected]
+        for chunk_size in range(1, len(xml) + 1):
+            streamed = XmlValidator()
+            streamed.validate_stream(io.StringIO(xml), chunk_size)
+            assert get_errors(streamed) == expected
+    streamed = XmlValidator()
+    streamed.validate_stream(io.StringIO("<a>" + "<b/>" * 50 + "</a>"), 8)
+    assert streamed.buffers.count(None) == len(streamed.buffers)
@@ -0,0 +1,26 @@
+from errcl import CritErr
+from xmlvalidator import XmlValidator
+
+
+def test__names_are_interned() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer('<svg:svg fill="red"><path fill="blue"/><svg:path/></svg:svg>')
+    xmlvalidator.build()
+    symbols = xmlvalidator.dtd.symbols
+    root = xmlvalidator.children[0]
+    path, svg_path = root.children
+    assert root.closed
+    assert symbols.names == ["svg:svg", "svg", "fill", "path", "svg:path"]
+    assert root.prefix_id == svg_path.prefix_id == symbols.get_id("svg")
+    assert path.prefix_id == -1
+    assert path.name_id == symbols.get_id("path")
+
+
+def test__duplicate_attribute() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer('<path d="M0" fill="red" d="M1"/>')
+    xmlvalidator.build()
+    assert [(error.err, error.xmlchars.strchars) for error in xmlvalidator.err.tokens] == [
+        (CritErr.ATTR_DUPLICATE, "d")
+    ]
+    assert xmlvalidator.children[0].attributes["d"] == "M0"
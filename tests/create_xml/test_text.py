@@ -0,0 +1,43 @@
+from errcl import CritErr
+from xmlstruct.text import Text
+from xmltokens import XmlCharsView
+from xmlvalidator import XmlValidator
+
+
+def build(xml: str, lazy_entities: bool = False) -> XmlValidator:
+    xmlvalidator = XmlValidator(lazy_entities=lazy_entities)
+    xmlvalidator.dtd.entity.register_gent("brand", "ACME &#169;", False)
+    xmlvalidator.add_buffer(xml)
+    xmlvalidator.build()
+    return xmlvalidator
+
+
+def get_texts(xmlvalidator: XmlValidator) -> list[str]:
+    return [child.content.strchars for child in xmlvalidator.children[0].children if isinstance(child, Text)]
+
+
+def test__one_text_node_per_run() -> None:
+    style = ".a { fill: red; }\n" * 1000
+    xmlvalidator = build(f"<svg><style>{style}</style>\n</svg>")
+    style_node = xmlvalidator.children[0].children[0]
+    assert len(style_node.children) == 1
+    assert isinstance(style_node.children[0].content, XmlCharsView)
+    assert style_node.children[0].content == style
+    assert get_texts(xmlvalidator) == ["\n"]
+
+
+def test__text_references() -> None:
+    xml = "<p>a &lt; b &amp;&amp; &brand; &#x41;&unknown; & c</p>"
+    eager = build(xml)
+    assert get_texts(eager) == ["a < b && ACME © A&unknown; & c"]
+    assert eager.err.tokens == []
+    lazy = build(xml, lazy_entities=True)
+    assert get_texts(lazy) == get_texts(eager)
+
+
+def test__text_cdata_end() -> None:
+    xmlvalidator = build("<p>a ]]> b ]]&gt; c]]></p>")
+    assert [(error.err, xmlvalidator.get_error_pos(error).position) for error in xmlvalidator.err.tokens] == [
+        (CritErr.TEXT_CDATA_END, 5),
+        (CritErr.TEXT_CDATA_END, 19),
+    ]
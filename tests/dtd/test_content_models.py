@@ -0,0 +1,79 @@
+from dtd import ContentKind
+from dtd import ContentModel
+from dtd.dtdcore import Dtd
+from errcl import CritErr
+from errcl import ErrorCollector
+from errcl import ValidErr
+from xmlvalidator import XmlValidator
+
+
+def is_accepted(dtd: Dtd, content_model: ContentModel, children: str) -> bool:
+    state = 0
+    for child in children.split():
+        state = content_model.get_next_state(state, dtd.symbols.get_id(child))
+        if state < 0:
+            return False
+    return content_model.is_accepting(state)
+
+
+def test__children_model() -> None:
+    dtd = Dtd(ErrorCollector())
+    book = dtd.element.define_element("book", "(title, author+, publisher?, (price | free)*)")
+    assert book is not None
+    assert book.kind == ContentKind.CHILDREN
+    assert book.is_deterministic
+    assert is_accepted(dtd, book, "title author")
+    assert is_accepted(dtd, book, "title author author publisher price free price")
+    assert not is_accepted(dtd, book, "title")
+    assert not is_accepted(dtd, book, "title publisher")
+    assert not is_accepted(dtd, book, "title author undeclared")
+    assert dtd.err.tokens == []
+
+
+def test__other_models() -> None:
+    dtd = Dtd(ErrorCollector())
+    para = dtd.element.define_element("p", "(#PCDATA | em | strong)*")
+    assert para is not None and para.kind == ContentKind.MIXED and para.allows_text()
+    assert is_accepted(dtd, para, "em strong em")
+    assert not is_accepted(dtd, para, "p")
+    empty = dtd.element.define_element("br", "EMPTY")
+    assert empty is not None and is_accepted(dtd, empty, "") and not is_accepted(dtd, empty, "em")
+    anything = dtd.element.define_element("div", "ANY")
+    assert anything is not None and is_accepted(dtd, anything, "p br div")
+    assert dtd.err.tokens == []
+
+
+def test__model_errors_at_compile_time() -> None:
+    dtd = Dtd(ErrorCollector())
+    assert not dtd.element.define_element("a", "((b, c) | (b, d))").is_deterministic
+    assert not dtd.element.define_element("e", "(b?, b)").is_deterministic
+    assert dtd.element.define_element("f", "(#PCDATA | em | em)*") is not None
+    assert dtd.element.define_element("g", "(#PCDATA | em)") is None
+    assert dtd.element.define_element("h", "(b, c | d)") is None
+    assert dtd.element.define_element("a", "EMPTY") is None
+    assert [(error.err, error.xmlchars.strchars) for error in dtd.err.tokens] == [
+        (ValidErr.NON_DETERMINISTIC_DUPLICATES, "b"),
+        (ValidErr.NON_DETERMINISTIC_DUPLICATES, "b"),
+        (ValidErr.MIXED_DUPLICATE_TAGS, "em"),
+        (CritErr.ELEMENT_MODEL_INVALID, "(#PCDATA | em)"),
+        (CritErr.ELEMENT_MODEL_INVALID, "|"),
+        (ValidErr.ELEMENT_ALREADY_DEFINED, "a"),
+    ]
+
+
+def test__element_declarations_are_compiled() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer("<!ELEMENT svg (title?, g*)>\n<!ELEMENT g (#PCDATA)>\n<svg/>")
+    xmlvalidator.build()
+    assert xmlvalidator.err.tokens == []
+    svg_id = xmlvalidator.dtd.symbols.get_id("svg")
+    assert xmlvalidator.dtd.element.get_model(svg_id).kind == ContentKind.CHILDREN
+    copied = xmlvalidator.dtd.copy(ErrorCollector())
+    assert is_accepted(copied, copied.element.get_model(svg_id), "title g g")
+
+
+def test__non_deterministic_model_is_not_checked() -> None:
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer("<!ELEMENT e (a?, a)>\n<!ELEMENT a EMPTY>\n<e><a/></e>")
+    xmlvalidator.build()
+    assert [error.err for error in xmlvalidator.err.tokens] == [ValidErr.NON_DETERMINISTIC_DUPLICATES]
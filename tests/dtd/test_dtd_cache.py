@@ -0,0 +1,129 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from dtd import DtdCache
+from dtd.dtdcore import Dtd
+from errcl import CritErr
+from errcl import ErrorCollector
+from errcl import ValidErr
+from xmlresolver import XmlResolver
+from xmlvalidator import XmlValidator
+
+
+DTD = "<!ELEMENT svg (g*)>\n<!ELEMENT g EMPTY>\n"
+
+
+def compile_dtd() -> Dtd:
+    err = ErrorCollector()
+    dtd = Dtd(err)
+    dtd.entity.register_gent("brand", "ACME &#169;", False)
+    err.tokens.clear()
+    return dtd
+
+
+def validate(tmp_path: Path, xml: str) -> XmlValidator:
+    xmlvalidator = XmlValidator(resolver=XmlResolver(), dtd_cache=DtdCache(tmp_path / "cache"))
+    xmlvalidator.add_file(tmp_path / "doc.xml")
+    assert xmlvalidator.load_dtd(None, "svg.dtd")
+    xmlvalidator.add_buffer(xml)
+    xmlvalidator.build()
+    return xmlvalidator
+
+
+def get_errors(xmlvalidator: XmlValidator) -> list:
+    return [(error.err, error.xmlchars.strchars) for error in xmlvalidator.err.tokens]
+
+
+def test__cache_roundtrip(tmp_path: Path) -> None:
+    cache = DtdCache(tmp_path / "cache")
+    compiled: list[Dtd] = []
+
+    def compile_once() -> tuple[Dtd, list[Path]]:
+        compiled.append(compile_dtd())
+        return compiled[-1], []
+
+    cache.get_or_compile("<!ENTITY brand 'ACME &#169;'>", compile_once)
+    dtd = DtdCache(tmp_path / "cache").get_or_compile("<!ENTITY brand 'ACME &#169;'>", compile_once)
+    assert len(compiled) == 1
+    assert dtd is not compiled[0]
+    xmlvalidator = XmlValidator(dtd=dtd)
+    xmlvalidator.add_buffer("<p>&brand;</p>")
+    xmlvalidator.build()
+    assert xmlvalidator.children[0].children[0].content == "ACME ©"
+
+
+def test__cache_entry_follows_modules(tmp_path: Path) -> None:
+    module = tmp_path / "module.dtd"
+    module.write_text("<!ELEMENT a (#PCDATA)>")
+    cache = DtdCache(tmp_path / "cache")
+    cache.store("%module;", compile_dtd(), [module])
+    assert cache.load("%module;") is not None
+    assert cache.get_key(["ab", "c"]) != cache.get_key(["a", "bc"])
+    module.write_text("<!ELEMENT a EMPTY>")
+    assert cache.load("%module;") is None
+    module.unlink()
+    assert cache.load("%module;") is None
+
+
+def test__broken_entry_is_compiled_again(tmp_path: Path) -> None:
+    cache = DtdCache(tmp_path)
+    text = "<!ENTITY brand 'ACME'>"
+    for broken in (b"\x80\x05broken", b"\x80\x05X\x02\x00\x00\x00\xff\xfe."):
+        cache.get_path(text).write_bytes(broken)
+        assert cache.load(text) is None
+        assert not cache.get_path(text).exists()
+    cache.store(text, compile_dtd(), [])
+    assert "brand" in cache.load(text).entity.gents
+
+
+def test__validator_uses_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "svg.dtd").write_text(DTD)
+    xml = "<svg><g/><path/></svg>"
+    expected = [(ValidErr.UNDEFINED_ELEMENT, "path"), (ValidErr.ELEMENT_NOT_ALLOWED, "path")]
+    first = validate(tmp_path, xml)
+    assert get_errors(first) == expected
+    assert first.children[0].name == "svg"
+
+    def no_compile(self: XmlValidator, buffer: object) -> list[Path]:
+        raise AssertionError("compiled again")
+
+    monkeypatch.setattr(XmlValidator, "compile_dtd", no_compile)
+    second = validate(tmp_path, xml)
+    assert get_errors(second) == expected
+    monkeypatch.undo()
+    (tmp_path / "svg.dtd").write_text(DTD.replace("EMPTY", "ANY"))
+    assert validate(tmp_path, "<svg><g><svg/></g></svg>").err.tokens == []
+
+
+def test__compile_example_dtd(tmp_path: Path) -> None:
+    examples = Path(__file__).parents[2] / "examples"
+    cache = DtdCache(tmp_path / "cache")
+    xmlvalidator = XmlValidator(resolver=XmlResolver(), dtd_cache=cache)
+    assert xmlvalidator.load_dtd(None, str(examples / "main.dtd"))
+    assert xmlvalidator.err.tokens == []
+    assert "module1" in xmlvalidator.dtd.entity.pents
+    main = (examples / "main.dtd").read_text()
+    assert cache.load(main) is not None
+    with cache.get_path(main).open("rb") as file:
+        assert pickle.load(file).modules == ((examples / "module1.dtd").resolve(),)
+    xmlvalidator.add_buffer("<module1Element>text</module1Element>")
+    xmlvalidator.build()
+    assert xmlvalidator.err.tokens == []
+
+
+def test__compile_skips_unsupported_declarations(tmp_path: Path) -> None:
+    (tmp_path / "svg.dtd").write_text(
+        "<!ENTITY % g '<!ELEMENT g EMPTY>'>\n"
+        "<!ATTLIST svg width CDATA #IMPLIED>\n"
+        "<![IGNORE[ <![INCLUDE[ <!ELEMENT g ANY> ]]> ]]>\n"
+        "<!ELEMENT svg (g*)> %g; %path;"
+    )
+    xmlvalidator = validate(tmp_path, "<svg><g/></svg>")
+    assert [error[0] for error in get_errors(xmlvalidator)] == [
+        CritErr.DTD_DECL_UNSUPPORTED,
+        CritErr.DTD_DECL_UNSUPPORTED,
+        CritErr.ENTITY_UNDEFINED,
+    ]
+    assert get_errors(xmlvalidator)[1][1] == "<![IGNORE[ <![INCLUDE[ <!ELEMENT g ANY> ]]> ]]>"
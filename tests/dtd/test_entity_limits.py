@@ -0,0 +1,69 @@
+from dtd.dtdcore import Dtd
+from dtd.dtdentity import ExpansionLimits
+from errcl import CritErr
+from errcl import ErrorCollector
+from xmltokens import XmlSpans
+from xmlvalidator import XmlValidator
+
+
+def create_laughs(dtd: Dtd, levels: int) -> None:
+    dtd.entity.register_gent("lol0", "lol", False)
+    for level in range(1, levels + 1):
+        dtd.entity.register_gent(f"lol{level}", f"&lol{level - 1};" * 10, False)
+
+
+def test__billion_laughs_is_aborted():
+    err = ErrorCollector()
+    dtd = Dtd(err, ExpansionLimits(max_expanded_chars=100_000))
+    create_laughs(dtd, 9)
+    assert dtd.entity.deref_gent(XmlSpans.from_str("&lol9;", 1)) is None
+    assert dtd.entity.expanded_chars <= 100_000 + 30_000
+    assert [token.err for token in err.tokens] == [CritErr.ENTITY_EXPANSION_LIMIT]
+    assert err.tokens[0].options == {"limit": "size"}
+    assert dtd.entity.deref_gent(XmlSpans.from_str("&lol1;", 1)) is None
+    assert len(err.tokens) == 1
+
+
+def test__expansion_depth_limit():
+    err = ErrorCollector()
+    dtd = Dtd(err, ExpansionLimits(max_depth=3))
+    dtd.entity.register_gent("e0", "x", False)
+    for level in range(1, 6):
+        dtd.entity.register_gent(f"e{level}", f"&e{level - 1};", False)
+    assert dtd.entity.deref_gent(XmlSpans.from_str("&e3;", 1)) == "x"
+    assert dtd.entity.deref_gent(XmlSpans.from_str("&e5;", 1)) is None
+    assert err.tokens[0].options == {"limit": "depth"}
+
+
+def test__expansion_amplification_limit():
+    err = ErrorCollector()
+    dtd = Dtd(err, ExpansionLimits(max_amplification=10.0, amplification_threshold=1000))
+    dtd.entity.add_document_chars(100)
+    create_laughs(dtd, 3)
+    assert dtd.entity.deref_gent(XmlSpans.from_str("&lol2;", 1)) == "lol" * 100
+    assert dtd.entity.deref_gent(XmlSpans.from_str("&lol3;", 1)) is None
+    assert err.tokens[0].options == {"limit": "amplification"}
+
+
+def test__entity_recursion_is_reported():
+    xmlvalidator = XmlValidator()
+    xmlvalidator.dtd.entity.register_gent("a", "&b;", False)
+    xmlvalidator.dtd.entity.register_gent("b", "&a;", False)
+    xmlvalidator.add_buffer("<p>&a;</p>")
+    xmlvalidator.build()
+    assert [token.err for token in xmlvalidator.err.tokens] == [CritErr.ENTITY_RECURSION]
+    assert not xmlvalidator.dtd.entity.is_expansion_aborted
+    assert xmlvalidator.dtd.entity.expanding_ids == set()
+
+
+def test__reference_after_recursion_is_expanded():
+    xmlvalidator = XmlValidator()
+    xmlvalidator.dtd.entity.register_gent("a", "x&b;", False)
+    xmlvalidator.dtd.entity.register_gent("b", "&a;", False)
+    xmlvalidator.dtd.entity.register_gent("c", "ok", False)
+    xmlvalidator.add_buffer("<p>&a;&lt;&c;<q>&b;&c;</q></p>")
+    xmlvalidator.build()
+    assert [token.err for token in xmlvalidator.err.tokens] == [CritErr.ENTITY_RECURSION, CritErr.ENTITY_RECURSION]
+    p = xmlvalidator.children[0]
+    assert p.children[0].content == "&a;<ok"
+    assert p.children[1].children[0].content == "&b;ok"
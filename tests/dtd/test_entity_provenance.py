@@ -0,0 +1,50 @@
+from dtd.dtdcore import Dtd
+from errcl import ErrorCollector
+from xmltokens import XmlSpans
+
+
+def test__register_gent_tags_replacement_text():
+    dtd = Dtd(ErrorCollector())
+    dtd.entity.register_gent("copy", "(c) &#65;", False)
+    gent = dtd.entity.gents["copy"]
+    assert gent.replacement_text is not None
+    assert gent.replacement_text == "(c) A"
+    assert gent.replacement_text.get_entity_id() == gent.entity_id
+
+
+def test__deref_gent_keeps_entity_origin():
+    dtd = Dtd(ErrorCollector())
+    dtd.entity.register_gent("inner", "in", False)
+    dtd.entity.register_gent("outer", "a&inner;b", False)
+    outer = dtd.entity.gents["outer"]
+    result = dtd.entity.deref_gent(XmlSpans.from_str("&outer;", 1))
+    assert result is not None
+    assert result == "ainb"
+    assert result.get_entity_id() == outer.entity_id
+
+
+def test__deref_gent_is_cached():
+    dtd = Dtd(ErrorCollector())
+    dtd.entity.register_gent("copy", "&#169; ACME", False)
+    first = dtd.entity.deref_gent(XmlSpans.from_str("&copy;", 1))
+    second = dtd.entity.deref_gent(XmlSpans.from_str("&copy;", 1))
+    assert first == "© ACME"
+    assert second is first
+
+
+def test__deref_gent_cache_follows_new_entities():
+    dtd = Dtd(ErrorCollector())
+    dtd.entity.register_gent("outer", "a&inner;", False)
+    before = dtd.entity.deref_gent(XmlSpans.from_str("&outer;", 1))
+    assert before == "a&inner;"
+    dtd.entity.register_gent("inner", "b", False)
+    after = dtd.entity.deref_gent(XmlSpans.from_str("&outer;", 1))
+    assert after == "ab"
+
+
+def test__deref_gent_same_entity_twice():
+    dtd = Dtd(ErrorCollector())
+    dtd.entity.register_gent("x", "x", False)
+    dtd.entity.register_gent("twice", "&x;&x;", False)
+    result = dtd.entity.deref_gent(XmlSpans.from_str("&twice;", 1))
+    assert result == "xx"
@@ -0,0 +1,130 @@
+from pathlib import Path
+
+from errcl import CritErr
+from errcl import ValidErr
+from xmlresolver import XmlResolver
+from xmlresolver import read_external
+from xmlvalidator import XmlValidator
+
+
+CATALOG = """<?xml version="1.0"?>
+<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+  <public publicId="-//ACME//ENTITIES  Chapter//EN" uri="dtds/chapter.ent"/>
+  <system systemId="http://acme.example/main.dtd" uri="dtds/main.dtd"/>
+  <group xml:base="dtds/" prefer="system">
+    <rewriteSystem systemIdStartString="http://acme.example/modules/" rewritePrefix="modules/"/>
+    <public publicId="-//ACME//ELEMENTS Module//EN" uri="modules/module1.dtd"/>
+  </group>
+  <nextCatalog catalog="more/catalog.xml"/>
+</catalog>
+"""
+NEXT_CATALOG = """<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+  <systemSuffix systemIdSuffix="/legacy.ent" uri="../dtds/chapter.ent"/>
+</catalog>
+"""
+
+
+def create_catalog(tmp_path: Path) -> XmlResolver:
+    (tmp_path / "dtds" / "modules").mkdir(parents=True)
+    (tmp_path / "more").mkdir()
+    (tmp_path / "catalog.xml").write_text(CATALOG)
+    (tmp_path / "more" / "catalog.xml").write_text(NEXT_CATALOG)
+    (tmp_path / "dtds" / "chapter.ent").write_text('<?xml encoding="utf-8"?>Chapter &amp; verse')
+    return XmlResolver([tmp_path / "catalog.xml"])
+
+
+def test__catalog_resolve(tmp_path: Path) -> None:
+    resolver = create_catalog(tmp_path)
+    dtds = tmp_path / "dtds"
+    assert resolver.resolve("-//ACME//ENTITIES Chapter//EN", "chapter.ent") == dtds / "chapter.ent"
+    assert resolver.resolve(None, "http://acme.example/main.dtd") == dtds / "main.dtd"
+    assert resolver.resolve(None, "http://acme.example/modules/a/b.dtd") == dtds / "modules" / "a" / "b.dtd"
+    assert resolver.resolve("-//ACME//ELEMENTS Module//EN", None) == dtds / "modules" / "module1.dtd"
+    # prefer="system", the public entry is not used when a system identifier is given
+    assert resolver.resolve("-//ACME//ELEMENTS Module//EN", "http://other.example/m.dtd") is None
+    assert resolver.resolve(None, "http://other.example/legacy.ent") == tmp_path / "more" / ".." / "dtds" / "chapter.ent"
+    assert resolver.resolve(None, "local.ent", tmp_path) == tmp_path / "local.ent"
+
+
+def test__external_entity_loaded_once(tmp_path: Path) -> None:
+    resolver = create_catalog(tmp_path)
+    read_external.cache_clear()
+    for _ in range(3):
+        xmlvalidator = XmlValidator(resolver=resolver)
+        xmlvalidator.dtd.entity.register_gent("ch", "", False, "chapter.ent", "-//ACME//ENTITIES Chapter//EN")
+        xmlvalidator.add_buffer("<p>&ch;|&ch;</p>")
+        xmlvalidator.build()
+        assert xmlvalidator.children[0].children[0].content == "Chapter & verse|Chapter & verse"
+        assert len(xmlvalidator.buffers) == 2
+    assert read_external.cache_info().misses == 1
+    (tmp_path / "dtds" / "chapter.ent").write_text("Changed chapter")
+    assert resolver.load(None, "http://other.example/legacy.ent").chars == "Changed chapter"
+
+
+def test__external_entity_needs_resolver(tmp_path: Path) -> None:
+    create_catalog(tmp_path)
+    xmlvalidator = XmlValidator()
+    xmlvalidator.dtd.entity.register_gent("ch", "", False, str(tmp_path / "dtds" / "chapter.ent"))
+    xmlvalidator.add_buffer("<p>&ch;</p>")
+    xmlvalidator.build()
+    assert xmlvalidator.children[0].children[0].content == ""
+    assert len(xmlvalidator.buffers) == 1
+
+
+def test__external_entity_with_undecodable_bytes(tmp_path: Path) -> None:
+    resolver = create_catalog(tmp_path)
+    (tmp_path / "dtds" / "chapter.ent").write_bytes(b"caf\xe9")
+    xmlvalidator = XmlValidator(resolver=resolver)
+    xmlvalidator.dtd.entity.register_gent("ch", "", False, "chapter.ent", "-//ACME//ENTITIES Chapter//EN")
+    xmlvalidator.add_buffer("<p>&ch;</p>")
+    xmlvalidator.build()
+    assert xmlvalidator.children[0].children[0].content == "caf�"
+    assert [error.err for error in xmlvalidator.err.tokens] == [CritErr.CHAR_UNDECODABLE]
+    assert xmlvalidator.get_error_pos(xmlvalidator.err.tokens[0]).position == 3
+
+
+def test__external_entity_base(tmp_path: Path) -> None:
+    resolver = create_catalog(tmp_path)
+    (tmp_path / "dtds" / "modules" / "part.ent").write_text("Module part")
+    xmlvalidator = XmlValidator(resolver=resolver)
+    # declared by dtds/modules/main.dtd, the system id is relative to that module and not to the document
+    xmlvalidator.dtd.entity.register_gent("part", "", False, "part.ent", base=tmp_path / "dtds" / "modules")
+    xmlvalidator.dtd.entity.register_gent("missing", "", False, "missing.ent")
+    xmlvalidator.add_buffer("<p>&part;|&missing;|&missing;</p>")
+    xmlvalidator.build()
+    assert xmlvalidator.children[0].children[0].content == "Module part|&missing;|&missing;"
+    assert [(error.err, error.xmlchars.strchars) for error in xmlvalidator.err.tokens] == [
+        (CritErr.ENTITY_LOAD_FAILED, "&missing;")
+    ]
+
+
+def test__external_subset_modules(tmp_path: Path) -> None:
+    resolver = create_catalog(tmp_path)
+    examples = Path(__file__).parents[2] / "examples"
+    dtds = tmp_path / "dtds"
+    (dtds / "module1.dtd").write_text((examples / "module1.dtd").read_text())
+    # module2 includes the main DTD again, that reference is reported and compiling ends
+    (dtds / "modules" / "module2.dtd").write_text(
+        (examples / "module2.dtd").read_text() + '<!ENTITY % main SYSTEM "../main.dtd">\n%main;\n'
+    )
+    (dtds / "main.dtd").write_text(
+        (examples / "main.dtd").read_text()
+        + '<!ENTITY % module2 PUBLIC "-//ACME//ELEMENTS Module 2//EN" "modules/module2.dtd">\n%module2;\n'
+    )
+    xmlvalidator = XmlValidator(resolver=resolver)
+    assert xmlvalidator.load_dtd(None, "http://acme.example/main.dtd")
+    # main.dtd comes from the catalog, its modules resolve relative to it
+    assert list(xmlvalidator.external_slots) == [
+        (dtds / path).resolve() for path in ("main.dtd", "module1.dtd", "modules/module2.dtd")
+    ]
+    assert [(error.err, error.xmlchars.strchars) for error in xmlvalidator.err.tokens] == [
+        (CritErr.ENTITY_ALREADY_REGISTERED, "module1"),
+        (ValidErr.ELEMENT_ALREADY_DEFINED, "module1Element"),
+        (CritErr.ENTITY_ALREADY_REGISTERED, "module2"),
+        (CritErr.ENTITY_RECURSION, "%module2;"),
+    ]
+    xmlvalidator.err.tokens.clear()
+    xmlvalidator.add_buffer("<module1Element>text</module1Element>")
+    xmlvalidator.build()
+    assert xmlvalidator.err.tokens == []
+    assert xmlvalidator.dtd.element.get_model(xmlvalidator.dtd.symbols.get_id("module2Element")) is not None
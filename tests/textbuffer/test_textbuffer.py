@@ -39,3 +39,31 @@ def test_buffer(input_str, expected_valid, expected_invalid, expected_discourage
     assert buffer.valid_chars == expected_valid
     assert buffer.invalid_and_skipped_chars == expected_invalid
     assert buffer.valid_but_discouraged_chars == expected_discouraged
+
+
+def test_buffer_clean_input_is_not_copied():
+    chars = "<svg width='10'>\n\t<path d='M0 0'/>\n</svg>" * 100
+    buffer = TextBuffer(chars, 0)
+    assert buffer.valid_chars is chars
+    assert buffer.invalid_and_skipped_chars == []
+    assert buffer.valid_but_discouraged_chars == []
+
+
+def test_buffer_supplementary_plane_chars():
+    buffer = TextBuffer("a\U0001F600\U0001FFFE\r\nb￾", 0)
+    assert buffer.valid_chars == "a\U0001F600\U0001FFFE\nb"
+    assert buffer.invalid_and_skipped_chars == [(6, 0xFFFE)]
+    assert buffer.valid_but_discouraged_chars == [(2, 0x1FFFE)]
+
+
+def test_buffer_original_positions():
+    buffer = TextBuffer("ab\r\ncd\x00e\r\nf\rg", 0)
+    assert buffer.valid_chars == "ab\ncde\nf\ng"
+    assert [buffer.get_original_pos(pos) for pos in range(len(buffer.valid_chars))] == [
+        0, 1, 2, 4, 5, 7, 8, 10, 11, 12
+    ]
+    assert buffer.get_char_pos(0) == (0, 1, 1)
+    assert buffer.get_char_pos(3) == (4, 2, 1)
+    assert buffer.get_char_pos(5) == (7, 2, 4)
+    assert buffer.get_char_pos(7) == (10, 3, 1)
+    assert buffer.get_char_pos(9) == (12, 4, 1)
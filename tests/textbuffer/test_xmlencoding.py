@@ -0,0 +1,61 @@
+import codecs
+
+import pytest
+from errcl import CritErr
+from xmlencoding import decode_xml, detect_encoding
+from xmlvalidator import XmlValidator
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (codecs.BOM_UTF8 + b"<a/>", ("utf-8", 3)),
+        (codecs.BOM_UTF16_LE + "<a/>".encode("utf-16-le"), ("utf-16-le", 2)),
+        (codecs.BOM_UTF16_BE + "<a/>".encode("utf-16-be"), ("utf-16-be", 2)),
+        (codecs.BOM_UTF32_LE + "<a/>".encode("utf-32-le"), ("utf-32-le", 4)),
+        ('<?xml version="1.0"?><a/>'.encode("utf-16-le"), ("utf-16-le", 0)),
+        ('<?xml version="1.0"?><a/>'.encode("utf-32-be"), ("utf-32-be", 0)),
+        (b'<?xml version="1.0" encoding="ISO-8859-1"?><a/>', ("iso8859-1", 0)),
+        (b"<?xml version='1.0' encoding='UTF-16'?><a/>", ("utf-8", 0)),
+        (b'<?xml version="1.0" encoding="unknown-enc"?><a/>', ("utf-8", 0)),
+        (b"<a/>", ("utf-8", 0)),
+        ('<?xml version="1.0" encoding="cp500"?><a/>'.encode("cp500"), ("cp500", 0)),
+    ],
+)
+def test_detect_encoding(data, expected):
+    assert detect_encoding(data) == expected
+
+
+def test_decode_clean_ascii():
+    assert decode_xml(b"<svg>\n\t<g/></svg>") == ("<svg>\n\t<g/></svg>", True)
+    assert decode_xml(b"<svg>\r\n</svg>") == ("<svg>\r\n</svg>", False)
+    assert decode_xml("<svg>ž</svg>".encode()) == ("<svg>ž</svg>", False)
+    assert decode_xml(b'<?xml version="1.0" encoding="ISO-8859-1"?><a>\xe9</a>')[0].endswith("<a>é</a>")
+
+
+def test_add_bytes_buffer():
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer(codecs.BOM_UTF16_LE + "<svg>\r\n</svg>".encode("utf-16-le"))
+    assert xmlvalidator.buffers[0].valid_chars == "<svg>\n</svg>"
+    xmlvalidator.build()
+    assert xmlvalidator.children[0].closed
+
+
+def test_undecodable_bytes_are_reported():
+    assert decode_xml(b'<?xml version="1.0"?><p>caf\xe9</p>')[0].endswith("<p>caf\udce9</p>")
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_buffer(b'<?xml version="1.0"?><p>caf\xe9 \xff</p>')
+    xmlvalidator.build()
+    assert xmlvalidator.buffers[0].valid_chars.endswith("<p>caf\ufffd \ufffd</p>")
+    errors = [(error.err, xmlvalidator.get_error_pos(error)) for error in xmlvalidator.err.tokens]
+    assert errors == [(CritErr.CHAR_UNDECODABLE, (27, 1, 28)), (CritErr.CHAR_UNDECODABLE, (29, 1, 30))]
+
+
+def test_undecodable_bytes_in_stream(tmp_path):
+    path = tmp_path / "a.xml"
+    path.write_bytes(b"<p>\r\ncaf\xe9</p>")
+    xmlvalidator = XmlValidator()
+    xmlvalidator.add_file(path)
+    xmlvalidator.build()
+    errors = [(error.err, xmlvalidator.get_error_pos(error)) for error in xmlvalidator.err.tokens]
+    assert errors == [(CritErr.CHAR_UNDECODABLE, (8, 2, 4))]
@@ -0,0 +1,43 @@
+from dtd.dtdcore import Dtd
+from errcl import CritErr
+from errcl import ErrorCollector
+from textbuffer import TextBuffer
+from xmlstruct.pubidliteral import PubidLiteral
+from xmltokens import XmlProccesor
+from xmltokens import XmlSpans
+from xmltokens.xmlcharclass import NAME_EXTRA_RANGES
+from xmltokens.xmlcharclass import NAME_START_RANGES
+from xmltokens.xmlcharclass import is_namechar
+from xmltokens.xmlcharclass import is_namestartchar
+
+
+def in_ranges(code: int, ranges: list[tuple[int, int]]) -> bool:
+    return any(first <= code <= last for first, last in ranges)
+
+
+def test__char_table_matches_ranges():
+    for code in [*range(0x10000), 0x10000, 0xEFFFF, 0xF0000, 0x10FFFF]:
+        is_start = in_ranges(code, NAME_START_RANGES)
+        assert is_namestartchar(chr(code)) == is_start
+        assert is_namechar(chr(code)) == (is_start or in_ranges(code, NAME_EXTRA_RANGES))
+
+
+def test__name_and_nmtoken():
+    assert XmlSpans.from_str("svg:path-1.a·", 1).is_xmlname()
+    assert not XmlSpans.from_str("1abc", 1).is_xmlname()
+    assert not XmlSpans.from_str("", 1).is_xmlname()
+    assert XmlSpans.from_str("1abc", 1).is_nmtoken()
+    assert not XmlSpans.from_str("a b", 1).is_nmtoken()
+
+
+def test__pubid_literal_reports_each_invalid_char():
+    err = ErrorCollector()
+    proc = XmlProccesor(XmlSpans.from_buffer(TextBuffer('"-//W3C//DTD {SVG} 1.1//EN" ', 0), 1))
+    literal = PubidLiteral(proc, Dtd(err), err)
+    assert literal.content == "-//W3C//DTD {SVG} 1.1//EN"
+    assert literal.endquote == '"'
+    assert [(token.err, token.intoken_pointer) for token in err.tokens] == [
+        (CritErr.PUBID_LITERAL_CHAR_NOT_ALLOWED, 12),
+        (CritErr.PUBID_LITERAL_CHAR_NOT_ALLOWED, 16),
+    ]
+    assert XmlSpans.from_str("-//W3C//DTD SVG 1.1//EN", 1).check_pubid_literal()
@@ -0,0 +1,116 @@
+from textbuffer import TextBuffer
+from xmltokens import XmlProccesor, XmlSpans
+
+
+def create_proc(text: str) -> XmlProccesor:
+    return XmlProccesor(XmlSpans.from_buffer(TextBuffer(text, 0), 1))
+
+
+def test__scan_name():
+    proc = create_proc("svg:path d='M0'/>")
+    assert proc.scan_name() == "svg:path"
+    assert proc.peek_char() == " "
+    proc.move()
+    assert proc.scan_name() == "d"
+    assert proc.peek_char() == "="
+
+
+def test__scan_name_stops_at_empty_tag_end():
+    proc = create_proc("a/b/>")
+    assert proc.scan_name() == "a/b"
+    assert proc.match("/>")
+
+
+def test__scan_until():
+    proc = create_proc("abc<def")
+    assert proc.scan_until("<&") == "abc"
+    assert proc.scan_until("<&") == ""
+    proc.move()
+    assert proc.scan_until("<&") == "def"
+    assert proc.is_end()
+
+
+def test__scan_quoted():
+    proc = create_proc("'-//W3C//DTD SVG 1.1//EN' rest")
+    proc.move()
+    literal = proc.scan_quoted("'")
+    assert literal == "-//W3C//DTD SVG 1.1//EN"
+    assert literal.xmlchars[0].get_buffer_pos() == 1
+    assert proc.peek_char() == "'"
+
+
+def test__scan_quoted_unterminated():
+    proc = create_proc("'abc")
+    proc.move()
+    assert proc.scan_quoted("'") == "abc"
+    assert proc.is_end()
+
+
+def test__ins_repl_text_keeps_scanning_after_replacement():
+    proc = create_proc("a&x;b&y;c")
+    proc.move(1)
+    proc.ins_repl_text(3, XmlSpans.from_str("XX", 2))
+    proc.move(2)
+    assert proc.peek_char() == "b"
+    proc.move()
+    assert proc.find(";") == 2
+    proc.ins_repl_text(3, XmlSpans.from_str("Y", 3))
+    assert proc.peek_char() == "Y"
+    assert proc.remainder() == "Yc"
+    assert proc.xmlchars == "aXXbYc"
+    assert proc.xmlchars.get_xmlchar(5).buffer_pos == 8
+
+
+def test__reads_behind_pointer_do_not_join_pieces():
+    proc = create_proc("a&x;b&y;c")
+    proc.move(1)
+    proc.ins_repl_text(3, XmlSpans.from_str("XX", 2))
+    proc.move(3)
+    proc.ins_repl_text(3, XmlSpans.from_str("Y", 3))
+    proc.move(1)
+    assert proc.peek_char(-1) == "Y"
+    assert proc.match("XX", -4)
+    proc.pointer = 0
+    assert proc.read(1, 2) == "XX"
+    proc.move()
+    assert proc.scan_until("X") == ""
+    assert proc.find("X") == 0
+    # the run goes on past the pieces, still nothing is joined
+    assert proc.scan_until("c") == "XXbY"
+    assert len(proc.head) == 4
+    assert proc.xmlchars == "aXXbYc"
+
+
+def test__nested_and_adjacent_replacements_do_not_join_the_tail(monkeypatch):
+    text = "&a;&b;<p/>" + "x" * 10000 + "/>"
+    proc = create_proc(text)
+
+    def no_flush(self):
+        raise AssertionError("the whole text was joined")
+
+    monkeypatch.setattr(XmlProccesor, "flush", no_flush)
+    # nested, the replacement is expanded again from its start
+    proc.ins_repl_text(3, XmlSpans.from_str("[&c;]", 2))
+    proc.move()
+    proc.ins_repl_text(3, XmlSpans.from_str("C", 3))
+    assert proc.match("[C]", -1)
+    assert proc.read(0, 4) == "C]&b"
+    proc.move(2)
+    # back to back, the next reference starts right after the replaced one
+    assert proc.get_gent_ref() == "&b;"
+    proc.ins_repl_text(3, XmlSpans.from_str("B", 4))
+    assert proc.scan_until("<") == "B"
+    assert proc.find("/>") == 2
+    proc.pointer = 0
+    assert proc.scan_until("<") == "[C]B"
+    proc.move()
+    assert proc.scan_name() == "p"
+    assert proc.read(0, 2) == "/>"
+    # a run that leaves head stops where it would stop in the joined text
+    tag = create_proc("&a;>" + "x" * 10000)
+    tag.ins_repl_text(3, XmlSpans.from_str("ab/", 2))
+    assert tag.scan_name() == "ab"
+    assert tag.match("/>")
+    monkeypatch.undo()
+    assert proc.xmlchars == "[C]B<p/>" + "x" * 10000 + "/>"
+    assert proc.xmlchars.get_xmlchar(4).buffer_pos == 6
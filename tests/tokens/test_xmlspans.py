@@ -0,0 +1,68 @@
+from textbuffer import TextBuffer
+from xmltokens import XmlChar, XmlCharRef, XmlChars, XmlProccesor, XmlSpans
+
+
+def test__xmlspans_from_buffer():
+    buffer = TextBuffer("<tag a='1'/>", 0)
+    xmlspans = XmlSpans.from_buffer(buffer, 1)
+    assert xmlspans.strchars is buffer.valid_chars
+    assert len(xmlspans.spans) == 1
+    assert len(xmlspans) == 12
+    assert xmlspans.match("tag", 1)
+    assert xmlspans.find("a", 3) == 5
+    assert xmlspans.get_entity_id() == 1
+    assert xmlspans[5] == "a"
+    assert xmlspans[5].xmlchars[0].get_buffer_pos() == 5
+    assert xmlspans[1:4] == "tag"
+    assert xmlspans[1:4].xmlchars[2].get_buffer_pos() == 3
+
+
+def test__xmlspans_insert_and_remove():
+    buffer = TextBuffer("ab&#99;d", 0)
+    xmlspans = XmlSpans.from_buffer(buffer, 1)
+    chrref = XmlCharRef("c", *xmlspans[2:7].xmlchars)
+    xmlspans.remove(2, 7)
+    xmlspans.insert(chrref, 2)
+    assert xmlspans == "abcd"
+    assert len(xmlspans.spans) == 3
+    xmlchar_c = xmlspans.xmlchars[2]
+    assert isinstance(xmlchar_c, XmlCharRef)
+    assert xmlchar_c.get_buffer_pos() == 2
+    assert len(xmlchar_c.xmlchars) == 5
+    assert xmlspans.xmlchars[3].get_buffer_pos() == 7
+
+
+def test__xmlspans_entity_id():
+    buffer = TextBuffer("abc", 0)
+    xmlspans = XmlSpans.from_buffer(buffer, 1)
+    xmlspans.append(XmlChars(XmlChar("x", -1, -1, 5)))
+    assert xmlspans == "abcx"
+    new_xmlspans = xmlspans.copy_with_new_entity_id(7)
+    assert new_xmlspans.get_entity_id() == 7
+    assert xmlspans[3].get_entity_id() == 5
+
+
+def test__xmlproc_over_xmlspans():
+    buffer = TextBuffer("<a>text</a>", 0)
+    proc = XmlProccesor(XmlSpans.from_buffer(buffer, 1))
+    proc.move(3)
+    assert proc.read(0, 4) == "text"
+    assert proc.find("<") == 4
+    assert isinstance(proc.read(0, 4).materialize(), XmlSpans)
+
+
+def test__xmlspans_retag_is_constant():
+    xmlspans = XmlSpans.from_buffer(TextBuffer("abc", 0), 1)
+    xmlspans.append(XmlSpans.from_str("def", 4))
+    spans = xmlspans.spans
+    retagged = xmlspans.copy_with_new_entity_id(9)
+    assert retagged.spans is spans
+    assert retagged.get_entity_id() == 9
+    assert retagged.xmlchars[4].entity_id == 9
+    assert xmlspans.get_range_entity_id(0, 3) == 1
+    assert xmlspans.get_range_entity_id(3, 6) == 4
+    retagged.append(XmlSpans.from_str("g", 2))
+    assert xmlspans.spans is spans
+    assert len(spans) == 2
+    assert retagged.get_range_entity_id(0, 6) == 9
+    assert retagged.get_range_entity_id(6, 7) == 2
@@ -0,0 +1,46 @@
+import pytest
+from textbuffer import TextBuffer
+from xmltokens import XmlChar, XmlChars, XmlCharsView, XmlProccesor, XmlSpans
+
+
+def test__read_returns_view():
+    proc = XmlProccesor(XmlSpans.from_buffer(TextBuffer("<a x='1'/>", 0), 1))
+    token = proc.read(0, 2)
+    assert isinstance(token, XmlCharsView)
+    assert token == "<a"
+    assert token.match("a", 1)
+    assert token.find("a") == 1
+    assert token.get_entity_id() == 1
+    assert token.xmlchars[1].get_buffer_pos() == 1
+
+
+def test__view_is_stable_after_replacement():
+    proc = XmlProccesor(XmlChars(*[XmlChar(char, 0, pos, 1) for pos, char in enumerate("a&#98;c")]))
+    token = proc.read(0, 3)
+    proc.move()
+    proc.ins_repl_text(5, XmlChars(XmlChar("b", -1, -1, 1)))
+    assert proc.xmlchars == "abc"
+    assert token == "a&#"
+
+
+def test__single_char_predicates():
+    proc = XmlProccesor(XmlSpans.from_buffer(TextBuffer("a \"'", 0), 1))
+    assert proc.peek_char() == "a"
+    assert proc.is_space_at(1)
+    assert proc.is_quote_at(2)
+    assert proc.is_quote_at(3)
+    assert proc.peek_char(4) == ""
+    assert not proc.is_space_at(4)
+    proc.move()
+    assert proc.get_spaces() == " "
+    assert proc.peek_char() == '"'
+
+
+def test__view_is_not_retagged_in_place():
+    proc = XmlProccesor(XmlSpans.from_buffer(TextBuffer("<a/>", 0), 1))
+    token = proc.read(0, 2)
+    with pytest.raises(ValueError):
+        token.add_entity_id(5)
+    assert token.copy_with_new_entity_id(5).get_entity_id() == 5
+    assert token.get_entity_id() == 1
+    assert token.strchars is token.strchars